@@ -0,0 +1,40 @@
+"""add judging statistics to test_cases
+
+Revision ID: phase3_003
+Revises: phase2_002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'phase3_003'
+down_revision = 'phase2_002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # May already exist if init_db() added them
+    for column in ('run_count', 'fail_count', 'total_time_ms'):
+        try:
+            op.add_column('test_cases', sa.Column(column, sa.Integer(), server_default='0', nullable=True))
+        except Exception:
+            pass
+
+    # Backfill from existing results (compile errors say nothing about a test case)
+    judged = "r.test_case_id = test_cases.id AND COALESCE(r.status, '') != 'compile_error'"
+    op.execute(f"""
+        UPDATE test_cases SET
+            run_count = (SELECT COUNT(*) FROM submission_results r WHERE {judged}),
+            fail_count = (SELECT COUNT(*) FROM submission_results r WHERE {judged} AND NOT r.passed),
+            total_time_ms = (SELECT COALESCE(SUM(r.execution_time), 0) FROM submission_results r
+                             WHERE {judged})
+    """)
+
+
+def downgrade() -> None:
+    for column in ('total_time_ms', 'fail_count', 'run_count'):
+        try:
+            op.drop_column('test_cases', column)
+        except Exception:
+            pass
@@ -0,0 +1,64 @@
+"""add leaderboard_problem_scores (best score per participant and problem)
+
+Revision ID: phase3_004
+Revises: phase3_003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'phase3_004'
+down_revision = 'phase3_003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # May already exist if init_db() created it
+    try:
+        op.create_table(
+            'leaderboard_problem_scores',
+            sa.Column('entry_id', sa.String(36),
+                      sa.ForeignKey('leaderboard_entries.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('problem_id', sa.String(36), sa.ForeignKey('problems.id'), primary_key=True),
+            sa.Column('best_score', sa.Numeric(5, 2), server_default='0'),
+            sa.Column('updated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP')),
+        )
+    except Exception:
+        pass
+
+    # Backfill best scores from judged submissions — team entries from the
+    # team's submissions, individual entries from the user's own
+    op.execute("""
+        INSERT INTO leaderboard_problem_scores (entry_id, problem_id, best_score, updated_at)
+        SELECT e.id, s.problem_id, MAX(s.score), CURRENT_TIMESTAMP
+        FROM leaderboard_entries e
+        JOIN submissions s ON s.event_id = e.event_id AND (
+            (e.team_id IS NOT NULL AND s.team_id = e.team_id)
+            OR (e.team_id IS NULL AND s.user_id = e.user_id)
+        )
+        WHERE s.status NOT IN ('pending', 'queued', 'running')
+          AND NOT EXISTS (
+              SELECT 1 FROM leaderboard_problem_scores x
+              WHERE x.entry_id = e.id AND x.problem_id = s.problem_id
+          )
+        GROUP BY e.id, s.problem_id
+    """)
+
+    # Make entry totals agree with the table so later deltas start from it
+    # (entries without problem scores, e.g. MCQ exams, are left alone)
+    op.execute("""
+        UPDATE leaderboard_entries SET
+            total_score = (SELECT COALESCE(SUM(p.best_score), 0) FROM leaderboard_problem_scores p
+                           WHERE p.entry_id = leaderboard_entries.id),
+            problems_solved = (SELECT COUNT(*) FROM leaderboard_problem_scores p
+                               WHERE p.entry_id = leaderboard_entries.id AND p.best_score >= 100)
+        WHERE id IN (SELECT entry_id FROM leaderboard_problem_scores)
+    """)
+
+
+def downgrade() -> None:
+    try:
+        op.drop_table('leaderboard_problem_scores')
+    except Exception:
+        pass
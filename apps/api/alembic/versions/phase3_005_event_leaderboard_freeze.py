@@ -0,0 +1,28 @@
+"""add leaderboard freeze time to events
+
+Revision ID: phase3_005
+Revises: phase3_004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'phase3_005'
+down_revision = 'phase3_004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # May already exist if init_db() added it
+    try:
+        op.add_column('events', sa.Column('leaderboard_freeze_at', sa.DateTime(), nullable=True))
+    except Exception:
+        pass
+
+
+def downgrade() -> None:
+    try:
+        op.drop_column('events', 'leaderboard_freeze_at')
+    except Exception:
+        pass
@@ -0,0 +1,93 @@
+"""add ICPC attempt counters to leaderboard_problem_scores
+
+Revision ID: phase3_006
+Revises: phase3_005
+Create Date: 2026-10-19
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'phase3_006'
+down_revision = 'phase3_005'
+branch_labels = None
+depends_on = None
+
+# Submissions of the entry's participant for the row's problem
+PARTICIPANT_SUBMISSIONS = """
+    FROM leaderboard_entries e
+    JOIN submissions s ON s.event_id = e.event_id AND (
+        (e.team_id IS NOT NULL AND s.team_id = e.team_id)
+        OR (e.team_id IS NULL AND s.user_id = e.user_id)
+    )
+    WHERE e.id = leaderboard_problem_scores.entry_id
+      AND s.problem_id = leaderboard_problem_scores.problem_id
+"""
+
+
+def upgrade() -> None:
+    # May already exist if init_db() added them
+    for column in (
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=True),
+        sa.Column('first_ac_at', sa.DateTime(), nullable=True),
+    ):
+        try:
+            op.add_column('leaderboard_problem_scores', column)
+        except Exception:
+            pass
+
+    op.execute(f"""
+        UPDATE leaderboard_problem_scores SET first_ac_at = (
+            SELECT MIN(s.submitted_at) {PARTICIPANT_SUBMISSIONS} AND s.status = 'accepted'
+        )
+    """)
+    op.execute(f"""
+        UPDATE leaderboard_problem_scores SET attempts = (
+            SELECT COUNT(*) {PARTICIPANT_SUBMISSIONS}
+              AND s.status NOT IN ('accepted', 'compile_error', 'pending', 'queued', 'running')
+              AND (leaderboard_problem_scores.first_ac_at IS NULL
+                   OR s.submitted_at < leaderboard_problem_scores.first_ac_at)
+        )
+    """)
+
+    # Rebuild ICPC entry totals from the counters
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        minutes = "CAST((julianday(p.first_ac_at) - julianday(:event_start)) * 1440 AS INTEGER)"
+    else:
+        minutes = "FLOOR(EXTRACT(EPOCH FROM (p.first_ac_at - :event_start)) / 60)"
+
+    events = bind.execute(sa.text("SELECT id, scoring_formula, event_start FROM events")).fetchall()
+    for event_id, formula, event_start in events:
+        if isinstance(formula, str):
+            formula = json.loads(formula or "{}")
+        formula = formula or {}
+        if formula.get("mode") != "icpc":
+            continue
+        time_sql = f"COALESCE(SUM({minutes}), 0)" if event_start else "0"
+        bind.execute(sa.text(f"""
+            UPDATE leaderboard_entries SET
+                total_score = 100 * (SELECT COUNT(*) FROM leaderboard_problem_scores p
+                                     WHERE p.entry_id = leaderboard_entries.id AND p.first_ac_at IS NOT NULL),
+                problems_solved = (SELECT COUNT(*) FROM leaderboard_problem_scores p
+                                   WHERE p.entry_id = leaderboard_entries.id AND p.first_ac_at IS NOT NULL),
+                total_time = (SELECT {time_sql} FROM leaderboard_problem_scores p
+                              WHERE p.entry_id = leaderboard_entries.id AND p.first_ac_at IS NOT NULL),
+                penalty = :penalty * (SELECT COALESCE(SUM(p.attempts), 0) FROM leaderboard_problem_scores p
+                                      WHERE p.entry_id = leaderboard_entries.id AND p.first_ac_at IS NOT NULL)
+            WHERE event_id = :event_id
+              AND id IN (SELECT entry_id FROM leaderboard_problem_scores)
+        """), {
+            "event_id": event_id,
+            "event_start": event_start,
+            "penalty": int(formula.get("penalty_minutes", 20)),
+        })
+
+
+def downgrade() -> None:
+    for column in ('first_ac_at', 'attempts'):
+        try:
+            op.drop_column('leaderboard_problem_scores', column)
+        except Exception:
+            pass
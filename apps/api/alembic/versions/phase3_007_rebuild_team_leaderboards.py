@@ -0,0 +1,162 @@
+"""rebuild team leaderboard entries from all members' submissions
+
+Revision ID: phase3_007
+Revises: phase3_006
+Create Date: 2026-10-19
+"""
+import json
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'phase3_007'
+down_revision = 'phase3_006'
+branch_labels = None
+depends_on = None
+
+# The member's team within the row's event
+MEMBER_TEAM = """
+    SELECT tm.team_id FROM team_members tm JOIN teams t ON t.id = tm.team_id
+    WHERE t.event_id = {table}.event_id AND tm.user_id = {table}.user_id
+    ORDER BY tm.joined_at LIMIT 1
+"""
+TEAM_EVENT = "event_id IN (SELECT id FROM events WHERE is_team_event = :yes)"
+JUDGED = "s.status NOT IN ('pending', 'queued', 'running')"
+TEAM_ENTRY = f"leaderboard_entries.team_id IS NOT NULL AND leaderboard_entries.{TEAM_EVENT}"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    yes = {"yes": True}
+
+    # 1. Registrations and submissions of team members were never linked to the team
+    for table in ("registrations", "submissions"):
+        team = MEMBER_TEAM.format(table=table)
+        bind.execute(sa.text(f"""
+            UPDATE {table} SET team_id = ({team})
+            WHERE team_id IS NULL AND {TEAM_EVENT} AND EXISTS ({team})
+        """), yes)
+
+    # 2. Drop the stray individual entries members got while their submissions
+    #    carried no team, and the per-problem state of those and of the team
+    #    entries rebuilt below; solo entrants' rows are left alone
+    stray_entry = f"team_id IS NULL AND {TEAM_EVENT} AND EXISTS ({MEMBER_TEAM.format(table='leaderboard_entries')})"
+    bind.execute(sa.text(f"""
+        DELETE FROM leaderboard_problem_scores WHERE entry_id IN (
+            SELECT id FROM leaderboard_entries WHERE ({TEAM_ENTRY}) OR ({stray_entry})
+        )
+    """), yes)
+    bind.execute(sa.text(f"DELETE FROM leaderboard_entries WHERE {stray_entry}"), yes)
+
+    # 3. One entry per team with judged submissions
+    missing = bind.execute(sa.text(f"""
+        SELECT DISTINCT s.event_id, s.team_id FROM submissions s
+        WHERE s.team_id IS NOT NULL AND {JUDGED} AND s.{TEAM_EVENT}
+          AND NOT EXISTS (
+              SELECT 1 FROM leaderboard_entries e
+              WHERE e.event_id = s.event_id AND e.team_id = s.team_id
+          )
+    """), yes).fetchall()
+    if missing:
+        bind.execute(sa.text("""
+            INSERT INTO leaderboard_entries (id, event_id, team_id, total_score, problems_solved, total_time, penalty)
+            VALUES (:id, :event_id, :team_id, 0, 0, 0, 0)
+        """), [{"id": str(uuid.uuid4()), "event_id": event_id, "team_id": team_id} for event_id, team_id in missing])
+
+    # 4. Per-(team, problem) state over every member's submissions, in one pass
+    bind.execute(sa.text(f"""
+        INSERT INTO leaderboard_problem_scores (entry_id, problem_id, best_score, attempts, first_ac_at, updated_at)
+        SELECT e.id, s.problem_id, MAX(s.score), 0,
+               MIN(CASE WHEN s.status = 'accepted' THEN s.submitted_at END), MIN(s.submitted_at)
+        FROM leaderboard_entries e
+        JOIN submissions s ON s.event_id = e.event_id AND s.team_id = e.team_id
+        WHERE e.team_id IS NOT NULL AND e.{TEAM_EVENT} AND {JUDGED}
+        GROUP BY e.id, s.problem_id
+    """), yes)
+    team_rows = f"""
+        FROM leaderboard_entries e JOIN submissions s ON s.event_id = e.event_id AND s.team_id = e.team_id
+        WHERE e.id = leaderboard_problem_scores.entry_id
+          AND s.problem_id = leaderboard_problem_scores.problem_id AND {JUDGED}
+    """
+    team_scores = f"entry_id IN (SELECT id FROM leaderboard_entries WHERE {TEAM_ENTRY})"
+    bind.execute(sa.text(f"""
+        UPDATE leaderboard_problem_scores SET
+            attempts = (SELECT COUNT(*) {team_rows}
+                        AND s.status NOT IN ('accepted', 'compile_error')
+                        AND (leaderboard_problem_scores.first_ac_at IS NULL
+                             OR s.submitted_at < leaderboard_problem_scores.first_ac_at)),
+            updated_at = (SELECT MIN(s.submitted_at) {team_rows}
+                          AND s.score = leaderboard_problem_scores.best_score)
+        WHERE {team_scores}
+    """), yes)
+
+    # 5. Totals: best-score sums (IOI), last change = when the latest best was reached
+    bind.execute(sa.text(f"""
+        UPDATE leaderboard_entries SET
+            total_score = (SELECT COALESCE(SUM(p.best_score), 0) FROM leaderboard_problem_scores p
+                           WHERE p.entry_id = leaderboard_entries.id),
+            problems_solved = (SELECT COUNT(*) FROM leaderboard_problem_scores p
+                               WHERE p.entry_id = leaderboard_entries.id AND p.best_score >= 100),
+            total_time = 0,
+            penalty = 0,
+            rank = NULL,
+            last_submission = COALESCE(
+                (SELECT MAX(p.updated_at) FROM leaderboard_problem_scores p
+                 WHERE p.entry_id = leaderboard_entries.id AND p.best_score > 0),
+                (SELECT MIN(p.updated_at) FROM leaderboard_problem_scores p
+                 WHERE p.entry_id = leaderboard_entries.id)
+            )
+        WHERE {TEAM_ENTRY}
+    """), yes)
+
+    # ICPC team events: as ScoringRules does, a problem counts once (100
+    # points), at its first AC, plus penalty for the attempts before it
+    if bind.dialect.name == "sqlite":
+        minutes = "CAST((julianday(p.first_ac_at) - julianday(:event_start)) * 1440 AS INTEGER)"
+    else:
+        minutes = "FLOOR(EXTRACT(EPOCH FROM (p.first_ac_at - :event_start)) / 60)"
+    events = bind.execute(sa.text(
+        "SELECT id, scoring_formula, event_start FROM events WHERE is_team_event = :yes"
+    ), yes).fetchall()
+    for event_id, formula, event_start in events:
+        if isinstance(formula, str):
+            formula = json.loads(formula or "{}")
+        formula = formula or {}
+        if formula.get("mode") != "icpc":
+            continue
+        time_sql = f"COALESCE(SUM({minutes}), 0)" if event_start else "0"
+        solved = "p.entry_id = leaderboard_entries.id AND p.first_ac_at IS NOT NULL"
+        team_entries = (
+            "entry_id IN (SELECT id FROM leaderboard_entries WHERE event_id = :event_id AND team_id IS NOT NULL)"
+        )
+        bind.execute(sa.text(f"""
+            UPDATE leaderboard_problem_scores SET
+                best_score = CASE WHEN first_ac_at IS NOT NULL THEN 100 ELSE 0 END,
+                updated_at = COALESCE(first_ac_at, updated_at)
+            WHERE {team_entries}
+        """), {"event_id": event_id})
+        bind.execute(sa.text(f"""
+            UPDATE leaderboard_entries SET
+                total_score = 100 * (SELECT COUNT(*) FROM leaderboard_problem_scores p WHERE {solved}),
+                problems_solved = (SELECT COUNT(*) FROM leaderboard_problem_scores p WHERE {solved}),
+                total_time = (SELECT {time_sql} FROM leaderboard_problem_scores p WHERE {solved}),
+                penalty = :penalty * (SELECT COALESCE(SUM(p.attempts), 0) FROM leaderboard_problem_scores p
+                                      WHERE {solved}),
+                last_submission = COALESCE(
+                    (SELECT MAX(p.first_ac_at) FROM leaderboard_problem_scores p WHERE {solved}),
+                    (SELECT MIN(s.submitted_at) FROM submissions s
+                     WHERE s.event_id = leaderboard_entries.event_id
+                       AND s.team_id = leaderboard_entries.team_id AND {JUDGED})
+                )
+            WHERE event_id = :event_id AND team_id IS NOT NULL
+        """), {
+            "event_id": event_id,
+            "event_start": event_start,
+            "penalty": int(formula.get("penalty_minutes", 20)),
+        })
+
+
+def downgrade() -> None:
+    # Data-only migration; the previous (per-member) state is not restorable
+    pass
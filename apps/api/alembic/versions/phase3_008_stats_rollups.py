@@ -0,0 +1,37 @@
+"""add stats_rollups (write-time counters for dashboards)
+
+Revision ID: phase3_008
+Revises: phase3_007
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'phase3_008'
+down_revision = 'phase3_007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # May already exist if init_db() created it. Left empty here: the API
+    # builds the counters on startup when the table has no rows.
+    try:
+        op.create_table(
+            'stats_rollups',
+            sa.Column('tenant_id', sa.String(36), primary_key=True),
+            sa.Column('event_id', sa.String(36), primary_key=True),
+            sa.Column('metric', sa.String(50), primary_key=True),
+            sa.Column('dimension', sa.String(50), primary_key=True, server_default=''),
+            sa.Column('value', sa.BigInteger(), nullable=False, server_default='0'),
+            sa.Column('updated_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP')),
+        )
+    except Exception:
+        pass
+
+
+def downgrade() -> None:
+    try:
+        op.drop_table('stats_rollups')
+    except Exception:
+        pass
@@ -0,0 +1,47 @@
+"""add report_jobs (background report exports)
+
+Revision ID: phase3_009
+Revises: phase3_008
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'phase3_009'
+down_revision = 'phase3_008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # May already exist if init_db() created it
+    try:
+        op.create_table(
+            'report_jobs',
+            sa.Column('id', sa.String(36), primary_key=True),
+            sa.Column('tenant_id', sa.String(36), sa.ForeignKey('tenants.id'), nullable=False),
+            sa.Column('created_by', sa.String(36), sa.ForeignKey('users.id'), nullable=True),
+            sa.Column('spec', sa.JSON(), nullable=False),
+            sa.Column('spec_hash', sa.String(64), nullable=False),
+            sa.Column('status', sa.String(20), server_default='queued'),
+            sa.Column('rows_done', sa.Integer(), server_default='0'),
+            sa.Column('rows_total', sa.Integer(), nullable=True),
+            sa.Column('error', sa.Text(), nullable=True),
+            sa.Column('artifact_path', sa.Text(), nullable=True),
+            sa.Column('artifact_bytes', sa.BigInteger(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP')),
+            sa.Column('started_at', sa.DateTime(), nullable=True),
+            sa.Column('finished_at', sa.DateTime(), nullable=True),
+            sa.Column('expires_at', sa.DateTime(), nullable=True),
+        )
+        op.create_index('ix_report_jobs_tenant_spec', 'report_jobs', ['tenant_id', 'spec_hash'])
+    except Exception:
+        pass
+
+
+def downgrade() -> None:
+    try:
+        op.drop_index('ix_report_jobs_tenant_spec', table_name='report_jobs')
+        op.drop_table('report_jobs')
+    except Exception:
+        pass
@@ -0,0 +1,27 @@
+"""index submissions on (event_id, submitted_at) for the activity timeline
+
+Revision ID: phase3_010
+Revises: phase3_009
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = 'phase3_010'
+down_revision = 'phase3_009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # May already exist if init_db() created it
+    try:
+        op.create_index('ix_submissions_event_submitted', 'submissions', ['event_id', 'submitted_at'])
+    except Exception:
+        pass
+
+
+def downgrade() -> None:
+    try:
+        op.drop_index('ix_submissions_event_submitted', table_name='submissions')
+    except Exception:
+        pass
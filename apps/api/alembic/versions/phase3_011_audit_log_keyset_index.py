@@ -0,0 +1,28 @@
+"""index audit_logs on (tenant_id, created_at, id) for keyset pagination
+
+Revision ID: phase3_011
+Revises: phase3_010
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = 'phase3_011'
+down_revision = 'phase3_010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # May already exist if init_db() created it. The API rebuilds the SQLite
+    # audit log counters at the next stats reconciliation.
+    try:
+        op.create_index('ix_audit_logs_tenant_created_id', 'audit_logs', ['tenant_id', 'created_at', 'id'])
+    except Exception:
+        pass
+
+
+def downgrade() -> None:
+    try:
+        op.drop_index('ix_audit_logs_tenant_created_id', table_name='audit_logs')
+    except Exception:
+        pass
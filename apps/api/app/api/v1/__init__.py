@@ -1,6 +1,6 @@
 """CEAP API v1 Package"""
 from fastapi import APIRouter
-from app.api.v1 import auth, events, submissions, admin, certificates, analytics, mcq
+from app.api.v1 import auth, events, submissions, admin, certificates, analytics, mcq, reports
 
 router = APIRouter(prefix="/api/v1")
 router.include_router(auth.router)
@@ -10,4 +10,5 @@ router.include_router(admin.router)
 router.include_router(certificates.router)
 router.include_router(analytics.router)
 router.include_router(mcq.router)
+router.include_router(reports.router)
 
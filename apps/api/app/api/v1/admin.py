@@ -20,6 +20,7 @@ from app.schemas.auth import (
     RotateKeysRequest, KeysResponse
 )
 from app.core.security import hash_password, get_current_user
+from app.services import stats
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -79,6 +80,7 @@ async def create_user(
         department=req.department,
     )
     db.add(user)
+    await stats.bump(db, admin.tenant_id, "users", req.role)
     await db.flush()
     await db.refresh(user)
     return UserResponse.model_validate(user)
@@ -106,6 +108,7 @@ async def update_user(
     if req.role is not None:
         if req.role not in ("student", "faculty", "admin"):
             raise HTTPException(status_code=400, detail="Invalid role")
+        await stats.move(db, admin.tenant_id, "users", user.role, req.role)
         user.role = req.role
     if req.status is not None:
         if req.status not in ("active", "pending", "suspended"):
@@ -351,6 +354,7 @@ async def import_students_csv(
         except Exception as e:
             errors.append(f"Row {i} ({roll}): {str(e)}")
 
+    await stats.bump(db, admin.tenant_id, "users", "student", delta=inserted)
     await db.flush()
     return {
         "message": "Import complete — students can now login directly",
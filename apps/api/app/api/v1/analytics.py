@@ -2,24 +2,41 @@
 CEAP API — Analytics Routes
 Real-time platform analytics, student stats, and export endpoints.
 """
-import io
+import asyncio
 from datetime import datetime
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import StreamingResponse
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc
+from sqlalchemy import select, func, desc, literal, union_all
 
-from app.database import get_db
-from app.models.tenant import User, AuditLog
+from app.database import get_db, async_session
+from app.models.tenant import User
 from app.models.event import Event, Registration
-from app.models.problem import Submission
+from app.models.problem import Problem, Submission
 from app.models.leaderboard import Certificate, LeaderboardEntry
 from app.models.mcq import MCQAttempt
 from app.core.security import get_current_user, require_faculty, require_admin
+from app.services import stats
+from app.services import exports
+from app.services import audit
+from app.services.exports import export_response
+from app.services.problem_analytics import problem_analytics
+from app.services.submission_timeline import submission_timeline
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
 
+async def _fetch_all(query) -> list:
+    """Run one read-only query on its own session, so several can run at once."""
+    async with async_session() as db:
+        return (await db.execute(query)).all()
+
+
+async def _read_counters(tenant_id) -> dict:
+    async with async_session() as db:
+        return await stats.read_counters(db, tenant_id)
+
+
 @router.get("/dashboard")
 async def dashboard_analytics(
     user: User = Depends(require_faculty),
@@ -28,71 +45,51 @@ async def dashboard_analytics(
     """Return real platform analytics. Requires faculty/admin role."""
     tenant_id = user.tenant_id
 
-    # ── Event counts ──────────────────────────────
-    events_result = await db.execute(
-        select(Event).where(Event.tenant_id == tenant_id)
+    # Users, submissions, certificates and registrations come from the
+    # write-time rollup counters; events (a small table) are grouped live.
+    # Each query runs on its own connection, concurrently.
+    counters, event_groups, recent_events = await asyncio.gather(
+        _read_counters(tenant_id),
+        _fetch_all(
+            select(Event.event_type, Event.status, func.count())
+            .where(Event.tenant_id == tenant_id)
+            .group_by(Event.event_type, Event.status)
+        ),
+        _fetch_all(
+            select(Event.title, Event.event_type, Event.created_at)
+            .where(Event.tenant_id == tenant_id)
+            .order_by(desc(Event.created_at))
+            .limit(5)
+        ),
     )
-    events = events_result.scalars().all()
-    total_events = len(events)
+
+    # ── Event counts ──────────────────────────────
     events_by_type = {}
     events_by_status = {}
-    for e in events:
-        events_by_type[e.event_type] = events_by_type.get(e.event_type, 0) + 1
-        events_by_status[e.status] = events_by_status.get(e.status, 0) + 1
-
-    # ── User counts ───────────────────────────────
-    users_result = await db.execute(
-        select(User).where(User.tenant_id == tenant_id)
-    )
-    users = users_result.scalars().all()
-    total_users = len(users)
-    users_by_role = {}
-    for u in users:
-        users_by_role[u.role] = users_by_role.get(u.role, 0) + 1
-
-    # ── Submission counts ─────────────────────────
-    subs_result = await db.execute(
-        select(Submission).where(Submission.event_id.in_(
-            select(Event.id).where(Event.tenant_id == tenant_id)
-        ))
-    )
-    submissions = subs_result.scalars().all()
-    total_submissions = len(submissions)
-    subs_by_verdict = {}
-    for s in submissions:
-        verdict = s.status or "unknown"
-        subs_by_verdict[verdict] = subs_by_verdict.get(verdict, 0) + 1
-
-    # ── Certificate counts ────────────────────────
-    certs_result = await db.execute(
-        select(Certificate).where(Certificate.event_id.in_(
-            select(Event.id).where(Event.tenant_id == tenant_id)
-        ))
-    )
-    total_certificates = len(certs_result.scalars().all())
-
-    # ── Registration counts ───────────────────────
-    regs_result = await db.execute(
-        select(Registration).where(Registration.event_id.in_(
-            select(Event.id).where(Event.tenant_id == tenant_id)
-        ))
-    )
-    total_registrations = len(regs_result.scalars().all())
+    for event_type, status, count in event_groups:
+        events_by_type[event_type] = events_by_type.get(event_type, 0) + count
+        events_by_status[status] = events_by_status.get(status, 0) + count
+
+    # ── User, submission, certificate, registration counts ──
+    users_by_role = counters.get("users", {})
+    subs_by_verdict = {
+        verdict or "unknown": count for verdict, count in counters.get("submissions", {}).items()
+    }
+    total_certificates = sum(counters.get("certificates", {}).values())
+    total_registrations = sum(counters.get("registrations", {}).values())
 
     # ── Recent activity (last 5 events) ──────────
-    recent = []
-    for e in sorted(events, key=lambda x: x.created_at, reverse=True)[:5]:
-        recent.append({
-            "action": f'Event "{e.title}" created ({e.event_type})',
-            "time": e.created_at.isoformat(),
-            "type": "event",
-        })
+    recent = [{
+        "action": f'Event "{title}" created ({event_type})',
+        "time": created_at.isoformat(),
+        "type": "event",
+    } for title, event_type, created_at in recent_events]
 
     return {
         "stats": {
-            "total_events": total_events,
-            "total_users": total_users,
-            "total_submissions": total_submissions,
+            "total_events": sum(events_by_type.values()),
+            "total_users": sum(users_by_role.values()),
+            "total_submissions": sum(subs_by_verdict.values()),
             "total_certificates": total_certificates,
             "total_registrations": total_registrations,
         },
@@ -111,200 +108,178 @@ async def my_stats(
     db: AsyncSession = Depends(get_db),
 ):
     """Return personal stats for the logged-in user (works for any role)."""
-    uid = str(user.id)
+    cached = stats.my_stats_cache.get(user.id)
+    if cached is not None:
+        return cached
 
-    # Events registered
-    regs = (await db.execute(
-        select(Registration).where(Registration.user_id == uid)
-    )).scalars().all()
-    events_registered = len(regs)
+    uid = user.id
 
-    # Submissions
-    subs_count = (await db.execute(
-        select(func.count()).select_from(Submission).where(Submission.user_id == uid)
-    )).scalar() or 0
+    def count_of(model, *where):
+        return select(func.count()).select_from(model).where(model.user_id == uid, *where).scalar_subquery()
 
-    # Best rank
-    best_rank_result = (await db.execute(
-        select(func.min(LeaderboardEntry.rank))
-        .where(LeaderboardEntry.user_id == uid)
-        .where(LeaderboardEntry.rank != None)
-    )).scalar()
-    best_rank = best_rank_result if best_rank_result else None
-
-    # Certificates
-    certs = (await db.execute(
-        select(Certificate).where(Certificate.user_id == uid)
-    )).scalars().all()
-    cert_count = len(certs)
-
-    # MCQ exams taken
-    mcq_attempts = (await db.execute(
-        select(MCQAttempt).where(MCQAttempt.user_id == uid, MCQAttempt.status == "submitted")
-    )).scalars().all()
-    mcq_count = len(mcq_attempts)
-    avg_mcq_score = round(sum(a.score for a in mcq_attempts) / len(mcq_attempts), 1) if mcq_attempts else 0
-
-    # Recent activity
-    recent = []
-    for reg in sorted(regs, key=lambda r: r.registered_at, reverse=True)[:3]:
-        event = (await db.execute(select(Event).where(Event.id == reg.event_id))).scalar_one_or_none()
-        if event:
-            recent.append({
-                "text": f"Registered for {event.title}",
-                "time": reg.registered_at.isoformat() if reg.registered_at else "",
-                "type": "registration",
-            })
-    for cert in sorted(certs, key=lambda c: c.issued_at, reverse=True)[:2]:
-        event = (await db.execute(select(Event).where(Event.id == cert.event_id))).scalar_one_or_none()
-        if event:
-            recent.append({
-                "text": f"Certificate earned: {event.title}",
-                "time": cert.issued_at.isoformat(),
-                "type": "certificate",
-            })
+    submitted_mcq = (MCQAttempt.user_id == uid, MCQAttempt.status == "submitted")
 
+    # All counters in one round trip
+    counts = (await db.execute(select(
+        count_of(Registration).label("events_registered"),
+        count_of(Submission).label("submissions_count"),
+        select(func.min(LeaderboardEntry.rank))
+            .where(LeaderboardEntry.user_id == uid, LeaderboardEntry.rank != None)
+            .scalar_subquery().label("best_rank"),
+        count_of(Certificate).label("certificates_count"),
+        select(func.count()).select_from(MCQAttempt).where(*submitted_mcq)
+            .scalar_subquery().label("mcq_exams_taken"),
+        select(func.avg(MCQAttempt.score)).where(*submitted_mcq)
+            .scalar_subquery().label("avg_mcq_score"),
+    ))).one()
+
+    # Recent activity: latest 3 registrations and 2 certificates with their
+    # event titles, in one query
+    recent_regs = (
+        select(
+            Event.title,
+            Registration.registered_at.label("time"),
+            literal("registration").label("type"),
+        )
+        .join(Event, Event.id == Registration.event_id)
+        .where(Registration.user_id == uid)
+        .order_by(desc(Registration.registered_at))
+        .limit(3)
+    )
+    recent_certs = (
+        select(
+            Event.title,
+            Certificate.issued_at.label("time"),
+            literal("certificate").label("type"),
+        )
+        .join(Event, Event.id == Certificate.event_id)
+        .where(Certificate.user_id == uid)
+        .order_by(desc(Certificate.issued_at))
+        .limit(2)
+    )
+    rows = (await db.execute(union_all(
+        select(recent_regs.subquery()), select(recent_certs.subquery()),
+    ))).all()
+
+    recent = [{
+        "text": f"Registered for {title}" if kind == "registration" else f"Certificate earned: {title}",
+        "time": at.isoformat() if at else "",
+        "type": kind,
+    } for title, at, kind in rows]
     recent.sort(key=lambda x: x["time"], reverse=True)
 
-    return {
-        "events_registered": events_registered,
-        "submissions_count": subs_count,
-        "best_rank": best_rank,
-        "certificates_count": cert_count,
-        "mcq_exams_taken": mcq_count,
-        "avg_mcq_score": avg_mcq_score,
+    body = {
+        "events_registered": counts.events_registered,
+        "submissions_count": counts.submissions_count or 0,
+        "best_rank": counts.best_rank or None,
+        "certificates_count": counts.certificates_count,
+        "mcq_exams_taken": counts.mcq_exams_taken,
+        "avg_mcq_score": round(counts.avg_mcq_score, 1) if counts.mcq_exams_taken else 0,
         "recent_activity": recent[:5],
     }
+    stats.my_stats_cache.set(user.id, body)
+    return body
 
 
-# ── Export Leaderboard as CSV ────────────────────────────────
-@router.get("/export/leaderboard/{event_id}")
-async def export_leaderboard(
+# ── Per-problem performance ─────────────────────────────────
+@router.get("/problems/{problem_id}")
+async def get_problem_analytics(
+    problem_id: str,
+    event_id: str = Query(None),
+    user: User = Depends(require_faculty),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Acceptance rate, verdict mix and runtime/memory percentiles (p50/p90/p99)
+    and histograms for one problem, overall and per language; optionally
+    limited to one event. Cached until the problem's next verdict.
+    """
+    problem = (await db.execute(select(Problem).where(Problem.id == problem_id))).scalar_one_or_none()
+    if not problem or problem.tenant_id != user.tenant_id:
+        raise HTTPException(status_code=404, detail="Problem not found")
+    return await problem_analytics(db, problem, event_id)
+
+
+# ── Submission timeline ──────────────────────────────────────
+@router.get("/events/{event_id}/submission-timeline")
+async def get_submission_timeline(
     event_id: str,
+    bucket: Literal["minute", "hour", "day"] = Query("minute"),
+    date_from: datetime = Query(None),
+    date_to: datetime = Query(None),
     user: User = Depends(require_faculty),
     db: AsyncSession = Depends(get_db),
 ):
-    """Download event leaderboard as CSV."""
-    import csv
+    """
+    Submissions per bucket and verdict (UTC), for live rate charts and
+    activity heatmaps. The range defaults to the event's start until its end
+    or now, whichever is earlier.
+    """
+    event = await _get_event_or_404(db, event_id)
+    if event.tenant_id != user.tenant_id:
+        raise HTTPException(status_code=404, detail="Event not found")
+    now = datetime.utcnow()
+    date_to = date_to or min(event.event_end or now, now)
+    date_from = date_from or event.event_start or event.created_at
+    try:
+        return await submission_timeline(db, event.id, bucket, date_from, date_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 
+# ── Exports (csv / xlsx / parquet) ───────────────────────────
+ExportFormat = Literal["csv", "xlsx", "parquet"]
+
+
+async def _get_event_or_404(db: AsyncSession, event_id: str) -> Event:
     event = (await db.execute(select(Event).where(Event.id == event_id))).scalar_one_or_none()
     if not event:
-        from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Event not found")
+    return event
+
 
-    entries = (await db.execute(
-        select(LeaderboardEntry, User.full_name, User.email, User.roll_number)
-        .join(User, User.id == LeaderboardEntry.user_id)
-        .where(LeaderboardEntry.event_id == event_id)
-        .order_by(desc(LeaderboardEntry.total_score))
-    )).all()
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["Rank", "Name", "Email", "Roll Number", "Score", "Problems Solved"])
-
-    for i, (entry, name, email, roll) in enumerate(entries, 1):
-        writer.writerow([
-            i, name, email, roll or "",
-            float(entry.total_score), entry.problems_solved or 0,
-        ])
-
-    output.seek(0)
-    filename = f"leaderboard_{event.slug or event_id}.csv"
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"},
+# ── Export Leaderboard ───────────────────────────────────────
+@router.get("/export/leaderboard/{event_id}")
+async def export_leaderboard(
+    event_id: str,
+    export_format: ExportFormat = Query("csv", alias="format"),
+    user: User = Depends(require_faculty),
+    db: AsyncSession = Depends(get_db),
+):
+    """Download event leaderboard as CSV, XLSX or Parquet."""
+    event = await _get_event_or_404(db, event_id)
+    return export_response(
+        export_format, exports.leaderboard_table(event_id), f"leaderboard_{event.slug or event_id}",
     )
 
 
-# ── Export Participants as CSV ───────────────────────────────
+# ── Export Participants ──────────────────────────────────────
 @router.get("/export/participants/{event_id}")
 async def export_participants(
     event_id: str,
+    export_format: ExportFormat = Query("csv", alias="format"),
     user: User = Depends(require_faculty),
     db: AsyncSession = Depends(get_db),
 ):
-    """Download event participants list as CSV."""
-    import csv
-
-    event = (await db.execute(select(Event).where(Event.id == event_id))).scalar_one_or_none()
-    if not event:
-        from fastapi import HTTPException
-        raise HTTPException(status_code=404, detail="Event not found")
-
-    regs = (await db.execute(
-        select(Registration, User.full_name, User.email, User.roll_number, User.department)
-        .join(User, User.id == Registration.user_id)
-        .where(Registration.event_id == event_id)
-        .order_by(Registration.registered_at)
-    )).all()
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["#", "Name", "Email", "Roll Number", "Department", "Status", "Registered At"])
-
-    for i, (reg, name, email, roll, dept) in enumerate(regs, 1):
-        writer.writerow([
-            i, name, email, roll or "", dept or "",
-            reg.status, reg.registered_at.isoformat() if reg.registered_at else "",
-        ])
-
-    output.seek(0)
-    filename = f"participants_{event.slug or event_id}.csv"
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    """Download event participants list as CSV, XLSX or Parquet."""
+    event = await _get_event_or_404(db, event_id)
+    return export_response(
+        export_format, exports.participants_table(event_id), f"participants_{event.slug or event_id}",
     )
 
 
-# ── Export MCQ Results as CSV ────────────────────────────────
+# ── Export MCQ Results ───────────────────────────────────────
 @router.get("/export/mcq-results/{event_id}")
 async def export_mcq_results(
     event_id: str,
+    export_format: ExportFormat = Query("csv", alias="format"),
     user: User = Depends(require_faculty),
     db: AsyncSession = Depends(get_db),
 ):
-    """Download MCQ exam results as CSV."""
-    import csv
-
-    event = (await db.execute(select(Event).where(Event.id == event_id))).scalar_one_or_none()
-    if not event:
-        from fastapi import HTTPException
-        raise HTTPException(status_code=404, detail="Event not found")
-
-    attempts = (await db.execute(
-        select(MCQAttempt, User.full_name, User.email, User.roll_number)
-        .join(User, User.id == MCQAttempt.user_id)
-        .where(MCQAttempt.event_id == event_id)
-        .order_by(desc(MCQAttempt.score))
-    )).all()
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow([
-        "Rank", "Name", "Email", "Roll Number",
-        "Score", "Max Score", "Correct", "Wrong", "Skipped",
-        "Started At", "Submitted At", "Status",
-    ])
-
-    for i, (attempt, name, email, roll) in enumerate(attempts, 1):
-        writer.writerow([
-            i, name, email, roll or "",
-            attempt.score, attempt.max_score,
-            attempt.correct, attempt.wrong, attempt.skipped,
-            attempt.started_at.isoformat() if attempt.started_at else "",
-            attempt.submitted_at.isoformat() if attempt.submitted_at else "",
-            attempt.status,
-        ])
-
-    output.seek(0)
-    filename = f"mcq_results_{event.slug or event_id}.csv"
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    """Download MCQ exam results as CSV, XLSX or Parquet."""
+    event = await _get_event_or_404(db, event_id)
+    return export_response(
+        export_format, exports.mcq_results_table(event_id), f"mcq_results_{event.slug or event_id}",
     )
 
 
@@ -314,37 +289,52 @@ async def list_audit_logs(
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=200),
     action: str = Query(None),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    count: Literal["estimated", "exact", "none"] = Query("estimated"),
     user: User = Depends(require_admin),
     db: AsyncSession = Depends(get_db),
 ):
-    """List audit logs for the tenant. Admin only."""
-    q = select(AuditLog).where(AuditLog.tenant_id == user.tenant_id)
-    if action:
-        q = q.where(AuditLog.action == action)
-    q = q.order_by(desc(AuditLog.created_at))
-
-    # Count
-    count_q = select(func.count()).where(AuditLog.tenant_id == user.tenant_id)
-    if action:
-        count_q = count_q.where(AuditLog.action == action)
-    total = (await db.execute(count_q)).scalar() or 0
-
-    # Paginate
-    q = q.offset((page - 1) * page_size).limit(page_size)
-    rows = (await db.execute(q)).scalars().all()
+    """
+    List audit logs for the tenant, newest first. Admin only.
+    Follow next_cursor for constant-time pages at any depth (page/offset
+    still works but slows down with depth). `total` is an estimate unless
+    count=exact.
+    """
+    if cursor:
+        try:
+            after = audit.decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        q = audit.page_query(user.tenant_id, action, after)
+    else:
+        q = audit.page_query(user.tenant_id, action).offset((page - 1) * page_size)
+
+    rows = (await db.execute(q.limit(page_size + 1))).scalars().all()
+    next_cursor = audit.encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+    rows = rows[:page_size]
+
+    total = None
+    if count == "exact":
+        total = await audit.exact_count(db, user.tenant_id, action)
+    elif count == "estimated":
+        total = await audit.estimate_count(db, user.tenant_id, action)
 
     # Resolve user names
     user_ids = list({str(r.user_id) for r in rows if r.user_id})
     user_map = {}
     if user_ids:
-        users_result = await db.execute(select(User).where(User.id.in_(user_ids)))
-        for u in users_result.scalars().all():
-            user_map[str(u.id)] = u.full_name or u.email
+        users_result = await db.execute(
+            select(User.id, User.full_name, User.email).where(User.id.in_(user_ids))
+        )
+        for uid, full_name, email in users_result.all():
+            user_map[str(uid)] = full_name or email
 
     return {
         "total": total,
+        "total_is_estimate": count == "estimated",
         "page": page,
         "page_size": page_size,
+        "next_cursor": next_cursor,
         "logs": [{
             "id": str(r.id),
             "action": r.action,
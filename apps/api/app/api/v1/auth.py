@@ -25,6 +25,7 @@ from app.core.security import (
 )
 from app.core.limiter import limiter
 from app.services.audit import log_action
+from app.services import stats
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -142,6 +143,7 @@ async def faculty_join(request: Request, req: FacultyJoinRequest, db: AsyncSessi
         department=req.department,
     )
     db.add(user)
+    await stats.bump(db, tenant.id, "users", "faculty")
     await db.flush()
     await db.refresh(user)
 
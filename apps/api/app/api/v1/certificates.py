@@ -15,6 +15,8 @@ from app.models.tenant import User
 from app.models.event import Event, Registration
 from app.models.leaderboard import Certificate, LeaderboardEntry
 from app.core.security import get_current_user
+from app.services.leaderboard import leaderboard_index
+from app.services import stats
 
 router = APIRouter(tags=["Certificates"])
 
@@ -142,24 +144,25 @@ async def generate_certificates_for_event(
     )).scalars().all()
     existing_user_ids = {str(c.user_id) for c in existing}
 
-    # Get leaderboard for ranking
+    # Ranks come from the leaderboard index — no need to re-sort the board
+    ranking = await leaderboard_index.get(db, event_id)
+    ranks = await ranking.ranks()
     leaderboard = (await db.execute(
-        select(LeaderboardEntry)
-        .where(LeaderboardEntry.event_id == event_id)
-        .order_by(LeaderboardEntry.total_score.desc())
+        select(LeaderboardEntry).where(LeaderboardEntry.event_id == event_id)
     )).scalars().all()
 
     # Build a score/rank map
     rank_map = {}
-    for i, entry in enumerate(leaderboard):
+    for entry in leaderboard:
         uid = str(entry.user_id) if entry.user_id else None
         if uid:
             rank_map[uid] = {
-                "rank": i + 1,
+                "rank": ranks.get(entry.id),
                 "score": float(entry.total_score),
             }
 
     created = 0
+    created_by_type = {}
     for reg in regs:
         uid = str(reg.user_id)
         if uid in existing_user_ids:
@@ -185,6 +188,11 @@ async def generate_certificates_for_event(
         )
         db.add(cert)
         created += 1
+        created_by_type[cert_type] = created_by_type.get(cert_type, 0) + 1
+        stats.my_stats_cache.invalidate(reg.user_id)
 
+    await stats.bump_many(db, event.tenant_id, {
+        (event_id, "certificates", cert_type): count for cert_type, count in created_by_type.items()
+    })
     await db.commit()
     return {"created": created, "total": len(regs), "already_existed": len(existing_user_ids)}
@@ -4,9 +4,10 @@ CRUD for events, registrations, and teams.
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, func, and_, update
 from uuid import UUID
 from datetime import datetime
+from typing import Optional
 import secrets
 
 from app.database import get_db
@@ -20,6 +21,9 @@ from app.schemas.event import (
 )
 from app.schemas.submission import ProblemResponse
 from app.core.security import get_current_user, require_faculty, require_admin
+from app.services.leaderboard import merge_into_team, publish_merge
+from app.services.leaderboard_history import freeze_registry
+from app.services import stats
 
 router = APIRouter(prefix="/events", tags=["Events"])
 
@@ -127,6 +131,7 @@ async def update_event(
     for field, value in req.model_dump(exclude_unset=True).items():
         setattr(event, field, value)
     event.updated_at = datetime.utcnow()
+    freeze_registry.invalidate(event.id)
 
     await db.flush()
     await db.refresh(event)
@@ -220,9 +225,12 @@ async def register_for_event(
     reg = Registration(
         event_id=event_id,
         user_id=user.id,
+        team_id=await team_for_user(db, event_id, user.id) if event.is_team_event else None,
         status="approved",  # Auto-approve for MVP
     )
     db.add(reg)
+    await stats.bump(db, event.tenant_id, "registrations", event_id=event_id)
+    stats.my_stats_cache.invalidate(user.id)
     await db.flush()
     await db.refresh(reg)
     return RegistrationResponse.model_validate(reg)
@@ -243,6 +251,25 @@ async def list_registrations(
 
 # ── Teams ───────────────────────────────────────────────────
 
+async def team_for_user(db: AsyncSession, event_id, user_id) -> Optional[UUID]:
+    """The user's team in this event, if any."""
+    return (await db.execute(
+        select(TeamMember.team_id)
+        .join(Team, Team.id == TeamMember.team_id)
+        .where(Team.event_id == event_id, TeamMember.user_id == user_id)
+        .limit(1)
+    )).scalar_one_or_none()
+
+
+async def _link_registration(db: AsyncSession, event_id, user_id, team_id):
+    """Point the member's registration at the team, so their submissions count for it."""
+    await db.execute(
+        update(Registration)
+        .where(Registration.event_id == event_id, Registration.user_id == user_id)
+        .values(team_id=team_id)
+    )
+
+
 @router.post("/{event_id}/teams", response_model=TeamResponse, status_code=201)
 async def create_team(
     event_id: UUID,
@@ -266,8 +293,14 @@ async def create_team(
     # Add leader as member
     member = TeamMember(team_id=team.id, user_id=user.id, role="leader")
     db.add(member)
+    await _link_registration(db, event_id, user.id, team.id)
+    merged = await merge_into_team(db, event, user.id, team.id)
     await db.flush()
     await db.refresh(team)
+    if merged:
+        # The board changes are published only once committed
+        await db.commit()
+        await publish_merge(*merged)
 
     return TeamResponse(
         id=team.id,
@@ -314,7 +347,13 @@ async def join_team(
 
     member = TeamMember(team_id=team.id, user_id=user.id, role="member")
     db.add(member)
+    await _link_registration(db, team.event_id, user.id, team.id)
+    merged = await merge_into_team(db, event, user.id, team.id)
     await db.flush()
+    if merged:
+        # The board changes are published only once committed
+        await db.commit()
+        await publish_merge(*merged)
 
     return TeamResponse(
         id=team.id,
@@ -21,6 +21,8 @@ from app.models.event import Event
 from app.models.mcq import MCQQuestion, MCQAttempt
 from app.models.leaderboard import LeaderboardEntry
 from app.core.security import get_current_user, require_faculty
+from app.services.leaderboard import publish_change
+from app.services import stats
 
 router = APIRouter(prefix="/mcq", tags=["MCQ Exams"])
 
@@ -402,6 +404,8 @@ async def submit_exam(
     attempt.answers_json = json.dumps(req.answers)
     attempt.submitted_at = datetime.utcnow()
     attempt.status = "submitted"
+    await stats.bump(db, user.tenant_id, "mcq_submitted", event_id=event_id)
+    stats.my_stats_cache.invalidate(user.id)
     attempt.attempted = correct + wrong
     attempt.correct = correct
     attempt.wrong = wrong
@@ -427,7 +431,9 @@ async def submit_exam(
         )
         db.add(lb)
 
-    await db.flush()
+    # Commit before publishing so the new cache version never sees old scores
+    await db.commit()
+    await publish_change(lb)
 
     return {
         "message": "Exam submitted and graded!",
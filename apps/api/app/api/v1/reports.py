@@ -0,0 +1,155 @@
+"""
+CEAP API — Report Job Routes
+Submit a report spec, follow its progress (poll or SSE), download the file.
+Reports are built in the background; see app.services.reports.
+"""
+import asyncio
+import json
+from datetime import datetime
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, desc
+
+from app.database import get_db, async_session
+from app.models.report import ReportJob
+from app.models.tenant import User
+from app.schemas.report import ReportSpec, ReportJobResponse
+from app.core.security import get_stream_token_claims, require_faculty
+from app.services.exports import MEDIA_TYPES
+from app.services.reports import submit_report, artifact_exists, report_runner
+
+router = APIRouter(prefix="/reports", tags=["Reports"])
+
+STREAM_POLL_SECONDS = 1.0
+FINISHED = ("done", "failed", "expired")
+
+
+def _job_response(job: ReportJob, reused: bool = False) -> dict:
+    rows_done = report_runner.rows_done(job)
+    progress = None
+    if job.status == "done":
+        progress = 1.0
+    elif job.rows_total:
+        progress = round(min(rows_done, job.rows_total) / job.rows_total, 4)
+    return ReportJobResponse(
+        id=job.id,
+        spec=job.spec,
+        status=job.status,
+        rows_done=rows_done,
+        rows_total=job.rows_total,
+        progress=progress,
+        error=job.error,
+        artifact_bytes=job.artifact_bytes,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        expires_at=job.expires_at,
+        reused=reused,
+        download_url=f"/api/v1/reports/jobs/{job.id}/download" if job.status == "done" else None,
+    ).model_dump(mode="json")
+
+
+async def _get_job_or_404(db: AsyncSession, job_id: UUID, tenant_id) -> ReportJob:
+    job = await db.get(ReportJob, job_id)
+    if not job or str(job.tenant_id) != str(tenant_id):
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job
+
+
+@router.post("/jobs", status_code=202)
+async def create_report_job(
+    spec: ReportSpec,
+    user: User = Depends(require_faculty),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Queue a report. Returns the job; if the same spec is already queued,
+    running, or finished and not yet expired, that job is returned instead
+    (reused = true).
+    """
+    job, reused = await submit_report(db, user, spec)
+    return _job_response(job, reused)
+
+
+@router.get("/jobs")
+async def list_report_jobs(
+    limit: int = Query(20, ge=1, le=100),
+    user: User = Depends(require_faculty),
+    db: AsyncSession = Depends(get_db),
+):
+    """The tenant's most recent report jobs."""
+    jobs = (await db.execute(
+        select(ReportJob)
+        .where(ReportJob.tenant_id == user.tenant_id)
+        .order_by(desc(ReportJob.created_at))
+        .limit(limit)
+    )).scalars().all()
+    return [_job_response(job) for job in jobs]
+
+
+@router.get("/jobs/{job_id}")
+async def get_report_job(
+    job_id: UUID,
+    user: User = Depends(require_faculty),
+    db: AsyncSession = Depends(get_db),
+):
+    """Job status and progress."""
+    return _job_response(await _get_job_or_404(db, job_id, user.tenant_id))
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_report_job(
+    job_id: UUID,
+    claims: dict = Depends(get_stream_token_claims),
+):
+    """
+    Job status over Server-Sent Events: a `status` event whenever progress
+    changes, ending with the finished (done/failed/expired) status.
+    """
+    if claims.get("role") not in require_faculty.allowed_roles:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    async with async_session() as db:
+        await _get_job_or_404(db, job_id, claims.get("tenant_id"))
+
+    async def frames():
+        last = None
+        while True:
+            async with async_session() as db:
+                job = await db.get(ReportJob, job_id)
+                body = _job_response(job)
+            if body != last:
+                last = body
+                yield f"event: status\ndata: {json.dumps(body, separators=(',', ':'))}\n\n"
+            if body["status"] in FINISHED:
+                return
+            await asyncio.sleep(STREAM_POLL_SECONDS)
+
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/jobs/{job_id}/download")
+async def download_report(
+    job_id: UUID,
+    user: User = Depends(require_faculty),
+    db: AsyncSession = Depends(get_db),
+):
+    """Download a finished report."""
+    job = await _get_job_or_404(db, job_id, user.tenant_id)
+    if job.status == "expired" or (job.status == "done" and job.expires_at and job.expires_at <= datetime.utcnow()):
+        raise HTTPException(status_code=410, detail="Report expired. Submit it again.")
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Report is {job.status}")
+    if not artifact_exists(job):
+        raise HTTPException(status_code=410, detail="Report file is no longer available. Submit it again.")
+    export_format = job.spec.get("format", "csv")
+    return FileResponse(
+        job.artifact_path,
+        media_type=MEDIA_TYPES[export_format],
+        filename=f"{job.spec['kind']}_{str(job.id)[:8]}.{export_format}",
+    )
@@ -3,23 +3,27 @@ CEAP API — Submissions & Problems Routes
 Fixed: SubmissionDetailResponse validation, rate-limit datetime,
        added Run endpoint, proper error capture.
 """
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-from sqlalchemy import select, func
+from sqlalchemy import select, update
 from uuid import UUID
 from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Literal, Optional
 import asyncio
 import json
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_db, async_session
 from app.models.tenant import User
 from app.models.problem import (
     Problem, TestCase, StarterCode, EventProblem,
     Submission, SubmissionResult
 )
 from app.models.event import Event, Registration
-from app.models.leaderboard import LeaderboardEntry
+from app.models.leaderboard import LeaderboardEntry, LeaderboardProblemScore
 from app.schemas.submission import (
     ProblemCreate, ProblemUpdate, ProblemResponse,
     TestCaseCreate, TestCaseResponse,
@@ -27,11 +31,34 @@ from app.schemas.submission import (
     SubmissionResultResponse,
     RunRequest, RunResponse, RunResult,
 )
-from app.core.security import get_current_user, require_faculty
+from app.core.security import get_current_user, get_token_claims, get_stream_token_claims, require_faculty
 from app.services.judge_service import judge_service
+from app.services.leaderboard import (
+    leaderboard_index, publish_change, build_leaderboard_page, build_leaderboard_snapshot,
+    ScoringRules, scoring_mode, encode_cursor, decode_cursor, find_ranked_id,
+)
+from app.services.leaderboard_cache import leaderboard_cache
+from app.services.leaderboard_stream import leaderboard_stream
+from app.services.leaderboard_history import freeze_registry, is_staff, rank_timeline
+from app.services import stats
+from app.services.problem_analytics import problem_analytics_cache
+from app.services.submission_timeline import timeline_cache
+from app.api.v1.events import team_for_user
+
+if settings.is_sqlite:
+    from sqlalchemy.dialects.sqlite import insert as _upsert_insert
+else:
+    from sqlalchemy.dialects.postgresql import insert as _upsert_insert
 
 router = APIRouter(tags=["Problems & Submissions"])
 
+# Judging modes, chosen per event via Event.scoring_formula["mode"]
+# (see scoring_mode / ScoringRules in app.services.leaderboard):
+#   "ioi"  — run every test case, partial score by test weight (default)
+#   "icpc" — stop at the first failing test case, all-or-nothing score; the
+#            board ranks by solved count, then minutes to each first AC plus
+#            scoring_formula["penalty_minutes"] (default 20) per rejected attempt
+
 
 # ── Problems ────────────────────────────────────────────────
 
@@ -166,7 +193,7 @@ async def run_code(
             language=req.language,
             stdin=req.custom_input,
             expected_output=None,
-            time_limit=problem.time_limit_ms / 1000.0,
+            time_limit=judge_service.effective_time_limit(req.language, problem.time_limit_ms),
             memory_limit=problem.memory_limit_kb,
         )
         return RunResponse(
@@ -207,7 +234,7 @@ async def run_code(
             language=req.language,
             stdin=stdin,
             expected_output=problem.sample_output,
-            time_limit=problem.time_limit_ms / 1000.0,
+            time_limit=judge_service.effective_time_limit(req.language, problem.time_limit_ms),
             memory_limit=problem.memory_limit_kb,
         )
         return RunResponse(
@@ -246,7 +273,7 @@ async def run_code(
             language=req.language,
             stdin=tc.input,
             expected_output=tc.expected_output,
-            time_limit=problem.time_limit_ms / 1000.0,
+            time_limit=judge_service.effective_time_limit(req.language, problem.time_limit_ms),
             memory_limit=problem.memory_limit_kb,
         )
 
@@ -356,6 +383,11 @@ async def create_submission(
     if recent:
         raise HTTPException(status_code=429, detail="Please wait 30 seconds between submissions")
 
+    # Team events score per team; registrations made before joining a team
+    # are linked here on first submission
+    if event.is_team_event and not reg.team_id:
+        reg.team_id = await team_for_user(db, req.event_id, user.id)
+
     # Create submission
     submission = Submission(
         event_id=req.event_id,
@@ -367,6 +399,8 @@ async def create_submission(
         status="queued",
     )
     db.add(submission)
+    await stats.bump(db, event.tenant_id, "submissions", "queued", event_id=req.event_id)
+    stats.my_stats_cache.invalidate(user.id)
     await db.flush()
     await db.refresh(submission)
 
@@ -380,7 +414,6 @@ async def create_submission(
 
 async def process_submission(submission_id: str, problem_id: str):
     """Background task: execute code and process results."""
-    from app.database import async_session
 
     async with async_session() as db:
         try:
@@ -388,12 +421,17 @@ async def process_submission(submission_id: str, problem_id: str):
                 select(Submission).where(Submission.id == submission_id)
             )).scalar_one()
 
+            event = (await db.execute(
+                select(Event).where(Event.id == sub.event_id)
+            )).scalar_one()
+
             test_cases = (await db.execute(
                 select(TestCase).where(TestCase.problem_id == problem_id)
                 .order_by(TestCase.order_index)
             )).scalars().all()
 
             if not test_cases:
+                await stats.move(db, event.tenant_id, "submissions", sub.status, "accepted", event_id=sub.event_id)
                 sub.status = "accepted"
                 sub.score = 100
                 sub.judged_at = datetime.utcnow()
@@ -404,20 +442,31 @@ async def process_submission(submission_id: str, problem_id: str):
                 select(Problem).where(Problem.id == problem_id)
             )).scalar_one()
 
+            fail_fast = scoring_mode(event) == "icpc"
+
             total_weight = sum(tc.weight for tc in test_cases)
             total_score = 0
             max_time = 0
             max_memory = 0
             final_status = "accepted"
 
-            for tc in test_cases:
+            # Fail-fast: run the tests most likely to fail per ms of runtime first
+            run_order = (
+                sorted(test_cases, key=failure_priority, reverse=True)
+                if fail_fast else test_cases
+            )
+            results_by_tc = {}
+
+            for tc in run_order:
                 try:
                     result = await judge_service.execute(
                         source_code=sub.source_code,
                         language=sub.language,
                         stdin=tc.input,
                         expected_output=tc.expected_output,
-                        time_limit=problem.time_limit_ms / 1000.0,
+                        time_limit=judge_service.effective_time_limit(
+                            sub.language, problem.time_limit_ms
+                        ),
                         memory_limit=problem.memory_limit_kb,
                     )
 
@@ -445,7 +494,7 @@ async def process_submission(submission_id: str, problem_id: str):
                             "compile_output": result["compile_output"],
                         })
 
-                    result_entry = SubmissionResult(
+                    results_by_tc[tc.id] = SubmissionResult(
                         submission_id=sub.id,
                         test_case_id=tc.id,
                         status=tc_status,
@@ -454,33 +503,51 @@ async def process_submission(submission_id: str, problem_id: str):
                         memory_used=tc_memory,
                         passed=tc_passed,
                     )
-                    db.add(result_entry)
+
+                    # Compile errors say nothing about the test case itself
+                    if tc_status != "compile_error":
+                        record_test_case_stats(tc, tc_passed, tc_time)
 
                     # Stop early on compile error (same code for all cases)
                     if tc_status == "compile_error":
                         final_status = "compile_error"
                         break
 
+                    # ICPC: the first failing test already decides the verdict
+                    if fail_fast and not tc_passed:
+                        break
+
                 except Exception as e:
-                    result_entry = SubmissionResult(
+                    results_by_tc[tc.id] = SubmissionResult(
                         submission_id=sub.id,
                         test_case_id=tc.id,
                         status="runtime_error",
                         actual_output=str(e),
                         passed=False,
                     )
-                    db.add(result_entry)
                     if final_status == "accepted":
                         final_status = "runtime_error"
+                    if fail_fast:
+                        break
+
+            # Store results in the problem's original test order
+            db.add_all(results_by_tc[tc.id] for tc in test_cases if tc.id in results_by_tc)
 
+            # ICPC scoring is all-or-nothing; unrun tests must not count as lost weight
+            if fail_fast:
+                total_score = 100 if final_status == "accepted" else 0
+
+            await stats.move(db, event.tenant_id, "submissions", sub.status, final_status, event_id=sub.event_id)
             sub.status = final_status
             sub.score = round(total_score, 2)
             sub.execution_time = max_time
             sub.memory_used = max_memory
             sub.judged_at = datetime.utcnow()
 
-            await update_leaderboard(db, sub)
+            entry = await update_leaderboard(db, sub, ScoringRules.from_event(event))
             await db.commit()
+            if entry:
+                await publish_change(entry)
 
         except Exception as e:
             await db.rollback()
@@ -488,13 +555,45 @@ async def process_submission(submission_id: str, problem_id: str):
                 sub = (await error_db.execute(
                     select(Submission).where(Submission.id == submission_id)
                 )).scalar_one()
+                tenant_id = (await error_db.execute(
+                    select(Event.tenant_id).where(Event.id == sub.event_id)
+                )).scalar_one()
+                await stats.move(error_db, tenant_id, "submissions", sub.status, "runtime_error", event_id=sub.event_id)
                 sub.status = "runtime_error"
                 sub.judged_at = datetime.utcnow()
                 await error_db.commit()
+            # The verdict being replaced may already sit in a closed timeline bucket
+            timeline_cache.invalidate(sub.event_id)
+        finally:
+            problem_analytics_cache.invalidate(problem_id)
+
+
+def failure_priority(tc: TestCase) -> float:
+    """Estimated failure probability per ms of runtime (Laplace-smoothed)."""
+    runs = tc.run_count or 0
+    p_fail = ((tc.fail_count or 0) + 1) / (runs + 2)
+    avg_ms = (tc.total_time_ms or 0) / runs if runs else 0
+    return p_fail / max(avg_ms, 1.0)
+
+
+def record_test_case_stats(tc: TestCase, passed: bool, time_ms: int):
+    """Bump a test case's judging counters (atomic SQL increments on flush)."""
+    tc.run_count = TestCase.run_count + 1
+    tc.total_time_ms = TestCase.total_time_ms + (time_ms or 0)
+    if not passed:
+        tc.fail_count = TestCase.fail_count + 1
 
 
-async def update_leaderboard(db: AsyncSession, submission: Submission):
-    """Update leaderboard entry after a submission is judged."""
+async def update_leaderboard(
+    db: AsyncSession, submission: Submission, rules: ScoringRules,
+) -> Optional[LeaderboardEntry]:
+    """
+    Update leaderboard entry after a submission is judged.
+    Keeps per-problem state (best score, ICPC attempts and first AC) in
+    LeaderboardProblemScore and moves the entry totals by the delta only,
+    so the cost per verdict does not grow with the number of submissions.
+    Returns the entry if the board changed, else None.
+    """
     participant_id = submission.team_id or submission.user_id
 
     entry = (await db.execute(
@@ -505,33 +604,66 @@ async def update_leaderboard(db: AsyncSession, submission: Submission):
         )
     )).scalar_one_or_none()
 
+    changed = False
     if not entry:
         entry = LeaderboardEntry(
             event_id=submission.event_id,
             user_id=None if submission.team_id else submission.user_id,
             team_id=submission.team_id,
+            total_score=0,
+            problems_solved=0,
+            total_time=0,
+            penalty=0,
         )
         db.add(entry)
-
-    all_subs = (await db.execute(
-        select(Submission).where(
-            Submission.event_id == submission.event_id,
-            Submission.user_id == submission.user_id,
-            Submission.status != "pending",
-            Submission.status != "queued",
-            Submission.status != "running",
+        await db.flush()
+        changed = True
+
+    # Create-or-lock the problem row in one statement: concurrent first
+    # verdicts of a team can't collide on the key, and later ones wait here
+    # for the row instead of reading a stale state
+    key = {"entry_id": entry.id, "problem_id": submission.problem_id}
+    upsert = _upsert_insert(LeaderboardProblemScore).values(**key, best_score=0, attempts=0)
+    row = (await db.execute(
+        upsert.on_conflict_do_update(
+            index_elements=["entry_id", "problem_id"],
+            set_={"attempts": upsert.table.c.attempts},
+        ).returning(
+            LeaderboardProblemScore.best_score,
+            LeaderboardProblemScore.attempts,
+            LeaderboardProblemScore.first_ac_at,
+        )
+    )).one()
+    state = SimpleNamespace(**row._mapping)
+
+    delta = rules.apply(state, submission.status, submission.score, submission.submitted_at)
+    if tuple(vars(state).values()) != tuple(row):
+        await db.execute(
+            update(LeaderboardProblemScore)
+            .where(LeaderboardProblemScore.entry_id == entry.id,
+                   LeaderboardProblemScore.problem_id == submission.problem_id)
+            .values(best_score=state.best_score, attempts=state.attempts, first_ac_at=state.first_ac_at)
         )
-    )).scalars().all()
-
-    best_scores = {}
-    for s in all_subs:
-        pid = str(s.problem_id)
-        if pid not in best_scores or float(s.score or 0) > float(best_scores[pid]):
-            best_scores[pid] = float(s.score or 0)
 
-    entry.total_score = sum(best_scores.values())
-    entry.problems_solved = sum(1 for s in best_scores.values() if s >= 100)
-    entry.last_submission = submission.submitted_at
+    # The tie-break is when the current standing was reached, so only
+    # verdicts that change the board move last_submission
+    if delta or changed:
+        values = {"last_submission": submission.submitted_at}
+        if delta:
+            # Increments in SQL, so concurrent verdicts of one team all count
+            values.update(
+                total_score=LeaderboardEntry.total_score + delta["score"],
+                problems_solved=LeaderboardEntry.problems_solved + delta["solved"],
+                total_time=LeaderboardEntry.total_time + delta["time"],
+                penalty=LeaderboardEntry.penalty + delta["penalty"],
+            )
+        entry = (await db.execute(
+            update(LeaderboardEntry).where(LeaderboardEntry.id == entry.id).values(**values)
+            .returning(LeaderboardEntry),
+            execution_options={"synchronize_session": False, "populate_existing": True},
+        )).scalar_one()
+        changed = True
+    return entry if changed else None
 
 
 # ── Get Submission Details (FIXED — no lazy loading) ─────────
@@ -556,9 +688,14 @@ async def get_submission(
     if user.role == "student" and sub.user_id != user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
+    # Fail-fast judging may run tests out of order — report by order_index
+    test_order = dict((await db.execute(
+        select(TestCase.id, TestCase.order_index).where(TestCase.problem_id == sub.problem_id)
+    )).all())
+
     # Build response manually to avoid pydantic lazy-load issues
     result_list = []
-    for r in sub.results:
+    for r in sorted(sub.results, key=lambda r: test_order.get(r.test_case_id) or 0):
         # Parse combined output (may be JSON with stderr/compile_output)
         stderr = None
         compile_output = None
@@ -623,57 +760,129 @@ async def my_submissions(
 @router.get("/events/{event_id}/leaderboard")
 async def get_leaderboard(
     event_id: UUID,
+    request: Request,
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=100),
-    user: User = Depends(get_current_user),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    around: Optional[Literal["me"]] = Query(None),
+    radius: int = Query(5, ge=0, le=50),
+    claims: dict = Depends(get_token_claims),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get event leaderboard."""
-    query = (
-        select(LeaderboardEntry)
-        .where(LeaderboardEntry.event_id == event_id)
-        .order_by(
-            LeaderboardEntry.total_score.desc(),
-            LeaderboardEntry.problems_solved.desc(),
-            LeaderboardEntry.last_submission.asc(),
-        )
+    """
+    Get event leaderboard.
+    Three ways to pick the window, all served from the rank index:
+      page/page_size   — numbered pages
+      cursor           — the page after next_cursor (keyset on the sort key,
+                         stable while ranks above it move)
+      around=me&radius — the caller's entry (or team's) with radius on each side
+    Pages are cached per board version; an unchanged board answers
+    If-None-Match with 304 without touching the database. While the board
+    is frozen, non-staff readers get the board as of the freeze time.
+    """
+    freeze_at = None if is_staff(claims) else await freeze_registry.frozen_at(db, event_id)
+    if freeze_at is not None:
+        version = f"frozen{int(freeze_at.timestamp())}"
+        entries, ranking = await freeze_registry.board(db, event_id, freeze_at)
+    else:
+        version = await leaderboard_cache.version(event_id)
+        ranking = await leaderboard_index.get(db, event_id)
+
+    my_rank = None
+    if around == "me":
+        ranked_id = await find_ranked_id(db, ranking, event_id, claims["sub"])
+        if ranked_id is None:
+            raise HTTPException(status_code=404, detail="You are not on this leaderboard yet")
+        my_rank = await ranking.rank_of(ranked_id)
+        offset = max(0, my_rank - 1 - radius)
+        limit = my_rank + radius - offset
+        parts = ("around", ranked_id, radius)
+    elif cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        offset, limit = await ranking.index_after(after), page_size
+        parts = ("after", cursor, page_size)
+    else:
+        offset, limit = (page - 1) * page_size, page_size
+        parts = (page, page_size)
+
+    etag = leaderboard_cache.etag(version, *parts)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    if freeze_at is not None:
+        body = {
+            "entries": entries[offset:offset + limit],
+            "total": len(entries),
+            "frozen_at": freeze_at.isoformat(),
+            "updated_at": freeze_at.isoformat(),
+        }
+    else:
+        body = await leaderboard_cache.get_page(event_id, version, *parts)
+        if body is not None:
+            return JSONResponse(body, headers=headers)
+        body = await build_leaderboard_page(db, ranking, offset, limit)
+
+    total = await ranking.count()
+    end = min(offset + limit, total)
+    body["next_cursor"] = encode_cursor(await ranking.key_at(end - 1)) if offset < end < total else None
+    if my_rank is not None:
+        body["my_rank"] = my_rank
+
+    if freeze_at is None:
+        await leaderboard_cache.set_page(event_id, version, *parts, body=body)
+    return JSONResponse(body, headers=headers)
+
+
+@router.get("/events/{event_id}/leaderboard/stream")
+async def stream_leaderboard(
+    event_id: UUID,
+    claims: dict = Depends(get_stream_token_claims),
+):
+    """
+    Live leaderboard over Server-Sent Events.
+    Sends a full snapshot on connect and every LEADERBOARD_STREAM_RESYNC_SECONDS,
+    and a delta for each committed change in between. See
+    app.services.leaderboard_stream for the message format.
+    While the board is frozen, non-staff clients get the frozen snapshot and
+    are told to reconnect after the resync interval.
+    """
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if not is_staff(claims):
+        async with async_session() as db:
+            freeze_at = await freeze_registry.frozen_at(db, event_id)
+            if freeze_at is not None:
+                body = await freeze_registry.page(db, event_id, freeze_at, 0, None)
+        if freeze_at is not None:
+            frame = (
+                f"retry: {settings.LEADERBOARD_STREAM_RESYNC_SECONDS * 1000}\n"
+                f"event: snapshot\ndata: {json.dumps(body, separators=(',', ':'))}\n\n"
+            )
+            return StreamingResponse(iter([frame]), media_type="text/event-stream", headers=headers)
+
+    return StreamingResponse(
+        leaderboard_stream.frames(event_id, build_leaderboard_snapshot),
+        media_type="text/event-stream",
+        headers=headers,
     )
 
-    total = (await db.execute(
-        select(func.count()).select_from(query.subquery())
-    )).scalar()
-
-    entries = (await db.execute(
-        query.offset((page - 1) * page_size).limit(page_size)
-    )).scalars().all()
 
-    result = []
-    for i, entry in enumerate(entries):
-        user_name = None
-        team_name = None
-        if entry.user_id:
-            from app.models.tenant import User as UserModel
-            u = (await db.execute(select(UserModel).where(UserModel.id == entry.user_id))).scalar_one_or_none()
-            user_name = u.full_name if u else None
-        if entry.team_id:
-            from app.models.event import Team
-            t = (await db.execute(select(Team).where(Team.id == entry.team_id))).scalar_one_or_none()
-            team_name = t.name if t else None
-
-        result.append({
-            "rank": (page - 1) * page_size + i + 1,
-            "user_id": str(entry.user_id) if entry.user_id else None,
-            "team_id": str(entry.team_id) if entry.team_id else None,
-            "user_name": user_name,
-            "team_name": team_name,
-            "total_score": float(entry.total_score),
-            "problems_solved": entry.problems_solved,
-            "total_time": entry.total_time,
-            "last_submission": entry.last_submission.isoformat() if entry.last_submission else None,
-        })
-
-    return {
-        "entries": result,
-        "total": total,
-        "updated_at": datetime.utcnow().isoformat(),
-    }
+@router.get("/events/{event_id}/leaderboard/timeline")
+async def get_rank_timeline(
+    event_id: UUID,
+    points: int = Query(60, ge=2, le=500),
+    top: int = Query(10, ge=1, le=100),
+    user: User = Depends(require_faculty),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Rank-over-time for the final top participants (faculty only).
+    Rebuilt by replaying judged submissions in one streaming pass.
+    """
+    event = await db.get(Event, event_id)
+    if not event or event.tenant_id != user.tenant_id:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return await rank_timeline(db, event_id, points, top)
@@ -25,9 +25,41 @@ class Settings(BaseSettings):
     # Redis (optional)
     REDIS_URL: str = "redis://localhost:6379"
 
+    # Leaderboard
+    LEADERBOARD_STORE: str = "memory"  # memory (per-process index) | redis (sorted sets, shared)
+    LEADERBOARD_RANK_FLUSH_SECONDS: int = 10
+    LEADERBOARD_CACHE_BACKEND: str = "memory"  # memory | redis (shared across workers)
+    LEADERBOARD_CACHE_TTL_SECONDS: int = 300
+    LEADERBOARD_STREAM_RESYNC_SECONDS: int = 60
+    LEADERBOARD_STREAM_KEEPALIVE_SECONDS: int = 15
+    LEADERBOARD_STREAM_QUEUE_SIZE: int = 256  # pending deltas before a slow client is resynced
+
+    # Analytics
+    STATS_RECONCILE_HOUR: int = 3  # UTC hour of the nightly stats rollup reconciliation
+    MY_STATS_CACHE_TTL_SECONDS: int = 30  # per-user /analytics/my-stats cache (per process)
+    PROBLEM_ANALYTICS_CACHE_TTL_SECONDS: int = 600  # per-problem analytics (dropped on verdicts)
+
+    # Report jobs (background exports)
+    REPORT_WORKERS: int = 2  # reports built concurrently per process
+    REPORT_MAX_QUEUED: int = 50  # queued jobs before new submissions get 503
+    REPORT_JOB_TIMEOUT_MINUTES: int = 60
+    REPORT_ARTIFACT_TTL_HOURS: int = 24  # finished files are reused, then deleted
+    REPORTS_DIR: str = "./report_artifacts"
+
+    # Audit log writer
+    AUDIT_DURABILITY: str = "async"  # async (batched in the background) | sync (caller's transaction)
+    AUDIT_SYNC_ACTIONS: str = "user.created,user.role_changed,user.deleted,user.password_changed,user.password_reset"
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_FLUSH_BATCH_SIZE: int = 500  # flush early once this many entries are waiting
+    AUDIT_MAX_BUFFERED: int = 50000  # beyond this, entries are written synchronously
+
     # Judge0
     JUDGE0_URL: str = "http://localhost:2358"
     JUDGE0_API_KEY: str = ""
+    # Per-language time-limit multipliers ("lang:factor,..."), relative to C/C++
+    JUDGE_TIME_MULTIPLIERS: str = "c:1.0,cpp:1.0,java:2.0,javascript:2.0,python:3.0"
+    # Measure host speed per language at startup (local backend only)
+    JUDGE_CALIBRATE_ON_STARTUP: bool = True
 
     # JWT
     JWT_SECRET: str = "ceap-local-dev-secret-change-in-prod"
@@ -56,6 +88,19 @@ class Settings(BaseSettings):
                 origins.append(url)
         return origins
 
+    @property
+    def judge_time_multipliers(self) -> dict[str, float]:
+        multipliers = {}
+        for pair in self.JUDGE_TIME_MULTIPLIERS.split(","):
+            lang, _, factor = pair.partition(":")
+            if lang.strip() and factor.strip():
+                multipliers[lang.strip()] = float(factor)
+        return multipliers
+
+    @property
+    def audit_sync_actions(self) -> set[str]:
+        return {a.strip() for a in self.AUDIT_SYNC_ACTIONS.split(",") if a.strip()}
+
     @property
     def is_sqlite(self) -> bool:
         return "sqlite" in self.DATABASE_URL
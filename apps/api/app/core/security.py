@@ -9,7 +9,7 @@ from uuid import UUID
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
@@ -20,6 +20,7 @@ from app.models.tenant import User
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=10)
 security_scheme = HTTPBearer()
+optional_security_scheme = HTTPBearer(auto_error=False)
 
 
 def hash_password(password: str) -> str:
@@ -75,6 +76,36 @@ async def get_current_user(
     return user
 
 
+def get_token_claims(
+    credentials: HTTPAuthorizationCredentials = Depends(security_scheme),
+) -> dict:
+    """
+    Dependency: validates the JWT without loading the user from the DB.
+    For hot read-only endpoints; deactivation takes effect at token expiry.
+    """
+    payload = decode_token(credentials.credentials)
+    if payload.get("sub") is None:
+        raise HTTPException(status_code=401, detail="Invalid token payload")
+    return payload
+
+
+def get_stream_token_claims(
+    token: Optional[str] = Query(None),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security_scheme),
+) -> dict:
+    """
+    Dependency: like get_token_claims, but also accepts the JWT as ?token=
+    because browser EventSource connections cannot send headers.
+    """
+    raw = credentials.credentials if credentials else token
+    if not raw:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    payload = decode_token(raw)
+    if payload.get("sub") is None:
+        raise HTTPException(status_code=401, detail="Invalid token payload")
+    return payload
+
+
 class RoleChecker:
     """Dependency: checks if the current user has the required role(s)."""
 
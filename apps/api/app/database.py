@@ -95,6 +95,12 @@ async def _apply_column_migrations():
         ("users", "password_reset_token", "VARCHAR(64)", None),
         ("users", "password_reset_expires", "TIMESTAMP", None),
         ("users", "must_change_password", "BOOLEAN", "false"),
+        ("test_cases", "run_count", "INTEGER", "0"),
+        ("test_cases", "fail_count", "INTEGER", "0"),
+        ("test_cases", "total_time_ms", "INTEGER", "0"),
+        ("events", "leaderboard_freeze_at", "TIMESTAMP", None),
+        ("leaderboard_problem_scores", "attempts", "INTEGER", "0"),
+        ("leaderboard_problem_scores", "first_ac_at", "TIMESTAMP", None),
     ]
 
     # SQLite uses a different syntax
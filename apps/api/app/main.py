@@ -20,22 +20,92 @@ async def lifespan(app: FastAPI):
     """Startup and shutdown logic."""
     import asyncio
     from app.services.scheduler import run_scheduler
+    from app.services.judge_service import judge_service
+    from app.services.leaderboard import leaderboard_index, run_rank_flusher, ensure_problem_scores
+    from app.services.stats import ensure_rollups
+    from app.services.reports import report_runner
+    from app.services.audit import audit_sink
 
     print(f"🚀 CEAP API starting in {settings.APP_ENV} mode")
     print(f"📦 Database: {'SQLite' if settings.is_sqlite else 'PostgreSQL'}")
     await init_db()
     print("✅ Database tables ready")
 
-    # Start event scheduler as background task
+    # Rebuild in-memory leaderboard ranks for ongoing events
+    try:
+        loaded = await leaderboard_index.warm()
+        print(f"🏅 Leaderboard index loaded for {loaded} ongoing event(s)")
+    except Exception as e:
+        print(f"⚠️ Leaderboard index warm-up skipped (loads lazily): {e}")
+
+    # Per-problem leaderboard state for boards that predate its table
+    try:
+        filled = await ensure_problem_scores()
+        if filled is not None:
+            print(f"🏅 Leaderboard problem scores backfilled ({filled} rows)")
+    except Exception as e:
+        print(f"⚠️ Leaderboard problem score backfill failed: {e}")
+
+    # Build the stats rollup counters if this database has none yet
+    try:
+        built = await ensure_rollups()
+        if built is not None:
+            print(f"📊 Stats rollups built ({built} counters)")
+    except Exception as e:
+        print(f"⚠️ Stats rollup build skipped (nightly reconciliation will retry): {e}")
+
+    # Report job workers (re-queues jobs left queued by the last run)
+    try:
+        requeued = await report_runner.start()
+        if requeued:
+            print(f"📑 Re-queued {requeued} report job(s)")
+    except Exception as e:
+        print(f"⚠️ Report workers not started (report jobs stay queued): {e}")
+
+    # Batched audit log writer
+    audit_sink.start()
+
+    # Start event scheduler and rank flusher as background tasks
     scheduler_task = asyncio.create_task(run_scheduler())
+    rank_flusher_task = asyncio.create_task(run_rank_flusher())
+
+    # Warm up the local judge: Java CDS archive, then host calibration (non-blocking)
+    if judge_service.use_local:
+        asyncio.create_task(_prepare_judge(judge_service))
 
     yield
 
-    # Cancel scheduler on shutdown
+    # Cancel background loops, write queued audit entries and persist the
+    # latest ranks on shutdown
     scheduler_task.cancel()
+    rank_flusher_task.cancel()
+    await report_runner.stop()
+    await audit_sink.stop()
+    try:
+        await leaderboard_index.flush()
+    except Exception as e:
+        print(f"⚠️ Final rank flush failed: {e}")
     print("👋 CEAP API shutting down")
 
 
+async def _prepare_judge(judge_service):
+    try:
+        if await judge_service.prepare_java():
+            startup = judge_service.java_startup_ms
+            print(f"☕ Java CDS archive ready: startup {startup['before']}ms → {startup['after']}ms")
+    except Exception as e:
+        print(f"⚠️ Java CDS archive skipped (cold JVM starts): {e}")
+
+    if not settings.JUDGE_CALIBRATE_ON_STARTUP:
+        return
+    try:
+        factors = await judge_service.calibrate()
+        summary = ", ".join(f"{lang} ×{f}" for lang, f in factors.items()) or "no toolchains found"
+        print(f"⏱️  Judge host calibration: {summary}")
+    except Exception as e:
+        print(f"⚠️ Judge calibration failed (using unscaled limits): {e}")
+
+
 app = FastAPI(
     title="CEAP API",
     description="Campus Event & Assessment Platform — REST API",
@@ -8,15 +8,20 @@ from app.models.problem import (
     Problem, TestCase, StarterCode, EventProblem,
     Submission, SubmissionResult, JudgeScore, Rubric
 )
-from app.models.leaderboard import LeaderboardEntry, Certificate, CertificateTemplate
+from app.models.leaderboard import (
+    LeaderboardEntry, LeaderboardProblemScore, Certificate, CertificateTemplate
+)
 from app.models.mcq import MCQQuestion, MCQAttempt
+from app.models.stats import StatsRollup
+from app.models.report import ReportJob
 
 __all__ = [
     "Tenant", "User", "AuditLog", "StudentWhitelist",
     "Event", "EventRound", "EventTemplate", "Registration", "Team", "TeamMember",
     "Problem", "TestCase", "StarterCode", "EventProblem",
     "Submission", "SubmissionResult", "JudgeScore", "Rubric",
-    "LeaderboardEntry", "Certificate", "CertificateTemplate",
+    "LeaderboardEntry", "LeaderboardProblemScore", "Certificate", "CertificateTemplate",
     "MCQQuestion", "MCQAttempt",
+    "StatsRollup", "ReportJob",
 ]
 
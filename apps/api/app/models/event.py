@@ -38,8 +38,10 @@ class Event(Base):
     is_team_event = Column(Boolean, default=False)
     eligibility_rules = Column(JSON_TYPE(), default={})
 
-    # Scoring
+    # Scoring — optional "mode": "ioi" (default) or "icpc" selects the judging mode
     scoring_formula = Column(JSON_TYPE(), default={"auto": 0.7, "judge": 0.3})
+    # Students see the board as of this time until the event is completed
+    leaderboard_freeze_at = Column(DateTime, nullable=True)
 
     created_by = Column(GUID(), ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
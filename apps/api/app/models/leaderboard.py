@@ -19,12 +19,25 @@ class LeaderboardEntry(Base):
 
     total_score = Column(Numeric(8, 2), default=0)
     problems_solved = Column(Integer, default=0)
-    total_time = Column(Integer, default=0)
-    penalty = Column(Integer, default=0)
+    total_time = Column(Integer, default=0)  # ICPC: minutes from event start to each first AC
+    penalty = Column(Integer, default=0)  # ICPC: penalty minutes for rejected attempts
     rank = Column(Integer, nullable=True)
     last_submission = Column(DateTime, nullable=True)
 
 
+class LeaderboardProblemScore(Base):
+    """Per-problem state of a leaderboard participant — verdicts update totals by delta."""
+    __tablename__ = "leaderboard_problem_scores"
+
+    entry_id = Column(GUID(), ForeignKey("leaderboard_entries.id", ondelete="CASCADE"), primary_key=True)
+    problem_id = Column(GUID(), ForeignKey("problems.id"), primary_key=True)
+    best_score = Column(Numeric(5, 2), default=0)
+    # ICPC: rejected attempts before the first accepted verdict, and its time
+    attempts = Column(Integer, default=0)
+    first_ac_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class Certificate(Base):
     __tablename__ = "certificates"
 
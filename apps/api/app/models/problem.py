@@ -4,7 +4,7 @@ CEAP Database Models — Problems, Test Cases, Submissions
 import uuid
 from datetime import datetime
 from sqlalchemy import (
-    Column, String, Boolean, Integer, DateTime, Text, ForeignKey, Numeric
+    Column, String, Boolean, Integer, DateTime, Text, ForeignKey, Numeric, Index
 )
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -66,6 +66,11 @@ class TestCase(Base):
     order_index = Column(Integer, default=0)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Judging statistics — drive fail-fast test ordering
+    run_count = Column(Integer, default=0)
+    fail_count = Column(Integer, default=0)
+    total_time_ms = Column(Integer, default=0)
+
     problem = relationship("Problem", back_populates="test_cases")
 
 
@@ -95,6 +100,10 @@ class EventProblem(Base):
 
 class Submission(Base):
     __tablename__ = "submissions"
+    __table_args__ = (
+        # Time-bucketed activity per event (analytics timeline)
+        Index("ix_submissions_event_submitted", "event_id", "submitted_at"),
+    )
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
     event_id = Column(GUID(), ForeignKey("events.id"), nullable=False, index=True)
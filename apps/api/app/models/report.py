@@ -0,0 +1,33 @@
+"""
+CEAP Database Models — Report Jobs
+"""
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, Text, ForeignKey, Index
+from app.database import Base
+from app.database_types import GUID, JSON_TYPE
+
+
+class ReportJob(Base):
+    """A report built in the background; the artifact is a local file kept until expires_at."""
+    __tablename__ = "report_jobs"
+    __table_args__ = (Index("ix_report_jobs_tenant_spec", "tenant_id", "spec_hash"),)
+
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    tenant_id = Column(GUID(), ForeignKey("tenants.id"), nullable=False)
+    created_by = Column(GUID(), ForeignKey("users.id"), nullable=True)
+    spec = Column(JSON_TYPE(), nullable=False)
+    spec_hash = Column(String(64), nullable=False)
+
+    status = Column(String(20), default="queued")  # queued/running/done/failed/expired
+    rows_done = Column(Integer, default=0)
+    rows_total = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+
+    artifact_path = Column(Text, nullable=True)
+    artifact_bytes = Column(BigInteger, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=True)
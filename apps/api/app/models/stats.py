@@ -0,0 +1,23 @@
+"""
+CEAP Database Models — Statistics Rollups
+"""
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, String, BigInteger, DateTime
+from app.database import Base
+from app.database_types import GUID
+
+# event_id of counters that belong to the tenant rather than one event
+TENANT_WIDE = uuid.UUID(int=0)
+
+
+class StatsRollup(Base):
+    """A counter kept up to date by the write paths, e.g. (tenant, event, "submissions", "accepted")."""
+    __tablename__ = "stats_rollups"
+
+    tenant_id = Column(GUID(), primary_key=True)
+    event_id = Column(GUID(), primary_key=True, default=TENANT_WIDE)
+    metric = Column(String(50), primary_key=True)
+    dimension = Column(String(50), primary_key=True, default="")
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -68,6 +68,10 @@ class User(Base):
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        # Newest-first keyset pages per tenant
+        Index("ix_audit_logs_tenant_created_id", "tenant_id", "created_at", "id"),
+    )
 
     id = Column(GUID(), primary_key=True, default=uuid.uuid4)
     tenant_id = Column(GUID(), ForeignKey("tenants.id"), nullable=False, index=True)
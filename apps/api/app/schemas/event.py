@@ -23,6 +23,7 @@ class EventCreate(BaseModel):
     is_team_event: bool = False
     eligibility_rules: Optional[dict] = {}
     scoring_formula: Optional[dict] = {"auto": 0.7, "judge": 0.3}
+    leaderboard_freeze_at: Optional[datetime] = None
 
 
 class EventUpdate(BaseModel):
@@ -36,6 +37,7 @@ class EventUpdate(BaseModel):
     event_end: Optional[datetime] = None
     max_participants: Optional[int] = Field(None, ge=1, le=10000)
     scoring_formula: Optional[dict] = None
+    leaderboard_freeze_at: Optional[datetime] = None
 
 
 class EventResponse(BaseModel):
@@ -56,6 +58,7 @@ class EventResponse(BaseModel):
     team_min_size: int
     team_max_size: int
     scoring_formula: Optional[dict] = None
+    leaderboard_freeze_at: Optional[datetime] = None
     created_at: datetime
     registration_count: Optional[int] = None
 
@@ -0,0 +1,41 @@
+"""
+CEAP Pydantic Schemas — Report Jobs
+"""
+from pydantic import BaseModel, model_validator
+from typing import Optional, List, Literal
+from uuid import UUID
+from datetime import datetime
+
+
+class ReportSpec(BaseModel):
+    """What to build. Identical specs (per tenant) share one job and artifact."""
+    kind: Literal["submissions", "leaderboard", "participants", "mcq_results"]
+    format: Literal["csv", "xlsx", "parquet"] = "csv"
+    event_id: Optional[UUID] = None  # leaderboard / participants / mcq_results
+    event_ids: Optional[List[UUID]] = None  # submissions: limit to these events
+    date_from: Optional[datetime] = None  # submissions: submitted_at range
+    date_to: Optional[datetime] = None
+    test_cases: bool = False  # submissions: one row per test case result
+
+    @model_validator(mode="after")
+    def check_event(self):
+        if self.kind != "submissions" and not self.event_id:
+            raise ValueError(f"event_id is required for {self.kind} reports")
+        return self
+
+
+class ReportJobResponse(BaseModel):
+    id: UUID
+    spec: dict
+    status: str
+    rows_done: int = 0
+    rows_total: Optional[int] = None
+    progress: Optional[float] = None
+    error: Optional[str] = None
+    artifact_bytes: Optional[int] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    reused: bool = False
+    download_url: Optional[str] = None
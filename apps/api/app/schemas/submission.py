@@ -185,6 +185,7 @@ class LeaderboardEntryResponse(BaseModel):
     total_score: float
     problems_solved: int
     total_time: int
+    penalty: int = 0
     last_submission: Optional[datetime] = None
 
 
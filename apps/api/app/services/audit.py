@@ -1,9 +1,162 @@
 """
 CEAP — Audit Log Service
 Logs important actions to the AuditLog table for accountability.
+
+Entries are written with one of two durabilities:
+  sync   added to the caller's transaction (commits or rolls back with it);
+         used for AUDIT_SYNC_ACTIONS such as role changes
+  async  queued in memory and bulk-inserted by a background writer every
+         AUDIT_FLUSH_INTERVAL_SECONDS or AUDIT_FLUSH_BATCH_SIZE entries, so
+         hot paths like login don't pay an INSERT; flushed on shutdown, and
+         lost only if the process dies before the next flush. Queued at once,
+         so the entry is written even if the caller's transaction rolls back;
+         log async only for actions that already happened (e.g. a login)
+An entry the database keeps rejecting (not merely unreachable) is dropped,
+with an error logged, after WRITE_MAX_ATTEMPTS writes of its own.
+
+Listing is newest-first with keyset cursors over the
+(tenant_id, created_at, id) index, so every page costs the same however far
+back it is. Totals are estimates: PostgreSQL's planner statistics, or on
+SQLite (no usable statistics) an "audit_logs" stats rollup counter per
+action, maintained by log_action.
 """
+import asyncio
+import base64
+import json
+import uuid
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Literal, Optional
+from uuid import UUID
+
+from sqlalchemy import select, func, insert, text, literal, tuple_
+from sqlalchemy.exc import InterfaceError, OperationalError
 from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session
+from app.models.stats import StatsRollup, TENANT_WIDE
 from app.models.tenant import AuditLog
+from app.services import stats
+
+WRITE_MAX_ATTEMPTS = 3
+# Database unreachable or busy: the whole batch waits for the next tick
+TRANSIENT_ERRORS = (OperationalError, InterfaceError, OSError, asyncio.TimeoutError)
+
+
+class AuditSink:
+    """In-memory queue of audit entries, bulk-inserted by a background task."""
+
+    def __init__(self, flush_interval: float, batch_size: int, max_buffered: int):
+        self._interval = flush_interval
+        self._batch_size = batch_size
+        self._max_buffered = max_buffered
+        self._buffer: deque[dict] = deque()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._failures: dict[uuid.UUID, int] = {}  # entry ID → failed single writes
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def offer(self, entry: dict) -> bool:
+        """Queue an entry; False when the writer isn't running or the buffer is full."""
+        if not self.running or len(self._buffer) >= self._max_buffered:
+            return False
+        self._buffer.append(entry)
+        if len(self._buffer) >= self._batch_size:
+            self._wake.set()
+        return True
+
+    def start(self):
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the writer and flush whatever is still queued."""
+        if self._task:
+            # Let an in-flight flush finish rather than cancelling it
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+        while self._buffer:
+            if not await self.flush():
+                print(f"⚠️ {len(self._buffer)} audit log entries lost on shutdown")
+                break
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self._interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            while self._buffer:
+                if not await self.flush():
+                    break  # retried on the next tick
+
+    async def flush(self) -> bool:
+        """Insert up to one batch of queued entries. False if any stay queued for the next attempt."""
+        batch = [self._buffer.popleft() for _ in range(min(self._batch_size, len(self._buffer)))]
+        if not batch:
+            return True
+        try:
+            await _write(batch)
+            return True
+        except TRANSIENT_ERRORS as e:
+            # Keep them for the next attempt, oldest first
+            self._buffer.extendleft(reversed(batch))
+            print(f"⚠️ Audit log flush failed ({len(batch)} entries kept): {e}")
+            return False
+        except Exception as e:
+            print(f"⚠️ Audit log batch rejected, writing its {len(batch)} entries one by one: {e}")
+
+        # One bad entry must not hold up the queue: write them singly, and
+        # drop an entry once it has failed WRITE_MAX_ATTEMPTS times
+        kept = []
+        for i, entry in enumerate(batch):
+            try:
+                await _write([entry])
+                self._failures.pop(entry["id"], None)
+            except TRANSIENT_ERRORS:
+                kept.extend(batch[i:])
+                break
+            except Exception as e:
+                failures = self._failures.get(entry["id"], 0) + 1
+                if failures < WRITE_MAX_ATTEMPTS:
+                    self._failures[entry["id"]] = failures
+                    kept.append(entry)
+                else:
+                    self._failures.pop(entry["id"], None)
+                    print(f"❌ Audit log entry dropped after {failures} failed writes "
+                          f"({entry['action']}, tenant {entry['tenant_id']}): {e}")
+        self._buffer.extendleft(reversed(kept))
+        return not kept
+
+
+audit_sink = AuditSink(
+    settings.AUDIT_FLUSH_INTERVAL_SECONDS, settings.AUDIT_FLUSH_BATCH_SIZE, settings.AUDIT_MAX_BUFFERED,
+)
+
+
+async def _write(entries: list[dict]):
+    async with async_session() as db:
+        await db.execute(insert(AuditLog), entries)
+        if settings.is_sqlite:
+            await _count_entries(db, entries)
+        await db.commit()
+
+
+async def _count_entries(db: AsyncSession, entries: list[dict]):
+    """Bump the SQLite audit_logs counters (see estimate_count) for written entries."""
+    by_tenant = defaultdict(lambda: defaultdict(int))
+    for entry in entries:
+        by_tenant[entry["tenant_id"]][(None, "audit_logs", entry["action"])] += 1
+    for tenant_id, changes in by_tenant.items():
+        await stats.bump_many(db, UUID(str(tenant_id)), changes)
 
 
 async def log_action(
@@ -17,6 +170,7 @@ async def log_action(
     old_values: dict | None = None,
     new_values: dict | None = None,
     ip_address: str | None = None,
+    durability: Optional[Literal["sync", "async"]] = None,
 ):
     """
     Write an audit log entry.
@@ -28,15 +182,88 @@ async def log_action(
         old_values: JSON dict of previous state
         new_values: JSON dict of new state
         ip_address: client IP (optional)
+        durability: "sync" or "async"; defaults to sync for AUDIT_SYNC_ACTIONS,
+            else AUDIT_DURABILITY. Async falls back to sync while the
+            background writer isn't running or its buffer is full.
     """
-    entry = AuditLog(
-        user_id=user_id,
-        tenant_id=tenant_id,
-        action=action,
-        entity_type=entity_type,
-        entity_id=entity_id,
-        old_values=old_values,
-        new_values=new_values,
-        ip_address=ip_address,
-    )
-    db.add(entry)
+    entry = {
+        "id": uuid.uuid4(),
+        "tenant_id": tenant_id,
+        "user_id": user_id,
+        "action": action,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "old_values": old_values,
+        "new_values": new_values,
+        "ip_address": ip_address,
+        "created_at": datetime.utcnow(),
+    }
+    if durability is None:
+        durability = "sync" if action in settings.audit_sync_actions else settings.AUDIT_DURABILITY
+    if durability == "async" and audit_sink.offer(entry):
+        return
+
+    db.add(AuditLog(**entry))
+    if settings.is_sqlite:
+        await _count_entries(db, [entry])
+
+
+# ── Listing ─────────────────────────────────────────────────
+
+def encode_cursor(entry: AuditLog) -> str:
+    """Opaque keyset cursor: (created_at, id) of the last entry already seen."""
+    raw = [entry.created_at.isoformat(), str(entry.id)]
+    return base64.urlsafe_b64encode(json.dumps(raw, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    """Inverse of encode_cursor. Raises ValueError on a malformed cursor."""
+    try:
+        created_at, entry_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), UUID(entry_id)
+    except (TypeError, ValueError) as e:  # JSONDecodeError and binascii.Error are ValueErrors
+        raise ValueError("Invalid audit log cursor") from e
+
+
+def page_query(tenant_id, action: Optional[str] = None, after: Optional[tuple] = None):
+    """Newest-first entries of a tenant, optionally only those older than `after`."""
+    query = select(AuditLog).where(AuditLog.tenant_id == tenant_id)
+    if action:
+        query = query.where(AuditLog.action == action)
+    if after:
+        created_at, entry_id = after
+        query = query.where(tuple_(AuditLog.created_at, AuditLog.id) < tuple_(
+            literal(created_at, AuditLog.created_at.type), literal(entry_id, AuditLog.id.type),
+        ))
+    return query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+
+
+async def estimate_count(db: AsyncSession, tenant_id, action: Optional[str] = None) -> int:
+    """Approximate number of a tenant's entries (of one action), without counting rows."""
+    if settings.is_sqlite:
+        query = select(func.sum(StatsRollup.value)).where(
+            StatsRollup.tenant_id == tenant_id,
+            StatsRollup.event_id == TENANT_WIDE,
+            StatsRollup.metric == "audit_logs",
+        )
+        if action:
+            query = query.where(StatsRollup.dimension == action)
+        return int((await db.execute(query)).scalar() or 0)
+
+    # The planner's row estimate for the filter, from ANALYZE statistics
+    sql = "EXPLAIN (FORMAT JSON) SELECT 1 FROM audit_logs WHERE tenant_id = :tenant_id"
+    params = {"tenant_id": tenant_id}
+    if action:
+        sql += " AND action = :action"
+        params["action"] = action
+    plan = (await db.execute(text(sql), params)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def exact_count(db: AsyncSession, tenant_id, action: Optional[str] = None) -> int:
+    query = select(func.count()).select_from(AuditLog).where(AuditLog.tenant_id == tenant_id)
+    if action:
+        query = query.where(AuditLog.action == action)
+    return (await db.execute(query)).scalar() or 0
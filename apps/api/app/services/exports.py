@@ -0,0 +1,358 @@
+"""
+CEAP — Tabular Exports
+One row stream per export, read from a server-side cursor in batches of
+EXPORT_BATCH_ROWS, encoded incrementally as:
+  csv      — a chunk per batch; the first bytes leave immediately
+  xlsx     — openpyxl write-only workbook (rows spill to temp files), then
+             the finished file streamed from disk
+  parquet  — record batches collected into row groups of
+             PARQUET_ROW_GROUP_ROWS, via pyarrow (optional)
+Memory stays bounded by a batch (a row group for Parquet) whatever the
+export size. The tables themselves (columns, query, row mapping) are
+defined here too, shared by the export endpoints and report jobs.
+"""
+import asyncio
+import csv
+import io
+import tempfile
+from datetime import datetime
+from typing import AsyncIterator, Callable, NamedTuple, Optional
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, desc
+from sqlalchemy.sql import Select
+
+from app.database import async_session
+from app.models.event import Event, Registration
+from app.models.leaderboard import LeaderboardEntry
+from app.models.mcq import MCQAttempt
+from app.models.problem import Problem, Submission, SubmissionResult, TestCase
+from app.models.tenant import User
+
+EXPORT_BATCH_ROWS = 1000
+FILE_CHUNK_BYTES = 64 * 1024
+PARQUET_ROW_GROUP_ROWS = 50000
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Column kinds → Parquet types; CSV and XLSX take the Python values as they are
+_ARROW_TYPES = {
+    "int": lambda pa: pa.int64(),
+    "float": lambda pa: pa.float64(),
+    "str": lambda pa: pa.string(),
+    "datetime": lambda pa: pa.timestamp("us"),
+}
+
+
+async def stream_rows(query, to_row: Callable) -> AsyncIterator[list[list]]:
+    """
+    Batches of export rows: `to_row(index, row)` applied to the query's rows,
+    read with yield_per on a session of its own (the request's session is
+    closed before a streamed body is sent).
+    """
+    async with async_session() as db:
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_ROWS))
+        index = 0
+        async for rows in result.partitions():
+            batch = []
+            for row in rows:
+                index += 1
+                batch.append(to_row(index, row))
+            yield batch
+
+
+def _csv_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def encode_csv(columns: list[tuple[str, str]], batches) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in columns])
+    yield buffer.getvalue()
+    async for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_value(v) for v in row] for row in batch)
+        yield buffer.getvalue()
+
+
+async def encode_xlsx(columns: list[tuple[str, str]], batches, sheet_title: str) -> AsyncIterator[bytes]:
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_title[:31])
+    ws.append([name for name, _ in columns])
+
+    def append_all(batch):
+        for row in batch:
+            ws.append(row)
+
+    with tempfile.TemporaryFile() as out:
+        # openpyxl is CPU-bound; keep the event loop free while it works
+        async for batch in batches:
+            await asyncio.to_thread(append_all, batch)
+        await asyncio.to_thread(wb.save, out)
+        out.seek(0)
+        while chunk := await asyncio.to_thread(out.read, FILE_CHUNK_BYTES):
+            yield chunk
+
+
+def require_pyarrow():
+    """Import pyarrow for Parquet exports, or fail the request before streaming starts."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise HTTPException(
+            status_code=400,
+            detail="Parquet export requires pyarrow on the server. Use CSV or XLSX instead.",
+        )
+    return pyarrow
+
+
+class _ChunkSink:
+    """Write-only file object for ParquetWriter that hands out what was written so far."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def encode_parquet(columns: list[tuple[str, str]], batches) -> AsyncIterator[bytes]:
+    pa = require_pyarrow()
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(name, _ARROW_TYPES[kind](pa)) for name, kind in columns])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    pending, pending_rows = [], 0
+
+    async def write_row_group():
+        nonlocal pending, pending_rows
+        table = pa.Table.from_batches(pending, schema=schema)
+        pending, pending_rows = [], 0
+        await asyncio.to_thread(writer.write_table, table)
+
+    try:
+        # Cursor batches are small; row groups of PARQUET_ROW_GROUP_ROWS keep
+        # the file readable for columnar tools and its footer small
+        async for batch in batches:
+            if not batch:
+                continue
+            pending.append(pa.RecordBatch.from_arrays(
+                [pa.array([row[i] for row in batch], type=field.type) for i, field in enumerate(schema)],
+                schema=schema,
+            ))
+            pending_rows += len(batch)
+            if pending_rows >= PARQUET_ROW_GROUP_ROWS:
+                await write_row_group()
+                yield sink.drain()
+        if pending:
+            await write_row_group()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def encode(export_format: str, columns: list[tuple[str, str]], batches, title: str):
+    """The encoded byte/str stream of `batches` in the requested format."""
+    if export_format == "xlsx":
+        return encode_xlsx(columns, batches, title)
+    if export_format == "parquet":
+        return encode_parquet(columns, batches)
+    return encode_csv(columns, batches)
+
+
+def export_response(export_format: str, table: "Table", basename: str) -> StreamingResponse:
+    """Stream a table as a downloadable csv/xlsx/parquet file named basename.<format>."""
+    if export_format == "parquet":
+        require_pyarrow()
+    body = encode(export_format, table.columns, stream_rows(table.query, table.to_row), basename)
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f"attachment; filename={basename}.{export_format}"},
+    )
+
+
+# ── Tables ──────────────────────────────────────────────────
+
+class Table(NamedTuple):
+    columns: list[tuple[str, str]]  # (header, kind: int/float/str/datetime)
+    query: Select
+    to_row: Callable  # (1-based index, result row) → list of values
+
+
+def leaderboard_table(event_id) -> Table:
+    query = (
+        select(
+            User.full_name, User.email, User.roll_number,
+            LeaderboardEntry.total_score, LeaderboardEntry.problems_solved,
+        )
+        .join(User, User.id == LeaderboardEntry.user_id)
+        .where(LeaderboardEntry.event_id == event_id)
+        .order_by(desc(LeaderboardEntry.total_score))
+    )
+    return Table(
+        [
+            ("Rank", "int"), ("Name", "str"), ("Email", "str"), ("Roll Number", "str"),
+            ("Score", "float"), ("Problems Solved", "int"),
+        ],
+        query,
+        lambda i, r: [
+            i, r.full_name, r.email, r.roll_number or "",
+            float(r.total_score), r.problems_solved or 0,
+        ],
+    )
+
+
+def participants_table(event_id) -> Table:
+    query = (
+        select(
+            User.full_name, User.email, User.roll_number, User.department,
+            Registration.status, Registration.registered_at,
+        )
+        .join(User, User.id == Registration.user_id)
+        .where(Registration.event_id == event_id)
+        .order_by(Registration.registered_at)
+    )
+    return Table(
+        [
+            ("#", "int"), ("Name", "str"), ("Email", "str"), ("Roll Number", "str"),
+            ("Department", "str"), ("Status", "str"), ("Registered At", "datetime"),
+        ],
+        query,
+        lambda i, r: [
+            i, r.full_name, r.email, r.roll_number or "", r.department or "",
+            r.status, r.registered_at,
+        ],
+    )
+
+
+def mcq_results_table(event_id) -> Table:
+    query = (
+        select(
+            User.full_name, User.email, User.roll_number,
+            MCQAttempt.score, MCQAttempt.max_score,
+            MCQAttempt.correct, MCQAttempt.wrong, MCQAttempt.skipped,
+            MCQAttempt.started_at, MCQAttempt.submitted_at, MCQAttempt.status,
+        )
+        .join(User, User.id == MCQAttempt.user_id)
+        .where(MCQAttempt.event_id == event_id)
+        .order_by(desc(MCQAttempt.score))
+    )
+    return Table(
+        [
+            ("Rank", "int"), ("Name", "str"), ("Email", "str"), ("Roll Number", "str"),
+            ("Score", "float"), ("Max Score", "float"), ("Correct", "int"), ("Wrong", "int"),
+            ("Skipped", "int"), ("Started At", "datetime"), ("Submitted At", "datetime"),
+            ("Status", "str"),
+        ],
+        query,
+        lambda i, r: [
+            i, r.full_name, r.email, r.roll_number or "",
+            r.score, r.max_score,
+            r.correct, r.wrong, r.skipped,
+            r.started_at, r.submitted_at,
+            r.status,
+        ],
+    )
+
+
+def submissions_table(
+    tenant_id,
+    event_ids: Optional[list] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    test_cases: bool = False,
+) -> Table:
+    """
+    Every submission of the tenant's events (optionally some events and a
+    submitted_at range), one row per submission — or per submission and
+    test case with `test_cases`. Source code is not exported.
+    """
+    columns = [
+        ("Event", "str"), ("Problem", "str"), ("Name", "str"), ("Email", "str"),
+        ("Roll Number", "str"), ("Language", "str"), ("Status", "str"), ("Score", "float"),
+        ("Time (ms)", "int"), ("Memory (KB)", "int"), ("Submitted At", "datetime"),
+        ("Judged At", "datetime"),
+    ]
+    query = (
+        select(
+            Event.title.label("event_title"), Problem.title.label("problem_title"),
+            User.full_name, User.email, User.roll_number,
+            Submission.language, Submission.status, Submission.score,
+            Submission.execution_time, Submission.memory_used,
+            Submission.submitted_at, Submission.judged_at,
+        )
+        .join(Event, Event.id == Submission.event_id)
+        .join(Problem, Problem.id == Submission.problem_id)
+        .join(User, User.id == Submission.user_id)
+        .where(Event.tenant_id == tenant_id)
+    )
+    if event_ids:
+        query = query.where(Submission.event_id.in_(event_ids))
+    if date_from:
+        query = query.where(Submission.submitted_at >= date_from)
+    if date_to:
+        query = query.where(Submission.submitted_at < date_to)
+
+    def submission_values(r) -> list:
+        return [
+            r.event_title, r.problem_title, r.full_name, r.email, r.roll_number or "",
+            r.language, r.status, float(r.score or 0),
+            r.execution_time, r.memory_used, r.submitted_at, r.judged_at,
+        ]
+
+    if not test_cases:
+        query = query.order_by(Submission.submitted_at, Submission.id)
+        return Table(columns, query, lambda i, r: submission_values(r))
+
+    query = (
+        query.add_columns(
+            TestCase.order_index, SubmissionResult.status.label("test_status"),
+            SubmissionResult.passed, SubmissionResult.execution_time.label("test_time"),
+            SubmissionResult.memory_used.label("test_memory"),
+        )
+        .join(SubmissionResult, SubmissionResult.submission_id == Submission.id)
+        .outerjoin(TestCase, TestCase.id == SubmissionResult.test_case_id)
+        .order_by(Submission.submitted_at, Submission.id, TestCase.order_index)
+    )
+    return Table(
+        columns + [
+            ("Test #", "int"), ("Test Status", "str"), ("Test Passed", "int"),
+            ("Test Time (ms)", "int"), ("Test Memory (KB)", "int"),
+        ],
+        query,
+        lambda i, r: submission_values(r) + [
+            None if r.order_index is None else r.order_index + 1,
+            r.test_status, int(bool(r.passed)), r.test_time, r.test_memory,
+        ],
+    )
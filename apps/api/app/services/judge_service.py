@@ -6,8 +6,11 @@ Supports:
   3. Local subprocess      (demo — no external services needed)
 """
 import asyncio
+import functools
+import shutil
 import subprocess
 import tempfile
+import time
 import os
 import httpx
 from typing import Optional
@@ -33,6 +36,105 @@ LANGUAGE_NAMES = {
 # RapidAPI Judge0 host
 RAPIDAPI_HOST = "judge0-ce.p.rapidapi.com"
 
+# Host calibration: a fixed integer loop per language, sized to take roughly
+# CALIBRATION_REFERENCE_MS on the baseline host. The measured/reference ratio
+# becomes that language's host speed factor for the local backend.
+CALIBRATION_PROGRAMS = {
+    "python": (
+        "s = 0\n"
+        "for i in range(1000000):\n"
+        "    s = (s + i * i) % 1000003\n"
+        "print(s)\n"
+    ),
+    "javascript": (
+        "let s = 0;\n"
+        "for (let i = 0; i < 10000000; i++) { s = (s + i * i) % 1000003; }\n"
+        "console.log(s);\n"
+    ),
+    "c": (
+        "#include <stdio.h>\n"
+        "int main(void) {\n"
+        "    long long s = 0;\n"
+        "    for (long long i = 0; i < 50000000LL; i++) s = (s + i * i) % 1000003;\n"
+        "    printf(\"%lld\\n\", s);\n"
+        "    return 0;\n"
+        "}\n"
+    ),
+    "cpp": (
+        "#include <cstdio>\n"
+        "int main() {\n"
+        "    long long s = 0;\n"
+        "    for (long long i = 0; i < 50000000LL; i++) s = (s + i * i) % 1000003;\n"
+        "    std::printf(\"%lld\\n\", s);\n"
+        "    return 0;\n"
+        "}\n"
+    ),
+    "java": (
+        "public class Main {\n"
+        "    public static void main(String[] args) {\n"
+        "        long s = 0;\n"
+        "        for (long i = 0; i < 50000000L; i++) s = (s + i * i) % 1000003;\n"
+        "        System.out.println(s);\n"
+        "    }\n"
+        "}\n"
+    ),
+}
+CALIBRATION_REFERENCE_MS = {
+    "python": 220,
+    "javascript": 360,
+    "c": 250,
+    "cpp": 250,
+    "java": 350,
+}
+CALIBRATION_ROUNDS = 3
+# Keep a badly mis-measured host from making limits absurd in either direction
+HOST_FACTOR_MIN = 0.5
+HOST_FACTOR_MAX = 5.0
+
+# JVM flags for short-lived judge runs: C1-only tiered compilation, serial GC
+# and a small initial heap all cut startup for tiny test cases. The maximum
+# heap comes from the problem's memory limit (java_heap_flag).
+JAVA_RUN_FLAGS = [
+    "-XX:TieredStopAtLevel=1",
+    "-XX:+UseSerialGC",
+    "-Xms16m",
+    "-XX:-UsePerfData",
+]
+JAVA_MIN_HEAP_MB = 16  # never below -Xms
+DEFAULT_MEMORY_LIMIT_KB = 262144
+
+
+def java_heap_flag(memory_limit_kb: Optional[int]) -> str:
+    """-Xmx for a memory limit in KB, so the JVM fails where the limit would."""
+    return f"-Xmx{max((memory_limit_kb or DEFAULT_MEMORY_LIMIT_KB) // 1024, JAVA_MIN_HEAP_MB)}m"
+
+# Warm-up program used to record which JDK classes typical submissions load.
+# Its own class is filtered out so the archive only holds JDK base classes
+# and stays valid for any -cp.
+JAVA_WARMUP_CLASS = "CeapWarmup"
+JAVA_WARMUP_PROGRAM = """
+import java.io.*;
+import java.util.*;
+import java.util.stream.*;
+
+public class CeapWarmup {
+    public static void main(String[] args) throws IOException {
+        BufferedReader br = new BufferedReader(new InputStreamReader(System.in));
+        Scanner sc = new Scanner("1 2 3");
+        List<Integer> xs = new ArrayList<>();
+        while (sc.hasNextInt()) xs.add(sc.nextInt());
+        Map<String, Integer> m = new HashMap<>();
+        m.put("k", xs.stream().mapToInt(Integer::intValue).sum());
+        StringBuilder sb = new StringBuilder();
+        sb.append(String.format("%d %s", m.get("k"), Arrays.toString(new int[]{1, 2})));
+        PrintWriter out = new PrintWriter(new BufferedWriter(new OutputStreamWriter(System.out)));
+        out.println(sb.append(xs.stream().map(String::valueOf).collect(Collectors.joining(","))));
+        out.flush();
+    }
+}
+"""
+JAVA_CDS_DIR = os.path.join(tempfile.gettempdir(), "ceap-jvm-cds")
+
 
 class JudgeService:
     """Code execution client — auto-selects backend based on config."""
@@ -51,6 +153,15 @@ class JudgeService:
         elif self.api_key:
             self.headers["X-Auth-Token"] = self.api_key
 
+        # Time-limit scaling: static per-language multipliers from config,
+        # plus per-language host speed factors filled in by calibrate().
+        self.time_multipliers = settings.judge_time_multipliers
+        self.host_speed_factors: dict[str, float] = {}
+
+        # Class-data-sharing archive for Java runs, built by prepare_java()
+        self.java_cds_archive: Optional[str] = None
+        self.java_startup_ms: dict[str, int] = {}
+
     @property
     def mode(self) -> str:
         if self.use_local:
@@ -60,6 +171,101 @@ class JudgeService:
         else:
             return "self-hosted"
 
+    def effective_time_limit(self, language: str, time_limit_ms: int) -> float:
+        """
+        Scale a problem's time limit for a language on this host.
+        Returns seconds, ready to pass as `time_limit` to execute().
+        """
+        factor = self.time_multipliers.get(language, 1.0)
+        if self.use_local:
+            # Judge0 runs on its own hosts, so only local runs get host scaling
+            factor *= self.host_speed_factors.get(language, 1.0)
+        return round(time_limit_ms * factor / 1000.0, 3)
+
+    async def calibrate(self) -> dict[str, float]:
+        """
+        Measure the reference workload for each language on this host and
+        store measured/reference ratios in host_speed_factors.
+        Languages whose toolchain is missing keep a factor of 1.0.
+        """
+        factors = {}
+        for language, program in CALIBRATION_PROGRAMS.items():
+            timings = []
+            for _ in range(CALIBRATION_ROUNDS):
+                result = await self._execute_local(
+                    program, language, "", None, time_limit=30.0
+                )
+                if result["status"] != "accepted":
+                    break
+                timings.append(result["time"])
+            if len(timings) < CALIBRATION_ROUNDS:
+                continue
+            ratio = min(timings) / CALIBRATION_REFERENCE_MS[language]
+            factors[language] = round(min(max(ratio, HOST_FACTOR_MIN), HOST_FACTOR_MAX), 2)
+
+        self.host_speed_factors = factors
+        return factors
+
+    async def prepare_java(self) -> Optional[str]:
+        """
+        Build a CDS archive of the JDK classes a typical submission loads,
+        so every Java run maps them instead of parsing them again.
+        Records warm-up startup time in java_startup_ms: "before" with the
+        JVM's own sharing defaults (its stock CDS archive), "after" with ours.
+        Returns the archive path, or None if Java is unavailable.
+        """
+        if not shutil.which("java") or not shutil.which("javac"):
+            return None
+
+        os.makedirs(JAVA_CDS_DIR, exist_ok=True)
+        src = os.path.join(JAVA_CDS_DIR, f"{JAVA_WARMUP_CLASS}.java")
+        class_list = os.path.join(JAVA_CDS_DIR, "classes.lst")
+        archive = os.path.join(JAVA_CDS_DIR, "ceap-base.jsa")
+        with open(src, "w") as f:
+            f.write(JAVA_WARMUP_PROGRAM)
+
+        async def run(*cmd):
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=JAVA_CDS_DIR,
+            )
+            _, err = await proc.communicate()
+            if proc.returncode != 0:
+                raise RuntimeError(f"{cmd[0]} failed: {err.decode(errors='replace')[:500]}")
+
+        async def startup_ms(*share_flags) -> int:
+            timings = []
+            for _ in range(CALIBRATION_ROUNDS):
+                start = time.monotonic()
+                await run("java", *JAVA_RUN_FLAGS, *share_flags, "-cp", JAVA_CDS_DIR, JAVA_WARMUP_CLASS)
+                timings.append(int((time.monotonic() - start) * 1000))
+            return min(timings)
+
+        await run("javac", src)
+        await run(
+            "java", *JAVA_RUN_FLAGS, f"-XX:DumpLoadedClassList={class_list}",
+            "-cp", JAVA_CDS_DIR, JAVA_WARMUP_CLASS,
+        )
+        with open(class_list) as f:
+            lines = [line for line in f if JAVA_WARMUP_CLASS not in line]
+        with open(class_list, "w") as f:
+            f.writelines(lines)
+        await run(
+            "java", *JAVA_RUN_FLAGS, "-Xshare:dump",
+            f"-XX:SharedClassListFile={class_list}",
+            f"-XX:SharedArchiveFile={archive}",
+        )
+
+        self.java_startup_ms = {
+            "before": await startup_ms(),
+            "after": await startup_ms("-Xshare:auto", f"-XX:SharedArchiveFile={archive}"),
+        }
+        self.java_cds_archive = archive
+        return archive
+
     # ── Main API — used by submissions.py ───────────────────
 
     async def execute(
@@ -69,7 +275,7 @@ class JudgeService:
         stdin: str = "",
         expected_output: Optional[str] = None,
         time_limit: float = 2.0,
-        memory_limit: int = 262144,
+        memory_limit: int = DEFAULT_MEMORY_LIMIT_KB,
     ) -> dict:
         """
         Execute code and return result.
@@ -78,7 +284,7 @@ class JudgeService:
         """
         if self.use_local:
             return await self._execute_local(
-                source_code, language, stdin, expected_output, time_limit
+                source_code, language, stdin, expected_output, time_limit, memory_limit
             )
         else:
             return await self._execute_judge0(
@@ -153,7 +359,7 @@ class JudgeService:
         except httpx.ConnectError:
             if self.use_local:
                 return await self._execute_local(
-                    source_code, language, stdin, expected_output, time_limit
+                    source_code, language, stdin, expected_output, time_limit, memory_limit
                 )
             return self._error_result(
                 "Cannot connect to Judge0. Set JUDGE0_API_KEY for RapidAPI "
@@ -197,14 +403,15 @@ class JudgeService:
         stdin: str,
         expected_output: Optional[str],
         time_limit: float,
+        memory_limit: int = DEFAULT_MEMORY_LIMIT_KB,
     ) -> dict:
-        """Execute code locally using subprocess. Supports Python, JS, C, C++."""
+        """Execute code locally using subprocess. Supports Python, JS, C, C++, Java."""
         runners = {
             "python": self._run_python,
             "javascript": self._run_javascript,
             "c": self._run_c,
             "cpp": self._run_cpp,
-            "java": self._run_java,
+            "java": functools.partial(self._run_java, memory_limit=memory_limit),
         }
         runner = runners.get(language)
         if not runner:
@@ -238,7 +445,7 @@ class JudgeService:
             code, ".cpp", ["g++", "-o"], stdin, expected, timeout
         )
 
-    async def _run_java(self, code, stdin, expected, timeout):
+    async def _run_java(self, code, stdin, expected, timeout, memory_limit=DEFAULT_MEMORY_LIMIT_KB):
         with tempfile.TemporaryDirectory() as tmpdir:
             # Extract class name (look for "public class X")
             import re
@@ -247,9 +454,9 @@ class JudgeService:
             src = os.path.join(tmpdir, f"{class_name}.java")
             with open(src, "w") as f:
                 f.write(code)
-            # Compile
+            # Compile (javac is a short-lived JVM too)
             proc = await asyncio.create_subprocess_exec(
-                "javac", src,
+                "javac", *(f"-J{flag}" for flag in JAVA_RUN_FLAGS), f"-J{java_heap_flag(None)}", src,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
                 cwd=tmpdir,
@@ -264,8 +471,11 @@ class JudgeService:
                     "compile_output": cerr.decode(errors="replace"),
                     "time": 0, "memory": 0, "passed": False,
                 }
+            share_flags = []
+            if self.java_cds_archive:
+                share_flags = ["-Xshare:auto", f"-XX:SharedArchiveFile={self.java_cds_archive}"]
             return await self._run_subprocess(
-                ["java", "-cp", tmpdir, class_name],
+                ["java", *JAVA_RUN_FLAGS, java_heap_flag(memory_limit), *share_flags, "-cp", tmpdir, class_name],
                 stdin, expected, timeout,
             )
 
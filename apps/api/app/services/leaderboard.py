@@ -0,0 +1,673 @@
+"""
+CEAP — Leaderboard Rank Index
+In-memory, per-event order-statistic index over leaderboard entries.
+Answers "rank of X" and "page k" in O(log n) without scanning the table.
+Rebuilt from the DB on startup (ongoing events) or first use (others),
+updated on every verdict, and flushed to leaderboard_entries.rank in bulk.
+Also builds leaderboard pages and live-stream snapshots/deltas from it.
+
+Stores (LEADERBOARD_STORE) share one interface — get() → RankingView,
+record(), remove(), warm(), flush():
+  memory — this module; per process
+  redis  — app.services.leaderboard_redis; sorted sets shared by all workers
+"""
+import asyncio
+import base64
+import json
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Optional
+from uuid import UUID
+
+from sortedcontainers import SortedList
+from sqlalchemy import select, update, delete, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session
+from app.models.event import Event, Team, TeamMember
+from app.models.leaderboard import LeaderboardEntry, LeaderboardProblemScore
+from app.models.problem import Submission
+from app.models.tenant import User
+from app.services.leaderboard_cache import leaderboard_cache
+from app.services.leaderboard_stream import leaderboard_stream
+
+SCORING_MODES = ("ioi", "icpc")
+DEFAULT_PENALTY_MINUTES = 20
+
+# Entries without a submission sort after everyone they tie with
+_NEVER = datetime.max
+
+
+def scoring_mode(event: Event) -> str:
+    """Return the event's judging mode, falling back to IOI."""
+    mode = (event.scoring_formula or {}).get("mode", "ioi")
+    return mode if mode in SCORING_MODES else "ioi"
+
+
+class ScoringRules:
+    """
+    How one verdict moves a participant's per-problem state and entry totals.
+      ioi  — best score per problem counts; solved means a best score of 100
+      icpc — a problem counts once, at its first accepted verdict: minutes
+             from event start go to total_time, and every earlier rejected
+             attempt (compile errors excepted) adds penalty_minutes to penalty
+    Per-problem state is anything with best_score, attempts and first_ac_at
+    (LeaderboardProblemScore on the live path).
+    """
+
+    def __init__(self, mode: str = "ioi", penalty_minutes: int = DEFAULT_PENALTY_MINUTES,
+                 event_start: Optional[datetime] = None):
+        self.mode = mode
+        self.penalty_minutes = penalty_minutes
+        self.event_start = event_start
+
+    @classmethod
+    def from_event(cls, event: Event) -> "ScoringRules":
+        formula = event.scoring_formula or {}
+        return cls(
+            mode=scoring_mode(event),
+            penalty_minutes=int(formula.get("penalty_minutes", DEFAULT_PENALTY_MINUTES)),
+            event_start=event.event_start,
+        )
+
+    def apply(self, state, status: str, score, submitted_at: datetime) -> Optional[dict]:
+        """Update `state` in place; return the entry totals delta, or None if unchanged."""
+        old_score = float(state.best_score or 0)
+        new_score = float(score or 0)
+
+        if self.mode == "icpc":
+            if state.first_ac_at is not None:
+                return None
+            if status != "accepted":
+                if status != "compile_error":
+                    state.attempts = (state.attempts or 0) + 1
+                return None
+            state.best_score = 100
+            state.first_ac_at = submitted_at
+            return {
+                "score": 100 - old_score,
+                "solved": 1,
+                "time": self._minutes(submitted_at),
+                "penalty": (state.attempts or 0) * self.penalty_minutes,
+            }
+
+        if new_score <= old_score:
+            return None
+        state.best_score = new_score
+        return {
+            "score": new_score - old_score,
+            "solved": 1 if new_score >= 100 > old_score else 0,
+            "time": 0,
+            "penalty": 0,
+        }
+
+    def contribution(self, state) -> dict:
+        """What `state` adds to the entry totals: the sum of apply()'s deltas that built it."""
+        if self.mode == "icpc":
+            if state.first_ac_at is None:
+                return {"score": 0, "solved": 0, "time": 0, "penalty": 0}
+            return {
+                "score": 100,
+                "solved": 1,
+                "time": self._minutes(state.first_ac_at),
+                "penalty": (state.attempts or 0) * self.penalty_minutes,
+            }
+        best = float(state.best_score or 0)
+        return {"score": best, "solved": 1 if best >= 100 else 0, "time": 0, "penalty": 0}
+
+    def _minutes(self, submitted_at: datetime) -> int:
+        if self.event_start and submitted_at > self.event_start:
+            return int((submitted_at - self.event_start).total_seconds() // 60)
+        return 0
+
+
+def sort_key(entry_id, total_score, problems_solved, last_submission, total_time=0, penalty=0) -> tuple:
+    """
+    Leaderboard order: score desc, solved desc, time plus penalty asc (ICPC;
+    always 0 under IOI), last submission asc, then id.
+    """
+    return (
+        -float(total_score or 0),
+        -(problems_solved or 0),
+        (total_time or 0) + (penalty or 0),
+        last_submission or _NEVER,
+        UUID(str(entry_id)),
+    )
+
+
+class EventRanking:
+    """Sorted leaderboard for one event. Rank is the 1-based position."""
+
+    def __init__(self):
+        self._sorted = SortedList()
+        self._keys: dict[UUID, tuple] = {}
+        self._flushed: dict[UUID, int] = {}  # rank last written to the DB
+        self._participants: dict[UUID, UUID] = {}  # user or team ID → ranked ID
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def upsert(self, entry_id, total_score, problems_solved, last_submission,
+               total_time=0, penalty=0) -> tuple[Optional[int], int]:
+        """Insert or move an entry. Returns (old_rank, new_rank); old_rank is None if new."""
+        key = sort_key(entry_id, total_score, problems_solved, last_submission, total_time, penalty)
+        entry_id = key[-1]
+        old = self._keys.get(entry_id)
+        if old == key:
+            rank = self._sorted.index(key) + 1
+            return rank, rank
+        old_rank = None
+        if old is not None:
+            old_rank = self._sorted.index(old) + 1
+            self._sorted.remove(old)
+        self._sorted.add(key)
+        self._keys[entry_id] = key
+        self.dirty = True
+        return old_rank, self._sorted.index(key) + 1
+
+    def remove(self, entry_id, participant_id):
+        """Drop an entry that left the board (a member's solo entry merged into their team)."""
+        entry_id = UUID(str(entry_id))
+        key = self._keys.pop(entry_id, None)
+        if key is not None:
+            self._sorted.remove(key)
+            self.dirty = True
+        self._flushed.pop(entry_id, None)
+        if self._participants.get(UUID(str(participant_id))) == entry_id:
+            del self._participants[UUID(str(participant_id))]
+
+    def rank_of(self, entry_id) -> Optional[int]:
+        key = self._keys.get(UUID(str(entry_id)))
+        return None if key is None else self._sorted.index(key) + 1
+
+    def page(self, offset: int, limit: int) -> list[UUID]:
+        """Entry IDs for ranks offset+1 … offset+limit."""
+        return [key[-1] for key in self._sorted.islice(offset, offset + limit)]
+
+    def key_at(self, index: int) -> tuple:
+        return self._sorted[index]
+
+    def index_after(self, key: tuple) -> int:
+        """Number of entries that sort at or before `key` (the offset of the next page)."""
+        return self._sorted.bisect_right(key)
+
+    def set_participant(self, participant_id, ranked_id):
+        self._participants[UUID(str(participant_id))] = UUID(str(ranked_id))
+
+    def ranked_id_for(self, participant_id) -> Optional[UUID]:
+        """Ranked ID of a user or team; rankings keyed by participant map to themselves."""
+        participant_id = UUID(str(participant_id))
+        ranked_id = self._participants.get(participant_id)
+        if ranked_id is None and participant_id in self._keys:
+            ranked_id = participant_id
+        return ranked_id
+
+    def changed_ranks(self) -> list[dict]:
+        """Entries whose rank moved since the last flush, as bulk-update params."""
+        changes = []
+        for index, key in enumerate(self._sorted):
+            if self._flushed.get(key[-1]) != index + 1:
+                changes.append({"id": key[-1], "rank": index + 1})
+        return changes
+
+    def mark_flushed(self, changes: list[dict]):
+        for change in changes:
+            self._flushed[change["id"]] = change["rank"]
+
+
+class RankingView:
+    """
+    Async read interface to one event's ranking. Every store hands these out
+    (the Redis store its own implementation), so callers never depend on
+    where ranks live.
+    """
+
+    def __init__(self, ranking: EventRanking):
+        self.ranking = ranking
+
+    async def count(self) -> int:
+        return len(self.ranking)
+
+    async def page(self, offset: int, limit: int) -> list[UUID]:
+        return self.ranking.page(offset, limit)
+
+    async def rank_of(self, ranked_id) -> Optional[int]:
+        return self.ranking.rank_of(ranked_id)
+
+    async def ranks(self) -> dict[UUID, int]:
+        """Rank of every entry."""
+        return {ranked_id: i + 1 for i, ranked_id in enumerate(self.ranking.page(0, len(self.ranking)))}
+
+    async def key_at(self, index: int) -> tuple:
+        return self.ranking.key_at(index)
+
+    async def index_after(self, key: tuple) -> int:
+        return self.ranking.index_after(key)
+
+    async def ranked_id_for(self, participant_id) -> Optional[UUID]:
+        return self.ranking.ranked_id_for(participant_id)
+
+
+class MemoryLeaderboardStore:
+    """Per-process registry of EventRanking objects, keyed by event ID."""
+
+    def __init__(self):
+        self._events: dict[UUID, EventRanking] = {}
+
+    async def get(self, db: AsyncSession, event_id) -> RankingView:
+        """Return the event's ranking, loading it from the DB on first use."""
+        event_id = UUID(str(event_id))
+        ranking = self._events.get(event_id)
+        if ranking is None:
+            ranking = await self._load(db, event_id)
+        return RankingView(ranking)
+
+    async def _load(self, db: AsyncSession, event_id: UUID) -> EventRanking:
+        rows = (await db.execute(
+            select(
+                LeaderboardEntry.id,
+                LeaderboardEntry.user_id,
+                LeaderboardEntry.team_id,
+                LeaderboardEntry.total_score,
+                LeaderboardEntry.problems_solved,
+                LeaderboardEntry.last_submission,
+                LeaderboardEntry.total_time,
+                LeaderboardEntry.penalty,
+                LeaderboardEntry.rank,
+            ).where(LeaderboardEntry.event_id == event_id)
+        )).all()
+
+        ranking = EventRanking()
+        for row in rows:
+            ranking.upsert(
+                row.id, row.total_score, row.problems_solved, row.last_submission,
+                row.total_time, row.penalty,
+            )
+            ranking.set_participant(row.team_id or row.user_id, row.id)
+            if row.rank is not None:
+                ranking._flushed[row.id] = row.rank
+        self._events[event_id] = ranking
+        return ranking
+
+    async def record(self, entry: LeaderboardEntry) -> Optional[tuple[Optional[int], int]]:
+        """
+        Apply a committed entry change and return (old_rank, new_rank).
+        Events that are not loaded yet are skipped (None) — they are read
+        fresh from the DB on first use.
+        """
+        ranking = self._events.get(UUID(str(entry.event_id)))
+        if ranking is None:
+            return None
+        ranking.set_participant(entry.team_id or entry.user_id, entry.id)
+        return ranking.upsert(
+            entry.id, entry.total_score, entry.problems_solved, entry.last_submission,
+            entry.total_time, entry.penalty,
+        )
+
+    async def remove(self, event_id, entry_id, participant_id):
+        """Drop a committed entry deletion; events that are not loaded yet are skipped."""
+        ranking = self._events.get(UUID(str(event_id)))
+        if ranking is not None:
+            ranking.remove(entry_id, participant_id)
+
+    async def warm(self):
+        """Load rankings for all ongoing events (startup)."""
+        async with async_session() as db:
+            event_ids = (await db.execute(
+                select(Event.id).where(Event.status == "ongoing")
+            )).scalars().all()
+            for event_id in event_ids:
+                await self._load(db, event_id)
+        return len(event_ids)
+
+    async def flush(self) -> int:
+        """Write changed ranks of dirty events to leaderboard_entries.rank."""
+        written = 0
+        async with async_session() as db:
+            for ranking in list(self._events.values()):
+                if not ranking.dirty:
+                    continue
+                ranking.dirty = False
+                changes = ranking.changed_ranks()
+                if not changes:
+                    continue
+                try:
+                    await db.execute(update(LeaderboardEntry), changes)
+                    await db.commit()
+                except Exception:
+                    ranking.dirty = True
+                    raise
+                ranking.mark_flushed(changes)
+                written += len(changes)
+        return written
+
+
+def _create_store():
+    if settings.LEADERBOARD_STORE == "redis":
+        from app.services.leaderboard_redis import RedisLeaderboardStore
+
+        return RedisLeaderboardStore.from_url(settings.REDIS_URL)
+    return MemoryLeaderboardStore()
+
+
+leaderboard_index = _create_store()
+
+
+def encode_cursor(key: tuple) -> str:
+    """Opaque keyset cursor: the sort key of the last entry already seen."""
+    score, solved, time_total, last_submission, ranked_id = key
+    raw = [
+        score + 0.0, solved, time_total,  # + 0.0 folds -0.0 into 0.0
+        None if last_submission == _NEVER else last_submission.isoformat(),
+        str(ranked_id),
+    ]
+    return base64.urlsafe_b64encode(json.dumps(raw, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Inverse of encode_cursor. Raises ValueError on a malformed cursor."""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        score, solved, time_total, last_submission, ranked_id = raw
+        return (
+            float(score),
+            int(solved),
+            int(time_total),
+            datetime.fromisoformat(last_submission) if last_submission else _NEVER,
+            UUID(ranked_id),
+        )
+    except (TypeError, ValueError) as e:  # JSONDecodeError and binascii.Error are ValueErrors
+        raise ValueError("Invalid leaderboard cursor") from e
+
+
+async def find_ranked_id(db: AsyncSession, ranking: RankingView, event_id, user_id) -> Optional[UUID]:
+    """The caller's place on the board: their own entry, else their team's."""
+    ranked_id = await ranking.ranked_id_for(user_id)
+    if ranked_id is not None:
+        return ranked_id
+    team_ids = (await db.execute(
+        select(TeamMember.team_id)
+        .join(Team, Team.id == TeamMember.team_id)
+        .where(Team.event_id == event_id, TeamMember.user_id == user_id)
+    )).scalars().all()
+    for team_id in team_ids:
+        ranked_id = await ranking.ranked_id_for(team_id)
+        if ranked_id is not None:
+            return ranked_id
+    return None
+
+
+def _entry_payload(row, rank: int) -> dict:
+    return {
+        "rank": rank,
+        "entry_id": str(row.id),
+        "user_id": str(row.user_id) if row.user_id else None,
+        "team_id": str(row.team_id) if row.team_id else None,
+        "user_name": row.user_name,
+        "team_name": row.team_name,
+        "total_score": float(row.total_score or 0),
+        "problems_solved": row.problems_solved or 0,
+        "total_time": row.total_time or 0,
+        "penalty": row.penalty or 0,
+        "last_submission": row.last_submission.isoformat() if row.last_submission else None,
+    }
+
+
+async def _load_entry_rows(db: AsyncSession, entry_ids: list) -> dict:
+    """
+    Entry columns plus display names in one query — loading User/Team
+    entities would also pull their selectin relationships.
+    """
+    if not entry_ids:
+        return {}
+    rows = (await db.execute(
+        select(
+            LeaderboardEntry.id,
+            LeaderboardEntry.user_id,
+            LeaderboardEntry.team_id,
+            LeaderboardEntry.total_score,
+            LeaderboardEntry.problems_solved,
+            LeaderboardEntry.total_time,
+            LeaderboardEntry.penalty,
+            LeaderboardEntry.last_submission,
+            User.full_name.label("user_name"),
+            Team.name.label("team_name"),
+        )
+        .outerjoin(User, User.id == LeaderboardEntry.user_id)
+        .outerjoin(Team, Team.id == LeaderboardEntry.team_id)
+        .where(LeaderboardEntry.id.in_(entry_ids))
+    )).all()
+    return {row.id: row for row in rows}
+
+
+async def build_leaderboard_page(db: AsyncSession, ranking: RankingView, offset: int, limit: int) -> dict:
+    """One JSON-ready leaderboard page; ranks and page boundaries come from the index."""
+    entry_ids = await ranking.page(offset, limit)
+    total = await ranking.count()
+    rows_by_id = await _load_entry_rows(db, entry_ids)
+
+    entries = []
+    for i, entry_id in enumerate(entry_ids):
+        row = rows_by_id.get(entry_id)
+        if row is not None:
+            entries.append(_entry_payload(row, offset + i + 1))
+
+    return {
+        "entries": entries,
+        "total": total,
+        "updated_at": datetime.utcnow().isoformat(),
+    }
+
+
+async def build_leaderboard_snapshot(event_id) -> tuple[int, dict]:
+    """Full board for the live stream, with the stream seq it reflects."""
+    async with async_session() as db:
+        ranking = await leaderboard_index.get(db, event_id)
+        # Read seq and page IDs together, before the next await
+        seq = leaderboard_stream.seq(event_id)
+        return seq, await build_leaderboard_page(db, ranking, 0, await ranking.count())
+
+
+async def publish_change(entry: LeaderboardEntry):
+    """
+    Propagate a committed leaderboard change: update the rank index, bump
+    the event's cache version and push a delta to live subscribers. Call
+    only after the transaction commits, so readers never cache pre-commit
+    state under the new version.
+    """
+    ranks = await leaderboard_index.record(entry)
+    await leaderboard_cache.bump(entry.event_id)
+    if ranks is None:
+        return
+
+    old_rank, rank = ranks
+    payload = {
+        "rank": rank,
+        "entry_id": str(entry.id),
+        "user_id": str(entry.user_id) if entry.user_id else None,
+        "team_id": str(entry.team_id) if entry.team_id else None,
+        "total_score": float(entry.total_score or 0),
+        "problems_solved": entry.problems_solved or 0,
+        "total_time": entry.total_time or 0,
+        "penalty": entry.penalty or 0,
+        "last_submission": entry.last_submission.isoformat() if entry.last_submission else None,
+    }
+    if old_rank is None and leaderboard_stream.has_subscribers(entry.event_id):
+        # Subscribers know existing entries' names from the snapshot; new ones need them
+        async with async_session() as db:
+            row = (await _load_entry_rows(db, [entry.id])).get(entry.id)
+        if row is not None:
+            payload = _entry_payload(row, rank)
+    leaderboard_stream.publish(entry.event_id, "delta", {"entry": payload, "old_rank": old_rank, "rank": rank})
+
+
+async def merge_into_team(
+    db: AsyncSession, event: Event, user_id, team_id,
+) -> Optional[tuple[LeaderboardEntry, LeaderboardEntry]]:
+    """
+    Fold a member's solo standing into their team's when they create or join
+    a team: their earlier submissions in the event are linked to the team,
+    the team's state for the problems they had attempted is rebuilt from all
+    the team's verdicts with the event's ScoringRules, the team totals move
+    by the difference, and the solo entry is deleted. Runs in the caller's
+    transaction. Returns (team entry, deleted solo entry), or None when the
+    member had no solo entry.
+    """
+    await db.execute(
+        update(Submission)
+        .where(Submission.event_id == event.id, Submission.user_id == user_id, Submission.team_id.is_(None))
+        .values(team_id=team_id)
+    )
+    solo = (await db.execute(
+        select(LeaderboardEntry).where(
+            LeaderboardEntry.event_id == event.id,
+            LeaderboardEntry.user_id == user_id,
+            LeaderboardEntry.team_id.is_(None),
+        )
+    )).scalar_one_or_none()
+    if solo is None:
+        return None
+
+    team = (await db.execute(
+        select(LeaderboardEntry).where(LeaderboardEntry.event_id == event.id, LeaderboardEntry.team_id == team_id)
+    )).scalar_one_or_none()
+    if team is None:
+        team = LeaderboardEntry(
+            event_id=event.id, team_id=team_id, total_score=0, problems_solved=0, total_time=0, penalty=0,
+            last_submission=solo.last_submission,
+        )
+        db.add(team)
+        await db.flush()
+
+    problem_ids = (await db.execute(
+        select(LeaderboardProblemScore.problem_id).where(LeaderboardProblemScore.entry_id == solo.id)
+    )).scalars().all()
+    old_states = {
+        row.problem_id: row
+        for row in (await db.execute(
+            select(LeaderboardProblemScore).where(
+                LeaderboardProblemScore.entry_id == team.id,
+                LeaderboardProblemScore.problem_id.in_(problem_ids),
+            )
+        )).scalars()
+    }
+
+    # Replay the team's verdicts on those problems, the member's now included
+    rules = ScoringRules.from_event(event)
+    states = {pid: SimpleNamespace(best_score=0, attempts=0, first_ac_at=None) for pid in problem_ids}
+    last_change = None
+    verdicts = await db.execute(
+        select(Submission.problem_id, Submission.status, Submission.score, Submission.submitted_at)
+        .where(
+            Submission.event_id == event.id,
+            Submission.team_id == team_id,
+            Submission.problem_id.in_(problem_ids),
+            Submission.judged_at.isnot(None),
+        )
+        .order_by(Submission.submitted_at, Submission.id)
+    )
+    for problem_id, status, score, submitted_at in verdicts:
+        if rules.apply(states[problem_id], status, score, submitted_at):
+            last_change = submitted_at
+
+    delta = {"score": 0.0, "solved": 0, "time": 0, "penalty": 0}
+    blank = SimpleNamespace(best_score=0, attempts=0, first_ac_at=None)
+    for problem_id, state in states.items():
+        new, old = rules.contribution(state), rules.contribution(old_states.get(problem_id, blank))
+        for field in delta:
+            delta[field] += new[field] - old[field]
+
+    await db.execute(delete(LeaderboardProblemScore).where(
+        LeaderboardProblemScore.entry_id.in_((team.id, solo.id)),
+        LeaderboardProblemScore.problem_id.in_(problem_ids),
+    ))
+    if states:
+        await db.execute(insert(LeaderboardProblemScore), [
+            {
+                "entry_id": team.id, "problem_id": problem_id, "best_score": state.best_score,
+                "attempts": state.attempts, "first_ac_at": state.first_ac_at,
+            }
+            for problem_id, state in states.items()
+        ])
+    await db.execute(delete(LeaderboardEntry).where(LeaderboardEntry.id == solo.id))
+
+    values = {}
+    if any(delta.values()):
+        # Increments in SQL, like update_leaderboard, so concurrent verdicts of the team all count
+        values.update(
+            total_score=LeaderboardEntry.total_score + delta["score"],
+            problems_solved=LeaderboardEntry.problems_solved + delta["solved"],
+            total_time=LeaderboardEntry.total_time + delta["time"],
+            penalty=LeaderboardEntry.penalty + delta["penalty"],
+        )
+        if last_change and (team.last_submission is None or last_change > team.last_submission):
+            values["last_submission"] = last_change
+    if values:
+        team = (await db.execute(
+            update(LeaderboardEntry).where(LeaderboardEntry.id == team.id).values(**values)
+            .returning(LeaderboardEntry),
+            execution_options={"synchronize_session": False, "populate_existing": True},
+        )).scalar_one()
+    return team, solo
+
+
+async def publish_merge(team: LeaderboardEntry, solo: LeaderboardEntry):
+    """publish_change for merge_into_team, after the commit: drop the solo entry, move the team's."""
+    await leaderboard_index.remove(solo.event_id, solo.id, solo.user_id)
+    await publish_change(team)
+
+
+async def run_rank_flusher():
+    """Flush in-memory ranks to the DB every LEADERBOARD_RANK_FLUSH_SECONDS."""
+    while True:
+        await asyncio.sleep(settings.LEADERBOARD_RANK_FLUSH_SECONDS)
+        try:
+            await leaderboard_index.flush()
+        except Exception as e:
+            print(f"⚠️ Rank flush error (non-fatal): {e}")
+
+
+async def ensure_problem_scores() -> Optional[int]:
+    """
+    Fill leaderboard_problem_scores on startup when it is empty but boards
+    already have entries (a database that predates the table, set up by
+    init_db() rather than the phase3_004/006 migrations). Without it every
+    participant's next verdict would be scored against a blank state. Entry
+    totals are left alone. Returns the number of rows written, or None.
+    """
+    async with async_session() as db:
+        has_rows = (await db.execute(select(LeaderboardProblemScore.entry_id).limit(1))).first()
+        has_entries = (await db.execute(select(LeaderboardEntry.id).limit(1))).first()
+        if has_rows or not has_entries:
+            return None
+
+        # Per participant and problem, as ScoringRules leaves it: the best
+        # score (ICPC scores are 0 or 100), the first AC, and the rejected
+        # attempts before it (compile errors excepted)
+        participant = """
+            s.event_id = e.event_id AND (
+                (e.team_id IS NOT NULL AND s.team_id = e.team_id)
+                OR (e.team_id IS NULL AND s.user_id = e.user_id)
+            ) AND s.status NOT IN ('pending', 'queued', 'running')
+        """
+        written = await db.execute(text(f"""
+            INSERT INTO leaderboard_problem_scores (entry_id, problem_id, best_score, attempts, first_ac_at, updated_at)
+            SELECT e.id, s.problem_id, MAX(s.score), 0,
+                   MIN(CASE WHEN s.status = 'accepted' THEN s.submitted_at END), MAX(s.submitted_at)
+            FROM leaderboard_entries e JOIN submissions s ON {participant}
+            GROUP BY e.id, s.problem_id
+        """))
+        await db.execute(text(f"""
+            UPDATE leaderboard_problem_scores SET attempts = (
+                SELECT COUNT(*) FROM leaderboard_entries e JOIN submissions s ON {participant}
+                WHERE e.id = leaderboard_problem_scores.entry_id
+                  AND s.problem_id = leaderboard_problem_scores.problem_id
+                  AND s.status NOT IN ('accepted', 'compile_error')
+                  AND (leaderboard_problem_scores.first_ac_at IS NULL
+                       OR s.submitted_at < leaderboard_problem_scores.first_ac_at)
+            )
+        """))
+        await db.commit()
+    return written.rowcount
@@ -0,0 +1,114 @@
+"""
+CEAP — Leaderboard Page Cache
+Per-event snapshot cache with a version counter. The version is bumped only
+when a committed verdict or MCQ submission changes the board, so readers can
+answer If-None-Match with 304 and serve pages without touching the database.
+
+Backends (LEADERBOARD_CACHE_BACKEND):
+  memory — per-process dict; fine for a single worker
+  redis  — shared versions and pages via REDIS_URL for multi-worker deploys
+"""
+import json
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+from app.config import settings
+
+MEMORY_CACHE_MAX_PAGES = 1024
+
+
+class MemoryCacheBackend:
+    """In-process versions and pages. Versions restart with the process,
+    so each process gets its own epoch to keep old ETags from matching."""
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._versions: dict[str, int] = {}
+        self._pages: OrderedDict[str, str] = OrderedDict()
+
+    async def version(self, event_id: str) -> str:
+        return f"{self.epoch}.{self._versions.get(event_id, 0)}"
+
+    async def bump(self, event_id: str):
+        self._versions[event_id] = self._versions.get(event_id, 0) + 1
+
+    async def get_page(self, key: str) -> Optional[str]:
+        body = self._pages.get(key)
+        if body is not None:
+            self._pages.move_to_end(key)
+        return body
+
+    async def set_page(self, key: str, body: str):
+        self._pages[key] = body
+        self._pages.move_to_end(key)
+        while len(self._pages) > MEMORY_CACHE_MAX_PAGES:
+            self._pages.popitem(last=False)
+
+
+class RedisCacheBackend:
+    """Versions via INCR and pages via SETEX, shared by all workers."""
+
+    def __init__(self, url: str, ttl_seconds: int):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url, decode_responses=True)
+        self._ttl = ttl_seconds
+        self._epoch: Optional[str] = None
+
+    async def _get_epoch(self) -> str:
+        # A flushed Redis restarts counters at 0; a fresh epoch keeps old ETags invalid
+        if self._epoch is None:
+            await self._redis.set("ceap:lb:epoch", uuid.uuid4().hex[:8], nx=True)
+            self._epoch = await self._redis.get("ceap:lb:epoch")
+        return self._epoch
+
+    async def version(self, event_id: str) -> str:
+        epoch = await self._get_epoch()
+        return f"{epoch}.{await self._redis.get(f'ceap:lb:ver:{event_id}') or 0}"
+
+    async def bump(self, event_id: str):
+        await self._redis.incr(f"ceap:lb:ver:{event_id}")
+
+    async def get_page(self, key: str) -> Optional[str]:
+        return await self._redis.get(f"ceap:lb:page:{key}")
+
+    async def set_page(self, key: str, body: str):
+        await self._redis.set(f"ceap:lb:page:{key}", body, ex=self._ttl)
+
+
+class LeaderboardCache:
+    """Versioned page cache in front of a pluggable backend."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def version(self, event_id) -> str:
+        return await self.backend.version(str(event_id))
+
+    async def bump(self, event_id):
+        await self.backend.bump(str(event_id))
+
+    @staticmethod
+    def etag(version: str, *parts) -> str:
+        return 'W/"lb-' + "-".join([version, *(str(p) for p in parts)]) + '"'
+
+    async def get_page(self, event_id, version: str, *parts) -> Optional[dict]:
+        body = await self.backend.get_page(self._key(event_id, version, parts))
+        return json.loads(body) if body is not None else None
+
+    async def set_page(self, event_id, version: str, *parts, body: dict):
+        await self.backend.set_page(self._key(event_id, version, parts), json.dumps(body))
+
+    @staticmethod
+    def _key(event_id, version: str, parts) -> str:
+        return ":".join([str(event_id), version, *(str(p) for p in parts)])
+
+
+def _create_backend():
+    if settings.LEADERBOARD_CACHE_BACKEND == "redis":
+        return RedisCacheBackend(settings.REDIS_URL, settings.LEADERBOARD_CACHE_TTL_SECONDS)
+    return MemoryCacheBackend()
+
+
+leaderboard_cache = LeaderboardCache(_create_backend())
@@ -0,0 +1,285 @@
+"""
+CEAP — Leaderboard History
+Rebuilds past boards by replaying judged submissions in submitted_at order
+with the same rules as update_leaderboard, in one streaming pass:
+  - frozen boards: students see the board as of Event.leaderboard_freeze_at
+    while the live board keeps updating for staff
+  - rank timelines: ranks sampled at evenly spaced points for charts
+Covers code submissions; MCQ exam boards are never frozen.
+"""
+import time
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.event import Event, Team
+from app.models.leaderboard import LeaderboardEntry
+from app.models.problem import Submission
+from app.models.tenant import User
+from app.services.leaderboard import EventRanking, RankingView, ScoringRules
+
+REPLAY_BATCH_SIZE = 1000
+FREEZE_STATE_TTL_SECONDS = 10
+STAFF_ROLES = ("super_admin", "admin", "faculty", "judge")
+
+
+class _ProblemState:
+    __slots__ = ("best_score", "attempts", "first_ac_at")
+
+    def __init__(self):
+        self.best_score = 0.0
+        self.attempts = 0
+        self.first_ac_at = None
+
+
+class BoardReplay:
+    """Participant totals and ranking built one judged submission at a time."""
+
+    def __init__(self, rules: ScoringRules):
+        self.rules = rules
+        self.ranking = EventRanking()
+        self.participants: dict[UUID, tuple[Optional[UUID], Optional[UUID]]] = {}  # id → (user_id, team_id)
+        # id → [total_score, problems_solved, last_submission, total_time, penalty]
+        self.totals: dict[UUID, list] = {}
+        self._problems: dict[tuple[UUID, UUID], _ProblemState] = {}
+        self.replayed = 0
+
+    def apply(self, user_id, team_id, problem_id, status, score, submitted_at):
+        participant_id = team_id or user_id
+        totals = self.totals.get(participant_id)
+        changed = totals is None
+        if changed:
+            totals = self.totals[participant_id] = [0.0, 0, None, 0, 0]
+            self.participants[participant_id] = (None if team_id else user_id, team_id)
+
+        state = self._problems.get((participant_id, problem_id))
+        if state is None:
+            state = self._problems[(participant_id, problem_id)] = _ProblemState()
+        delta = self.rules.apply(state, status, score, submitted_at)
+        if delta:
+            totals[0] += delta["score"]
+            totals[1] += delta["solved"]
+            totals[3] += delta["time"]
+            totals[4] += delta["penalty"]
+            changed = True
+
+        if changed:
+            totals[2] = submitted_at
+            self.ranking.upsert(participant_id, *totals)
+        self.replayed += 1
+
+    def ranked(self) -> list[UUID]:
+        return self.ranking.page(0, len(self.ranking))
+
+
+async def replay(
+    db: AsyncSession,
+    event_id,
+    rules: ScoringRules,
+    *,
+    before: Optional[datetime] = None,
+    sample_at: Optional[list[datetime]] = None,
+) -> tuple[BoardReplay, dict[UUID, list]]:
+    """
+    Replay the event's judged submissions. `before` limits the replay to
+    verdicts known at that time (submitted and judged before it). With
+    `sample_at` (ascending), also returns each participant's rank at every
+    sample point, None before their first submission.
+    """
+    query = (
+        select(
+            Submission.user_id, Submission.team_id, Submission.problem_id,
+            Submission.status, Submission.score, Submission.submitted_at,
+        )
+        .where(Submission.event_id == event_id, Submission.judged_at.isnot(None))
+        .order_by(Submission.submitted_at, Submission.id)
+        .execution_options(yield_per=REPLAY_BATCH_SIZE)
+    )
+    if before is not None:
+        query = query.where(Submission.submitted_at < before, Submission.judged_at < before)
+
+    board = BoardReplay(rules)
+    samples = sample_at or []
+    series: dict[UUID, list] = {}
+    next_sample = 0
+
+    def take_sample():
+        for rank, participant_id in enumerate(board.ranked(), start=1):
+            ranks = series.get(participant_id)
+            if ranks is None:
+                ranks = series[participant_id] = [None] * len(samples)
+            ranks[next_sample] = rank
+
+    result = await db.stream(query)
+    async for row in result:
+        while next_sample < len(samples) and row.submitted_at > samples[next_sample]:
+            take_sample()
+            next_sample += 1
+        board.apply(row.user_id, row.team_id, row.problem_id, row.status, row.score, row.submitted_at)
+    while next_sample < len(samples):
+        take_sample()
+        next_sample += 1
+    return board, series
+
+
+async def _load_participants(db: AsyncSession, event_id) -> dict[UUID, dict]:
+    """Entry IDs and display names of every participant on the board, in one query."""
+    rows = (await db.execute(
+        select(
+            LeaderboardEntry.id,
+            LeaderboardEntry.user_id,
+            LeaderboardEntry.team_id,
+            User.full_name.label("user_name"),
+            Team.name.label("team_name"),
+        )
+        .outerjoin(User, User.id == LeaderboardEntry.user_id)
+        .outerjoin(Team, Team.id == LeaderboardEntry.team_id)
+        .where(LeaderboardEntry.event_id == event_id)
+    )).all()
+    return {
+        row.team_id or row.user_id: {
+            "entry_id": str(row.id),
+            "user_name": row.user_name,
+            "team_name": row.team_name,
+        }
+        for row in rows
+    }
+
+
+def _participant_payload(board: BoardReplay, participant_id: UUID, info: Optional[dict]) -> dict:
+    user_id, team_id = board.participants[participant_id]
+    info = info or {}
+    return {
+        "entry_id": info.get("entry_id"),
+        "user_id": str(user_id) if user_id else None,
+        "team_id": str(team_id) if team_id else None,
+        "user_name": info.get("user_name"),
+        "team_name": info.get("team_name"),
+    }
+
+
+# ── Freeze ──────────────────────────────────────────────────
+
+class FreezeRegistry:
+    """
+    Per-process view of which boards are frozen, plus the frozen boards
+    themselves. Freeze state is cached for FREEZE_STATE_TTL_SECONDS so hot
+    leaderboard reads stay off the events table. A frozen board only holds
+    verdicts known before the freeze, so it never changes and is built once.
+    """
+
+    def __init__(self):
+        self._state: dict[UUID, tuple[float, Optional[datetime]]] = {}
+        self._boards: dict[UUID, tuple[datetime, list[dict], EventRanking]] = {}
+
+    async def frozen_at(self, db: AsyncSession, event_id) -> Optional[datetime]:
+        """The freeze time if the event's public board is frozen right now."""
+        event_id = UUID(str(event_id))
+        cached = self._state.get(event_id)
+        if cached is None or cached[0] < time.monotonic():
+            event = (await db.execute(
+                select(Event.leaderboard_freeze_at, Event.status, Event.event_type)
+                .where(Event.id == event_id)
+            )).one_or_none()
+            freeze_at = None
+            if event and event.leaderboard_freeze_at and event.event_type != "mcq_exam" \
+                    and event.status not in ("completed", "archived"):
+                freeze_at = event.leaderboard_freeze_at
+            cached = (time.monotonic() + FREEZE_STATE_TTL_SECONDS, freeze_at)
+            self._state[event_id] = cached
+
+        freeze_at = cached[1]
+        if freeze_at is None or datetime.utcnow() < freeze_at:
+            return None
+        return freeze_at
+
+    def invalidate(self, event_id):
+        event_id = UUID(str(event_id))
+        self._state.pop(event_id, None)
+        self._boards.pop(event_id, None)
+
+    async def board(self, db: AsyncSession, event_id, freeze_at: datetime) -> tuple[list[dict], RankingView]:
+        """All entries of the frozen board in rank order, and its ranking (keyed by participant)."""
+        event_id = UUID(str(event_id))
+        cached = self._boards.get(event_id)
+        if cached and cached[0] == freeze_at:
+            return cached[1], RankingView(cached[2])
+
+        event = await db.get(Event, event_id)
+        board, _ = await replay(db, event_id, ScoringRules.from_event(event), before=freeze_at)
+        participants = await _load_participants(db, event_id)
+        entries = []
+        for rank, participant_id in enumerate(board.ranked(), start=1):
+            total_score, problems_solved, last_submission, total_time, penalty = board.totals[participant_id]
+            entries.append({
+                "rank": rank,
+                **_participant_payload(board, participant_id, participants.get(participant_id)),
+                "total_score": round(total_score, 2),
+                "problems_solved": problems_solved,
+                "total_time": total_time,
+                "penalty": penalty,
+                "last_submission": last_submission.isoformat() if last_submission else None,
+            })
+        self._boards[event_id] = (freeze_at, entries, board.ranking)
+        return entries, RankingView(board.ranking)
+
+    async def page(
+        self, db: AsyncSession, event_id, freeze_at: datetime, offset: int, limit: Optional[int],
+    ) -> dict:
+        entries, _ = await self.board(db, event_id, freeze_at)
+        return {
+            "entries": entries[offset:offset + limit] if limit else entries[offset:],
+            "total": len(entries),
+            "frozen_at": freeze_at.isoformat(),
+            "updated_at": freeze_at.isoformat(),
+        }
+
+
+freeze_registry = FreezeRegistry()
+
+
+def is_staff(claims: dict) -> bool:
+    return claims.get("role") in STAFF_ROLES
+
+
+# ── Timeline ────────────────────────────────────────────────
+
+async def rank_timeline(db: AsyncSession, event_id, points: int, top: int) -> dict:
+    """
+    Rank over time for the final top `top` participants, sampled at `points`
+    evenly spaced times between the event start (or first submission) and
+    its end (or now).
+    """
+    event = await db.get(Event, event_id)
+    bounds = (await db.execute(
+        select(Submission.submitted_at)
+        .where(Submission.event_id == event_id, Submission.judged_at.isnot(None))
+        .order_by(Submission.submitted_at)
+        .limit(1)
+    )).scalar()
+    start = event.event_start or bounds
+    end = min(event.event_end or datetime.utcnow(), datetime.utcnow())
+    if start is None or end <= start:
+        return {"points": [], "participants": [], "submissions_replayed": 0}
+
+    step = (end - start) / points
+    sample_at = [start + step * (i + 1) for i in range(points)]
+    board, series = await replay(db, event_id, ScoringRules.from_event(event), sample_at=sample_at)
+    participants = await _load_participants(db, event_id)
+
+    final = board.ranked()[:top]
+    return {
+        "points": [t.isoformat() for t in sample_at],
+        "participants": [
+            {
+                **_participant_payload(board, participant_id, participants.get(participant_id)),
+                "final_rank": rank,
+                "ranks": series.get(participant_id, [None] * points),
+            }
+            for rank, participant_id in enumerate(final, start=1)
+        ],
+        "submissions_replayed": board.replayed,
+    }
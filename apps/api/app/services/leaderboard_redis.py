@@ -0,0 +1,296 @@
+"""
+CEAP — Redis Leaderboard Store
+Rank index in Redis sorted sets, shared by every worker (LEADERBOARD_STORE=redis).
+
+The sort key is composite (score, solved, ICPC time, last change, id), which
+no single double score can hold exactly, so each member is the key encoded
+as a fixed-width string and every member has score 0. Sorted sets order
+equal scores lexicographically, so ZRANGE pages, ZRANK ranks and ZLEXCOUNT
+finds a cursor's offset in O(log n), in the same order as the memory store.
+
+Keys per event:
+  ceap:lb:z:{event}        sorted set of encoded members
+  ceap:lb:member:{event}   hash entry ID → current member
+  ceap:lb:who:{event}      hash user/team ID → entry ID
+  ceap:lb:flushed:{event}  hash entry ID → rank last written to the DB
+  ceap:lb:state:{event}    "loading" (expires after LOAD_TIMEOUT_SECONDS) / "ready"
+                           once built from the DB
+Entry totals are committed with each verdict as before; ranks are written
+back to leaderboard_entries asynchronously by whichever worker holds the
+flush lock.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session
+from app.models.event import Event
+from app.models.leaderboard import LeaderboardEntry
+from app.services.leaderboard import sort_key, _NEVER
+
+_EPOCH = datetime(1970, 1, 1)
+_SCORE_BASE = 10 ** 12
+_SOLVED_BASE = 10 ** 6
+_NEVER_FIELD = "9" * 17
+LOAD_TIMEOUT_SECONDS = 60
+
+# Swap an entry's member for its new one, atomically with reading the old
+# member (another worker's verdict can't slip in between and orphan it).
+# KEYS: sorted set, member hash, who hash, dirty set
+# ARGV: entry ID, new member, participant ID, event ID
+# Returns {had old member (0/1), old 0-based rank or -1, new 0-based rank}
+_RECORD_SCRIPT = """
+local old = redis.call('HGET', KEYS[2], ARGV[1])
+local old_rank = -1
+if old then
+    old_rank = redis.call('ZRANK', KEYS[1], old) or -1
+    redis.call('ZREM', KEYS[1], old)
+end
+redis.call('ZADD', KEYS[1], 0, ARGV[2])
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+redis.call('HSET', KEYS[3], ARGV[3], ARGV[1])
+redis.call('SADD', KEYS[4], ARGV[4])
+return {old and 1 or 0, old_rank, redis.call('ZRANK', KEYS[1], ARGV[2])}
+"""
+
+# Drop an entry that left the board, and its participant mapping if still its own
+# KEYS: sorted set, member hash, who hash, flushed hash, dirty set
+# ARGV: entry ID, participant ID, event ID
+_REMOVE_SCRIPT = """
+local member = redis.call('HGET', KEYS[2], ARGV[1])
+if member then
+    redis.call('ZREM', KEYS[1], member)
+    redis.call('HDEL', KEYS[2], ARGV[1])
+    redis.call('SADD', KEYS[5], ARGV[3])
+end
+redis.call('HDEL', KEYS[4], ARGV[1])
+if redis.call('HGET', KEYS[3], ARGV[2]) == ARGV[1] then
+    redis.call('HDEL', KEYS[3], ARGV[2])
+end
+"""
+
+# Place a member loaded from the DB unless a verdict already placed a newer one
+# KEYS: sorted set, member hash; ARGV: entry ID, member
+_PLACE_SCRIPT = """
+if redis.call('HSETNX', KEYS[2], ARGV[1], ARGV[2]) == 1 then
+    redis.call('ZADD', KEYS[1], 0, ARGV[2])
+end
+"""
+
+
+def encode_member(key: tuple) -> str:
+    """Fixed-width string whose lexicographic order is the sort key's order."""
+    neg_score, neg_solved, time_total, last_submission, ranked_id = key
+    cents = round(-neg_score * 100)
+    last = _NEVER_FIELD if last_submission == _NEVER else \
+        f"{(last_submission - _EPOCH) // timedelta(microseconds=1):017d}"
+    return f"{_SCORE_BASE - cents:013d}:{_SOLVED_BASE + neg_solved:07d}:{time_total:010d}:{last}:{ranked_id}"
+
+
+def decode_member(member: str) -> tuple:
+    score, solved, time_total, last, ranked_id = member.split(":")
+    return (
+        -(_SCORE_BASE - int(score)) / 100,
+        int(solved) - _SOLVED_BASE,
+        int(time_total),
+        _NEVER if last == _NEVER_FIELD else _EPOCH + timedelta(microseconds=int(last)),
+        UUID(ranked_id),
+    )
+
+
+def _member_id(member: str) -> UUID:
+    return UUID(member.rsplit(":", 1)[1])
+
+
+class RedisRankingView:
+    """RankingView over one event's sorted set."""
+
+    def __init__(self, redis, event_id: str):
+        self._redis = redis
+        self._z = f"ceap:lb:z:{event_id}"
+        self._members = f"ceap:lb:member:{event_id}"
+        self._who = f"ceap:lb:who:{event_id}"
+
+    async def count(self) -> int:
+        return await self._redis.zcard(self._z)
+
+    async def page(self, offset: int, limit: int) -> list[UUID]:
+        if limit <= 0:
+            return []
+        members = await self._redis.zrange(self._z, offset, offset + limit - 1)
+        return [_member_id(m) for m in members]
+
+    async def rank_of(self, ranked_id) -> Optional[int]:
+        member = await self._redis.hget(self._members, str(ranked_id))
+        if member is None:
+            return None
+        rank = await self._redis.zrank(self._z, member)
+        return None if rank is None else rank + 1
+
+    async def ranks(self) -> dict[UUID, int]:
+        members = await self._redis.zrange(self._z, 0, -1)
+        return {_member_id(m): i + 1 for i, m in enumerate(members)}
+
+    async def key_at(self, index: int) -> tuple:
+        return decode_member((await self._redis.zrange(self._z, index, index))[0])
+
+    async def index_after(self, key: tuple) -> int:
+        return await self._redis.zlexcount(self._z, "-", "[" + encode_member(key))
+
+    async def ranked_id_for(self, participant_id) -> Optional[UUID]:
+        ranked_id = await self._redis.hget(self._who, str(participant_id))
+        return UUID(ranked_id) if ranked_id else None
+
+
+class RedisLeaderboardStore:
+    """Same interface as MemoryLeaderboardStore, backed by Redis."""
+
+    DIRTY_KEY = "ceap:lb:dirty"
+    FLUSH_LOCK_KEY = "ceap:lb:flush-lock"
+
+    def __init__(self, redis):
+        self._redis = redis
+        self._record_script = redis.register_script(_RECORD_SCRIPT)
+        self._place_script = redis.register_script(_PLACE_SCRIPT)
+        self._remove_script = redis.register_script(_REMOVE_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisLeaderboardStore":
+        import redis.asyncio as redis
+
+        return cls(redis.from_url(url, decode_responses=True))
+
+    async def get(self, db: AsyncSession, event_id) -> RedisRankingView:
+        """Return the event's view, building its sorted set from the DB on first use."""
+        event_id = str(event_id)
+        if not await self._redis.exists(f"ceap:lb:state:{event_id}"):
+            await self._load(db, event_id)
+        return RedisRankingView(self._redis, event_id)
+
+    async def _load(self, db: AsyncSession, event_id: str):
+        # Only one worker builds the set; record() applies verdicts from "loading" on.
+        # The marker expires, and is dropped on failure, so a dead or failed
+        # build is retried instead of leaving the event without a set
+        state = f"ceap:lb:state:{event_id}"
+        if not await self._redis.set(state, "loading", nx=True, ex=LOAD_TIMEOUT_SECONDS):
+            return
+        try:
+            rows = (await db.execute(
+                select(
+                    LeaderboardEntry.id,
+                    LeaderboardEntry.user_id,
+                    LeaderboardEntry.team_id,
+                    LeaderboardEntry.total_score,
+                    LeaderboardEntry.problems_solved,
+                    LeaderboardEntry.last_submission,
+                    LeaderboardEntry.total_time,
+                    LeaderboardEntry.penalty,
+                    LeaderboardEntry.rank,
+                ).where(LeaderboardEntry.event_id == UUID(event_id))
+            )).all()
+
+            # Entries a verdict already placed while we read are newer than our rows
+            z, members = f"ceap:lb:z:{event_id}", f"ceap:lb:member:{event_id}"
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for row in rows:
+                    member = encode_member(sort_key(
+                        row.id, row.total_score, row.problems_solved, row.last_submission,
+                        row.total_time, row.penalty,
+                    ))
+                    await self._place_script(keys=[z, members], args=[str(row.id), member], client=pipe)
+                    pipe.hsetnx(f"ceap:lb:who:{event_id}", str(row.team_id or row.user_id), str(row.id))
+                    if row.rank is not None:
+                        pipe.hsetnx(f"ceap:lb:flushed:{event_id}", str(row.id), row.rank)
+                pipe.set(state, "ready")
+                await pipe.execute()
+        except Exception:
+            await self._redis.delete(state)
+            raise
+
+    async def record(self, entry: LeaderboardEntry) -> Optional[tuple[Optional[int], int]]:
+        """
+        Apply a committed entry change and return (old_rank, new_rank).
+        Events whose set has not been built yet are skipped.
+        """
+        event_id = str(entry.event_id)
+        if not await self._redis.exists(f"ceap:lb:state:{event_id}"):
+            return None
+
+        member = encode_member(sort_key(
+            entry.id, entry.total_score, entry.problems_solved, entry.last_submission,
+            entry.total_time, entry.penalty,
+        ))
+        had_old, old_rank, rank = await self._record_script(
+            keys=[
+                f"ceap:lb:z:{event_id}", f"ceap:lb:member:{event_id}",
+                f"ceap:lb:who:{event_id}", self.DIRTY_KEY,
+            ],
+            args=[str(entry.id), member, str(entry.team_id or entry.user_id), event_id],
+        )
+        if not had_old:
+            return None, rank + 1
+        return (None if old_rank < 0 else old_rank + 1), rank + 1
+
+    async def remove(self, event_id, entry_id, participant_id):
+        """Drop a committed entry deletion; events whose set has not been built yet are skipped."""
+        event_id = str(event_id)
+        if not await self._redis.exists(f"ceap:lb:state:{event_id}"):
+            return
+        await self._remove_script(
+            keys=[
+                f"ceap:lb:z:{event_id}", f"ceap:lb:member:{event_id}", f"ceap:lb:who:{event_id}",
+                f"ceap:lb:flushed:{event_id}", self.DIRTY_KEY,
+            ],
+            args=[str(entry_id), str(participant_id), event_id],
+        )
+
+    async def warm(self):
+        """Build sorted sets for all ongoing events (startup); existing sets are kept."""
+        async with async_session() as db:
+            event_ids = (await db.execute(
+                select(Event.id).where(Event.status == "ongoing")
+            )).scalars().all()
+            for event_id in event_ids:
+                await self.get(db, event_id)
+        return len(event_ids)
+
+    async def flush(self) -> int:
+        """Write changed ranks of dirty events to leaderboard_entries.rank (one worker at a time)."""
+        lock_seconds = max(settings.LEADERBOARD_RANK_FLUSH_SECONDS, 1)
+        if not await self._redis.set(self.FLUSH_LOCK_KEY, "1", nx=True, ex=lock_seconds):
+            return 0
+
+        written = 0
+        try:
+            async with async_session() as db:
+                while True:
+                    event_id = await self._redis.spop(self.DIRTY_KEY)
+                    if event_id is None:
+                        break
+                    try:
+                        members = await self._redis.zrange(f"ceap:lb:z:{event_id}", 0, -1)
+                        flushed = await self._redis.hgetall(f"ceap:lb:flushed:{event_id}")
+                        changes = []
+                        for index, member in enumerate(members):
+                            entry_id = _member_id(member)
+                            if flushed.get(str(entry_id)) != str(index + 1):
+                                changes.append({"id": entry_id, "rank": index + 1})
+                        if not changes:
+                            continue
+                        await db.execute(update(LeaderboardEntry), changes)
+                        await db.commit()
+                        await self._redis.hset(
+                            f"ceap:lb:flushed:{event_id}",
+                            mapping={str(c["id"]): c["rank"] for c in changes},
+                        )
+                        written += len(changes)
+                    except Exception:
+                        await self._redis.sadd(self.DIRTY_KEY, event_id)
+                        raise
+        finally:
+            await self._redis.delete(self.FLUSH_LOCK_KEY)
+        return written
@@ -0,0 +1,151 @@
+"""
+CEAP — Live Leaderboard Stream
+Server-Sent Events fan-out of leaderboard changes, one channel per event.
+
+Messages (each SSE "data" is JSON with a per-event "seq"):
+  snapshot — the full board ({"entries", "total", ...}); sent on connect,
+             every LEADERBOARD_STREAM_RESYNC_SECONDS and after a client lags
+  delta    — one entry changed: {"entry", "old_rank", "rank"}. Clients move
+             the entry from old_rank (null if new) to rank; everyone in between
+             shifts by one. Deltas with seq <= the last snapshot's are skipped.
+
+Each message is serialized once and the same bytes are queued to every
+subscriber; snapshots are cached per seq, so fan-out does no per-client DB work.
+Deltas are published by the worker that commits the change; with several
+workers, clients on other workers catch up at the next resync.
+"""
+import asyncio
+import json
+from typing import AsyncIterator, Awaitable, Callable
+from uuid import UUID
+
+from app.config import settings
+
+KEEPALIVE_FRAME = b": keepalive\n\n"
+_RESYNC = object()
+
+
+def _frame(kind: str, seq: int, data: dict) -> bytes:
+    payload = json.dumps({**data, "seq": seq}, separators=(",", ":"), default=str)
+    return f"id: {seq}\nevent: {kind}\ndata: {payload}\n\n".encode()
+
+
+class Subscriber:
+    """One connected client: a bounded queue of (seq, frame) pairs."""
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.LEADERBOARD_STREAM_QUEUE_SIZE)
+        self.lagged = False
+
+    def offer(self, seq: int, frame: bytes):
+        if self.lagged:
+            return
+        try:
+            self.queue.put_nowait((seq, frame))
+        except asyncio.QueueFull:
+            # Too far behind to catch up delta by delta — send a snapshot instead
+            self.lagged = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait((seq, _RESYNC))
+
+
+class LeaderboardStream:
+    """Per-process registry of subscribers, sequence numbers and snapshots."""
+
+    def __init__(self):
+        self._subscribers: dict[UUID, set[Subscriber]] = {}
+        self._seq: dict[UUID, int] = {}
+        self._snapshots: dict[UUID, tuple[int, bytes]] = {}
+        self._locks: dict[UUID, asyncio.Lock] = {}
+
+    def seq(self, event_id) -> int:
+        return self._seq.get(UUID(str(event_id)), 0)
+
+    def has_subscribers(self, event_id) -> bool:
+        return bool(self._subscribers.get(UUID(str(event_id))))
+
+    def publish(self, event_id, kind: str, data: dict):
+        """Advance the event's seq and queue one serialized frame to every subscriber."""
+        event_id = UUID(str(event_id))
+        seq = self._seq.get(event_id, 0) + 1
+        self._seq[event_id] = seq
+        subscribers = self._subscribers.get(event_id)
+        if not subscribers:
+            return
+        frame = _frame(kind, seq, data)
+        for subscriber in subscribers:
+            subscriber.offer(seq, frame)
+
+    async def snapshot(
+        self, event_id: UUID, build: Callable[[UUID], Awaitable[tuple[int, dict]]],
+    ) -> tuple[int, bytes]:
+        """
+        Serialized snapshot for the current seq. Concurrent callers share one
+        build; `build` returns (seq, body) with seq read alongside the ranking.
+        """
+        cached = self._snapshots.get(event_id)
+        if cached and cached[0] == self.seq(event_id):
+            return cached
+        async with self._locks.setdefault(event_id, asyncio.Lock()):
+            cached = self._snapshots.get(event_id)
+            if cached and cached[0] == self.seq(event_id):
+                return cached
+            seq, body = await build(event_id)
+            cached = (seq, _frame("snapshot", seq, body))
+            if event_id in self._subscribers:
+                self._snapshots[event_id] = cached
+            return cached
+
+    def _subscribe(self, event_id: UUID) -> Subscriber:
+        subscriber = Subscriber()
+        self._subscribers.setdefault(event_id, set()).add(subscriber)
+        return subscriber
+
+    def _unsubscribe(self, event_id: UUID, subscriber: Subscriber):
+        subscribers = self._subscribers.get(event_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self._subscribers[event_id]
+            self._snapshots.pop(event_id, None)
+            self._locks.pop(event_id, None)
+
+    async def frames(
+        self, event_id, build: Callable[[UUID], Awaitable[tuple[int, dict]]],
+    ) -> AsyncIterator[bytes]:
+        """SSE body for one client: snapshot, then deltas, resyncing periodically."""
+        event_id = UUID(str(event_id))
+        subscriber = self._subscribe(event_id)
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                # Subscribed before the snapshot, so deltas during the build are kept
+                subscriber.lagged = False
+                snapshot_seq, frame = await self.snapshot(event_id, build)
+                yield frame
+
+                resync_at = loop.time() + settings.LEADERBOARD_STREAM_RESYNC_SECONDS
+                while True:
+                    remaining = resync_at - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        seq, frame = await asyncio.wait_for(
+                            subscriber.queue.get(),
+                            min(remaining, settings.LEADERBOARD_STREAM_KEEPALIVE_SECONDS),
+                        )
+                    except asyncio.TimeoutError:
+                        if resync_at - loop.time() > 0:
+                            yield KEEPALIVE_FRAME
+                        continue
+                    if frame is _RESYNC:
+                        break
+                    if seq > snapshot_seq:
+                        yield frame
+        finally:
+            self._unsubscribe(event_id, subscriber)
+
+
+leaderboard_stream = LeaderboardStream()
@@ -0,0 +1,207 @@
+"""
+CEAP — Problem Analytics
+Acceptance rate, verdict mix and runtime/memory distributions of one
+problem, overall and per language:
+  submissions   one row per submission (verdict, max time/memory over tests)
+  test results  one row per judged test case
+Each level is read in one streamed, column-only query and packed into NumPy
+arrays batch by batch; percentiles, histograms and per-language/verdict
+counts are then computed vectorised. Millions of result rows cost a few
+arrays of memory; the only per-row Python work is unpacking fetched rows.
+
+Only judged submissions count: ones still waiting for a verdict would drag
+the acceptance rate down while judging is in progress.
+
+Bodies are cached per (problem, event) until the problem's next verdict.
+"""
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.problem import Problem, Submission, SubmissionResult
+
+FETCH_BATCH_ROWS = 50000
+HISTOGRAM_BINS = 20
+PERCENTILES = (50, 90, 99)
+UNJUDGED_STATUSES = ("pending", "queued", "running")
+
+
+async def fetch_columns(db: AsyncSession, query, categorical: int) -> tuple[list, list, np.ndarray]:
+    """
+    Stream `query` into columns: the first `categorical` columns as int32
+    codes (with their labels), the rest as one float64 matrix (NULL → NaN).
+    Returns (code arrays, label lists, numeric matrix).
+    """
+    labels = [{} for _ in range(categorical)]
+    code_parts = [[] for _ in range(categorical)]
+    numeric_parts = []
+    result = await db.stream(query.execution_options(yield_per=FETCH_BATCH_ROWS))
+    async for rows in result.partitions():
+        for i, codes in enumerate(labels):
+            code_parts[i].append(np.fromiter(
+                (codes.setdefault(row[i], len(codes)) for row in rows), dtype=np.int32, count=len(rows),
+            ))
+        numeric_parts.append(np.array([row[categorical:] for row in rows], dtype=np.float64))
+
+    width = len(query.selected_columns) - categorical
+    codes = [np.concatenate(parts) if parts else np.empty(0, np.int32) for parts in code_parts]
+    numeric = np.concatenate(numeric_parts) if numeric_parts else np.empty((0, width))
+    return codes, [list(codes_by_label) for codes_by_label in labels], numeric.reshape(-1, width)
+
+
+def distribution(values: np.ndarray) -> dict:
+    """Percentiles, mean and histogram of the non-NULL values."""
+    values = values[~np.isnan(values)]
+    if not values.size:
+        return {"count": 0}
+    p = np.percentile(values, PERCENTILES)
+    counts, edges = np.histogram(values, bins=HISTOGRAM_BINS)
+    return {
+        "count": int(values.size),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "mean": round(float(values.mean()), 2),
+        **{f"p{q}": round(float(v), 2) for q, v in zip(PERCENTILES, p)},
+        "histogram": {
+            "edges": [round(float(e), 2) for e in edges],
+            "counts": counts.tolist(),
+        },
+    }
+
+
+def _verdict_mix(status: np.ndarray, status_labels: list) -> dict:
+    counts = np.bincount(status, minlength=len(status_labels))
+    return {label or "unknown": int(n) for label, n in zip(status_labels, counts) if n}
+
+
+def _summary(status, status_labels, accepted_code, times, memory, test_times, test_memory) -> dict:
+    total = int(status.size)
+    accepted = int(np.count_nonzero(status == accepted_code)) if accepted_code is not None else 0
+    return {
+        "submissions": total,
+        "accepted": accepted,
+        "acceptance_rate": round(accepted / total * 100, 1) if total else 0,
+        "verdicts": _verdict_mix(status, status_labels),
+        "runtime_ms": distribution(times),
+        "memory_kb": distribution(memory),
+        "test_runtime_ms": distribution(test_times),
+        "test_memory_kb": distribution(test_memory),
+    }
+
+
+async def compute_problem_analytics(db: AsyncSession, problem: Problem, event_id=None) -> dict:
+    submissions = (
+        select(Submission.language, Submission.status, Submission.execution_time, Submission.memory_used)
+        .where(Submission.problem_id == problem.id, Submission.status.notin_(UNJUDGED_STATUSES))
+    )
+    results = (
+        select(Submission.language, SubmissionResult.execution_time, SubmissionResult.memory_used)
+        .join(Submission, Submission.id == SubmissionResult.submission_id)
+        .where(
+            Submission.problem_id == problem.id,
+            Submission.status.notin_(UNJUDGED_STATUSES),
+            SubmissionResult.status.is_distinct_from("compile_error"),
+        )
+    )
+    if event_id:
+        submissions = submissions.where(Submission.event_id == event_id)
+        results = results.where(Submission.event_id == event_id)
+
+    (lang, status), (languages, status_labels), sub_values = await fetch_columns(db, submissions, 2)
+    (test_lang,), (test_languages,), test_values = await fetch_columns(db, results, 1)
+
+    accepted_code = status_labels.index("accepted") if "accepted" in status_labels else None
+    # Submissions never run (compile errors) have no meaningful time/memory
+    judged = sub_values.copy()
+    if "compile_error" in status_labels:
+        judged[status == status_labels.index("compile_error")] = np.nan
+
+    by_language = {}
+    for code, language in enumerate(languages):
+        mask = lang == code
+        test_code = test_languages.index(language) if language in test_languages else -1
+        test_mask = test_lang == test_code
+        by_language[language] = _summary(
+            status[mask], status_labels, accepted_code,
+            judged[mask, 0], judged[mask, 1],
+            test_values[test_mask, 0], test_values[test_mask, 1],
+        )
+
+    return {
+        "problem_id": str(problem.id),
+        "title": problem.title,
+        "event_id": str(event_id) if event_id else None,
+        "time_limit_ms": problem.time_limit_ms,
+        "memory_limit_kb": problem.memory_limit_kb,
+        "overall": _summary(
+            status, status_labels, accepted_code,
+            judged[:, 0], judged[:, 1], test_values[:, 0], test_values[:, 1],
+        ),
+        "by_language": dict(sorted(by_language.items(), key=lambda kv: -kv[1]["submissions"])),
+    }
+
+
+# ── Cache ───────────────────────────────────────────────────
+
+PROBLEM_ANALYTICS_CACHE_MAX = 512
+
+
+class ProblemAnalyticsCache:
+    """
+    Per-process cache of analytics bodies keyed by (problem, event). A verdict
+    on the problem drops its entries; the TTL bounds staleness for verdicts
+    judged in other processes. Bodies computed while a verdict landed are not
+    stored (the problem's generation moved on).
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self._ttl = ttl_seconds
+        self._entries: OrderedDict[tuple, tuple[float, dict]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+
+    def generation(self, problem_id) -> int:
+        return self._generations.get(str(problem_id), 0)
+
+    def get(self, problem_id, event_id=None) -> Optional[dict]:
+        key = (str(problem_id), str(event_id or ""))
+        cached = self._entries.get(key)
+        if cached is None:
+            return None
+        if cached[0] < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return cached[1]
+
+    def set(self, problem_id, event_id, body: dict, generation: int):
+        if self._ttl <= 0 or generation != self.generation(problem_id):
+            return
+        key = (str(problem_id), str(event_id or ""))
+        self._entries[key] = (time.monotonic() + self._ttl, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > PROBLEM_ANALYTICS_CACHE_MAX:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, problem_id):
+        problem_id = str(problem_id)
+        self._generations[problem_id] = self.generation(problem_id) + 1
+        for key in [k for k in self._entries if k[0] == problem_id]:
+            del self._entries[key]
+
+
+problem_analytics_cache = ProblemAnalyticsCache(settings.PROBLEM_ANALYTICS_CACHE_TTL_SECONDS)
+
+
+async def problem_analytics(db: AsyncSession, problem: Problem, event_id=None) -> dict:
+    cached = problem_analytics_cache.get(problem.id, event_id)
+    if cached is not None:
+        return cached
+    generation = problem_analytics_cache.generation(problem.id)
+    body = await compute_problem_analytics(db, problem, event_id)
+    problem_analytics_cache.set(problem.id, event_id, body, generation)
+    return body
@@ -0,0 +1,292 @@
+"""
+CEAP — Report Jobs
+Heavy exports (e.g. a semester of submissions with per-test-case rows) built
+outside the request path:
+  1. a spec is submitted → a report_jobs row is queued
+  2. one of REPORT_WORKERS workers streams the table into a local file,
+     recording rows_done / rows_total as it goes
+  3. the finished file is downloaded, and kept for REPORT_ARTIFACT_TTL_HOURS
+Submitting the same spec again (per tenant) returns the queued/running job
+or the finished artifact instead of building it twice. Jobs live in the DB;
+the queue itself is per process, and jobs still queued when the API
+restarts are picked up again on startup.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select, update, func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session
+from app.models.event import Event
+from app.models.report import ReportJob
+from app.models.tenant import User
+from app.schemas.report import ReportSpec
+from app.services import exports
+
+PROGRESS_WRITE_SECONDS = 1.0
+CLEANUP_INTERVAL_SECONDS = 600
+
+
+def spec_hash(spec: dict) -> str:
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+def normalize_spec(spec: ReportSpec) -> dict:
+    """The spec as stored and hashed: JSON-safe, with event_ids in a stable order."""
+    data = spec.model_dump(mode="json")
+    if data.get("event_ids"):
+        data["event_ids"] = sorted(set(data["event_ids"]))
+    return data
+
+
+def table_for(tenant_id, spec: ReportSpec) -> tuple[exports.Table, str]:
+    """(table, sheet title) for a spec."""
+    if spec.kind == "submissions":
+        return exports.submissions_table(
+            tenant_id, spec.event_ids, spec.date_from, spec.date_to, spec.test_cases,
+        ), "submissions"
+    tables = {
+        "leaderboard": exports.leaderboard_table,
+        "participants": exports.participants_table,
+        "mcq_results": exports.mcq_results_table,
+    }
+    return tables[spec.kind](spec.event_id), spec.kind
+
+
+def artifact_exists(job: ReportJob) -> bool:
+    return bool(job.artifact_path) and os.path.exists(job.artifact_path)
+
+
+def _remove(path: Optional[str]):
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+async def _set(job_id, **values):
+    async with async_session() as db:
+        await db.execute(update(ReportJob).where(ReportJob.id == job_id).values(**values))
+        await db.commit()
+
+
+class ReportRunner:
+    """Bounded pool of report workers fed by an in-process queue of job ids."""
+
+    def __init__(self, workers: int, max_queued: int):
+        self._workers = workers
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued)
+        self._tasks: list[asyncio.Task] = []
+        self._progress: dict[str, int] = {}  # rows done of jobs running here
+
+    def rows_done(self, job: ReportJob) -> int:
+        """Progress of a job, live when it runs in this process."""
+        return max(job.rows_done or 0, self._progress.get(str(job.id), 0))
+
+    async def start(self):
+        os.makedirs(settings.REPORTS_DIR, exist_ok=True)
+        # Jobs left running by a stopped process are failed by cleanup() once
+        # past the timeout; queued ones are simply picked up here
+        async with async_session() as db:
+            queued = (await db.execute(
+                select(ReportJob.id).where(ReportJob.status == "queued").order_by(ReportJob.created_at)
+            )).scalars().all()
+        for job_id in queued:
+            if not self.submit(job_id):
+                await _set(job_id, status="failed", error="Report queue full after restart; submit again")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self._workers)]
+        self._tasks.append(asyncio.create_task(self._cleanup_loop()))
+        return len(queued)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, job_id) -> bool:
+        """Queue a job; False when the queue is full."""
+        try:
+            self._queue.put_nowait(job_id)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                print(f"⚠️ Report job {job_id} crashed: {e}")
+                try:
+                    await _set(job_id, status="failed", error=str(e), finished_at=datetime.utcnow())
+                except Exception:
+                    pass  # left running; cleanup() fails it after the timeout
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id):
+        async with async_session() as db:
+            # Claim the job atomically; another process may have queued it too
+            claimed = await db.execute(
+                update(ReportJob)
+                .where(ReportJob.id == job_id, ReportJob.status == "queued")
+                .values(status="running", started_at=datetime.utcnow())
+            )
+            await db.commit()
+            if claimed.rowcount != 1:
+                return
+            job = await db.get(ReportJob, job_id)
+            spec = ReportSpec.model_validate(job.spec)
+            table, title = table_for(job.tenant_id, spec)
+            job.rows_total = (await db.execute(
+                select(func.count()).select_from(table.query.order_by(None).subquery())
+            )).scalar()
+            await db.commit()
+
+        path = os.path.join(settings.REPORTS_DIR, f"{job_id}.{spec.format}")
+        part = path + ".part"
+        timeout = settings.REPORT_JOB_TIMEOUT_MINUTES * 60
+        try:
+            await asyncio.wait_for(self._build(job_id, table, spec.format, title, part), timeout)
+            os.replace(part, path)
+        except Exception as e:
+            _remove(part)
+            error = f"Timed out after {settings.REPORT_JOB_TIMEOUT_MINUTES} minutes" \
+                if isinstance(e, asyncio.TimeoutError) else str(e) or type(e).__name__
+            await _set(job_id, status="failed", error=error, finished_at=datetime.utcnow())
+            print(f"⚠️ Report job {job_id} failed: {error}")
+            return
+
+        now = datetime.utcnow()
+        await _set(
+            job_id,
+            status="done",
+            artifact_path=path,
+            artifact_bytes=os.path.getsize(path),
+            finished_at=now,
+            expires_at=now + timedelta(hours=settings.REPORT_ARTIFACT_TTL_HOURS),
+        )
+
+    async def _build(self, job_id, table: exports.Table, export_format: str, title: str, part: str):
+        """Stream the encoded table into `part`, recording progress as it goes."""
+        if export_format == "parquet":
+            exports.require_pyarrow()
+        key = str(job_id)
+        self._progress[key] = 0
+        last_write = time.monotonic()
+
+        async def counted():
+            nonlocal last_write
+            async for batch in exports.stream_rows(table.query, table.to_row):
+                yield batch
+                self._progress[key] += len(batch)
+                # SQLite can't take this write while the export's read cursor
+                # is open; there progress is only visible to this process
+                if not settings.is_sqlite and time.monotonic() - last_write >= PROGRESS_WRITE_SECONDS:
+                    last_write = time.monotonic()
+                    await _set(job_id, rows_done=self._progress[key])
+
+        try:
+            with open(part, "wb") as f:
+                async for chunk in exports.encode(export_format, table.columns, counted(), title):
+                    await asyncio.to_thread(f.write, chunk.encode() if isinstance(chunk, str) else chunk)
+            await _set(job_id, rows_done=self._progress[key])
+        finally:
+            self._progress.pop(key, None)
+
+    async def _cleanup_loop(self):
+        while True:
+            await asyncio.sleep(CLEANUP_INTERVAL_SECONDS)
+            try:
+                expired = await self.cleanup()
+                if expired:
+                    print(f"🧹 Expired {expired} report artifact(s)")
+            except Exception as e:
+                print(f"⚠️ Report cleanup error (non-fatal): {e}")
+
+    async def cleanup(self) -> int:
+        """Delete artifacts past their TTL and fail jobs stuck past the timeout."""
+        now = datetime.utcnow()
+        async with async_session() as db:
+            jobs = (await db.execute(
+                select(ReportJob).where(ReportJob.status == "done", ReportJob.expires_at <= now)
+            )).scalars().all()
+            for job in jobs:
+                _remove(job.artifact_path)
+                job.status = "expired"
+                job.artifact_path = None
+            await db.commit()
+        # Twice the timeout leaves room for queueing before a job starts
+        cutoff = now - timedelta(minutes=2 * settings.REPORT_JOB_TIMEOUT_MINUTES)
+        await self._fail_stale(cutoff, statuses=("queued", "running"), reason="Abandoned")
+        return len(jobs)
+
+    async def _fail_stale(self, cutoff: datetime, statuses: tuple, reason: str):
+        async with async_session() as db:
+            await db.execute(
+                update(ReportJob)
+                .where(ReportJob.status.in_(statuses), ReportJob.created_at < cutoff)
+                .values(status="failed", error=reason, finished_at=datetime.utcnow())
+            )
+            await db.commit()
+
+
+report_runner = ReportRunner(settings.REPORT_WORKERS, settings.REPORT_MAX_QUEUED)
+
+
+async def find_reusable(db: AsyncSession, tenant_id, digest: str) -> Optional[ReportJob]:
+    """The newest queued/running job or unexpired artifact for this spec, if any."""
+    jobs = (await db.execute(
+        select(ReportJob)
+        .where(
+            ReportJob.tenant_id == tenant_id,
+            ReportJob.spec_hash == digest,
+            ReportJob.status.in_(("queued", "running", "done")),
+        )
+        .order_by(desc(ReportJob.created_at))
+    )).scalars().all()
+    now = datetime.utcnow()
+    for job in jobs:
+        if job.status != "done" or (job.expires_at and job.expires_at > now and artifact_exists(job)):
+            return job
+    return None
+
+
+async def submit_report(db: AsyncSession, user: User, spec: ReportSpec) -> tuple[ReportJob, bool]:
+    """(job, reused). Creates and queues a job unless one for the same spec can be reused."""
+    event_ids = [spec.event_id] if spec.event_id else list(spec.event_ids or [])
+    if event_ids:
+        found = (await db.execute(
+            select(func.count()).select_from(Event)
+            .where(Event.id.in_(event_ids), Event.tenant_id == user.tenant_id)
+        )).scalar()
+        if found != len(set(event_ids)):
+            raise HTTPException(status_code=404, detail="Event not found")
+    if spec.format == "parquet":
+        exports.require_pyarrow()
+
+    data = normalize_spec(spec)
+    digest = spec_hash(data)
+    existing = await find_reusable(db, user.tenant_id, digest)
+    if existing:
+        return existing, True
+
+    job = ReportJob(tenant_id=user.tenant_id, created_by=user.id, spec=data, spec_hash=digest)
+    db.add(job)
+    # Committed before queueing so a worker can see the row
+    await db.commit()
+    if not report_runner.submit(job.id):
+        await _set(job.id, status="failed", error="Report queue is full", finished_at=datetime.utcnow())
+        raise HTTPException(status_code=503, detail="Too many reports in progress. Try again shortly.")
+    return job, False
@@ -1,16 +1,20 @@
 """
 CEAP — Event Scheduler Service
-Auto-transitions event statuses and generates certificates on completion.
+Auto-transitions event statuses, generates certificates on completion and
+reconciles the stats rollup counters nightly.
 Runs as a background task on app startup.
 """
 import asyncio
-from datetime import datetime
+from datetime import datetime, date
 from sqlalchemy import select, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.database import async_session
 from app.models.event import Event, Registration
 from app.models.leaderboard import LeaderboardEntry, Certificate
+from app.services.leaderboard import leaderboard_index
+from app.services import stats
 
 
 async def check_event_transitions():
@@ -74,20 +78,21 @@ async def auto_generate_certificates(db: AsyncSession, event: Event):
         )).scalars().all()
         existing_user_ids = {str(c.user_id) for c in existing}
 
-        # Get leaderboard for ranking
+        # Ranks come from the leaderboard index — no need to re-sort the board
+        ranking = await leaderboard_index.get(db, event.id)
+        ranks = await ranking.ranks()
         leaderboard = (await db.execute(
-            select(LeaderboardEntry)
-            .where(LeaderboardEntry.event_id == event.id)
-            .order_by(LeaderboardEntry.total_score.desc())
+            select(LeaderboardEntry).where(LeaderboardEntry.event_id == event.id)
         )).scalars().all()
 
         rank_map = {}
-        for i, entry in enumerate(leaderboard):
+        for entry in leaderboard:
             uid = str(entry.user_id) if entry.user_id else None
             if uid:
-                rank_map[uid] = {"rank": i + 1, "score": float(entry.total_score)}
+                rank_map[uid] = {"rank": ranks.get(entry.id), "score": float(entry.total_score)}
 
         created = 0
+        created_by_type = {}
         for reg in regs:
             uid = str(reg.user_id)
             if uid in existing_user_ids:
@@ -109,8 +114,13 @@ async def auto_generate_certificates(db: AsyncSession, event: Event):
             )
             db.add(cert)
             created += 1
+            created_by_type[cert_type] = created_by_type.get(cert_type, 0) + 1
+            stats.my_stats_cache.invalidate(reg.user_id)
 
         if created:
+            await stats.bump_many(db, event.tenant_id, {
+                (event.id, "certificates", cert_type): count for cert_type, count in created_by_type.items()
+            })
             await db.commit()
             print(f"🏆 Auto-generated {created} certificates for '{event.title}'")
 
@@ -118,12 +128,28 @@ async def auto_generate_certificates(db: AsyncSession, event: Event):
         print(f"⚠️ Certificate generation failed for '{event.title}': {e}")
 
 
+async def reconcile_stats_if_due(last_run: date) -> date:
+    """Recount the stats rollups once a day, after STATS_RECONCILE_HOUR (UTC)."""
+    now = datetime.utcnow()
+    if now.date() == last_run or now.hour < settings.STATS_RECONCILE_HOUR:
+        return last_run
+    repaired = await stats.reconcile_rollups()
+    print(f"📊 Stats rollups reconciled — {repaired} counter(s) repaired")
+    return now.date()
+
+
 async def run_scheduler():
     """Run the scheduler loop — checks every 5 minutes."""
     print("⏰ Event scheduler started")
+    # Startup builds missing rollups itself; the first nightly run is tomorrow
+    last_reconcile = datetime.utcnow().date()
     while True:
         try:
             await check_event_transitions()
         except Exception as e:
             print(f"⚠️ Scheduler error (non-fatal): {e}")
+        try:
+            last_reconcile = await reconcile_stats_if_due(last_reconcile)
+        except Exception as e:
+            print(f"⚠️ Stats reconciliation failed (retrying next check): {e}")
         await asyncio.sleep(300)  # 5 minutes
@@ -0,0 +1,217 @@
+"""
+CEAP — Statistics Rollups
+Counters per (tenant, event, metric, dimension), bumped in the same
+transaction as the write they count, so dashboards read a handful of rows
+instead of scanning submissions and registrations:
+  users           tenant-wide, by role
+  registrations   per event
+  submissions     per event, by status (moved from "queued" to the verdict)
+  certificates    per event, by certificate type
+  mcq_submitted   per event
+  audit_logs      tenant-wide, by action (SQLite only; see app.services.audit)
+A nightly reconciliation recounts everything and repairs any drift.
+
+Also holds the short-lived per-user cache behind /analytics/my-stats.
+"""
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select, func, null
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import async_session
+from app.models.event import Event, Registration
+from app.models.leaderboard import Certificate
+from app.models.mcq import MCQAttempt
+from app.models.problem import Submission
+from app.models.stats import StatsRollup, TENANT_WIDE
+from app.models.tenant import User, AuditLog
+
+if settings.is_sqlite:
+    from sqlalchemy.dialects.sqlite import insert as _upsert_insert
+else:
+    from sqlalchemy.dialects.postgresql import insert as _upsert_insert
+
+
+async def bump_many(db: AsyncSession, tenant_id, changes: dict[tuple, int]):
+    """
+    Add deltas to counters, creating them as needed. Keys are
+    (event_id or None, metric, dimension). Runs in the caller's transaction;
+    rows are upserted in key order so concurrent writers lock them in the
+    same order.
+    """
+    now = datetime.utcnow()
+    rows = sorted(
+        (
+            {
+                "tenant_id": tenant_id,
+                "event_id": event_id or TENANT_WIDE,
+                "metric": metric,
+                "dimension": dimension or "",
+                "value": delta,
+                "updated_at": now,
+            }
+            for (event_id, metric, dimension), delta in changes.items()
+            if delta
+        ),
+        key=lambda r: (str(r["event_id"]), r["metric"], r["dimension"]),
+    )
+    if not rows:
+        return
+    stmt = _upsert_insert(StatsRollup).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["tenant_id", "event_id", "metric", "dimension"],
+        set_={
+            "value": StatsRollup.value + stmt.excluded.value,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def bump(
+    db: AsyncSession, tenant_id, metric: str, dimension: str = "",
+    delta: int = 1, event_id=None,
+):
+    await bump_many(db, tenant_id, {(event_id, metric, dimension): delta})
+
+
+async def move(db: AsyncSession, tenant_id, metric: str, old: Optional[str], new: str, event_id=None):
+    """Move one count between dimensions, e.g. a submission from "queued" to its verdict."""
+    if old == new:
+        return
+    await bump_many(db, tenant_id, {
+        (event_id, metric, old): -1,
+        (event_id, metric, new): 1,
+    })
+
+
+async def read_counters(db: AsyncSession, tenant_id) -> dict[str, dict[str, int]]:
+    """metric → dimension → value, summed over the tenant's events."""
+    rows = (await db.execute(
+        select(StatsRollup.metric, StatsRollup.dimension, func.sum(StatsRollup.value))
+        .where(StatsRollup.tenant_id == tenant_id)
+        .group_by(StatsRollup.metric, StatsRollup.dimension)
+    )).all()
+    counters = defaultdict(dict)
+    for metric, dimension, value in rows:
+        if value:
+            counters[metric][dimension] = int(value)
+    return counters
+
+
+# ── Reconciliation ──────────────────────────────────────────
+
+async def _actual_counts(db: AsyncSession) -> dict[tuple, int]:
+    """Every counter recounted from the source tables, keyed like stats_rollups rows."""
+    queries = [
+        ("users", select(User.tenant_id, null(), User.role, func.count()).group_by(User.tenant_id, User.role)),
+        ("registrations", select(Event.tenant_id, Registration.event_id, null(), func.count())
+            .join(Event, Event.id == Registration.event_id)
+            .group_by(Event.tenant_id, Registration.event_id)),
+        ("submissions", select(Event.tenant_id, Submission.event_id, Submission.status, func.count())
+            .join(Event, Event.id == Submission.event_id)
+            .group_by(Event.tenant_id, Submission.event_id, Submission.status)),
+        ("certificates", select(Event.tenant_id, Certificate.event_id, Certificate.certificate_type, func.count())
+            .join(Event, Event.id == Certificate.event_id)
+            .group_by(Event.tenant_id, Certificate.event_id, Certificate.certificate_type)),
+        ("mcq_submitted", select(Event.tenant_id, MCQAttempt.event_id, null(), func.count())
+            .join(Event, Event.id == MCQAttempt.event_id)
+            .where(MCQAttempt.status == "submitted")
+            .group_by(Event.tenant_id, MCQAttempt.event_id)),
+    ]
+    if settings.is_sqlite:
+        queries.append(("audit_logs", select(AuditLog.tenant_id, null(), AuditLog.action, func.count())
+            .group_by(AuditLog.tenant_id, AuditLog.action)))
+    counts = defaultdict(int)
+    for metric, query in queries:
+        for tenant_id, event_id, dimension, count in (await db.execute(query)).all():
+            counts[(tenant_id, event_id or TENANT_WIDE, metric, dimension or "")] += count
+    return counts
+
+
+async def reconcile_rollups() -> int:
+    """
+    Recount every counter and correct the ones that drifted. The recount and
+    the stored values are read in one snapshot (REPEATABLE READ), and the
+    corrections are applied afterwards as deltas, so bumps committed during
+    reconciliation are kept. SQLite has no such snapshot: a bump committed
+    between the two reads may be undone, until the next run repairs it.
+    Returns the number of counters repaired.
+    """
+    async with async_session() as db:
+        if not settings.is_sqlite:
+            await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        actual = await _actual_counts(db)
+        stored = {
+            (row.tenant_id, row.event_id, row.metric, row.dimension): row.value
+            for row in (await db.execute(select(
+                StatsRollup.tenant_id, StatsRollup.event_id,
+                StatsRollup.metric, StatsRollup.dimension, StatsRollup.value,
+            ))).all()
+        }
+
+    by_tenant = defaultdict(dict)
+    for key in actual.keys() | stored.keys():
+        drift = actual.get(key, 0) - stored.get(key, 0)
+        if drift:
+            tenant_id, event_id, metric, dimension = key
+            by_tenant[tenant_id][(event_id, metric, dimension)] = drift
+    async with async_session() as db:
+        for tenant_id, changes in by_tenant.items():
+            await bump_many(db, tenant_id, changes)
+        await db.commit()
+    return sum(len(changes) for changes in by_tenant.values())
+
+
+async def ensure_rollups():
+    """Build the counters on startup if the table is empty (new install or fresh migration)."""
+    async with async_session() as db:
+        has_rows = (await db.execute(select(StatsRollup.metric).limit(1))).first()
+    if has_rows:
+        return None
+    return await reconcile_rollups()
+
+
+# ── Personal stats cache ────────────────────────────────────
+
+MY_STATS_CACHE_MAX_USERS = 10000
+
+
+class PersonalStatsCache:
+    """
+    Per-process TTL cache of /analytics/my-stats bodies keyed by user.
+    Registrations, submissions, certificates and MCQ submissions invalidate
+    the user's entry; rank changes simply age out with the TTL.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self._ttl = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    def get(self, user_id) -> Optional[dict]:
+        cached = self._entries.get(str(user_id))
+        if cached is None:
+            return None
+        if cached[0] < time.monotonic():
+            del self._entries[str(user_id)]
+            return None
+        return cached[1]
+
+    def set(self, user_id, body: dict):
+        if self._ttl <= 0:
+            return
+        self._entries[str(user_id)] = (time.monotonic() + self._ttl, body)
+        self._entries.move_to_end(str(user_id))
+        while len(self._entries) > MY_STATS_CACHE_MAX_USERS:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *user_ids):
+        for user_id in user_ids:
+            self._entries.pop(str(user_id), None)
+
+
+my_stats_cache = PersonalStatsCache(settings.MY_STATS_CACHE_TTL_SECONDS)
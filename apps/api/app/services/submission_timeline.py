@@ -0,0 +1,177 @@
+"""
+CEAP — Submission Timeline
+Submissions per time bucket (minute / hour / day) and verdict for one event,
+grouped in the database: date_trunc() on PostgreSQL, strftime() on SQLite,
+over the (event_id, submitted_at) index.
+
+A bucket is closed once it has ended (plus CLOSE_GRACE for submissions still
+being committed) and none of its submissions are waiting for a verdict;
+from then on its counts cannot change. Closed buckets are cached per
+(event, bucket size) as a contiguous range, so a live chart refreshing every
+few seconds only regroups the buckets after that range — normally just the
+newest one.
+"""
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.problem import Submission
+
+BUCKET_SIZES = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+_SQLITE_FORMATS = {
+    "minute": "%Y-%m-%d %H:%M:00",
+    "hour": "%Y-%m-%d %H:00:00",
+    "day": "%Y-%m-%d 00:00:00",
+}
+MAX_BUCKETS = 5000
+PENDING_VERDICTS = ("pending", "queued")
+CLOSE_GRACE = timedelta(seconds=30)
+TIMELINE_CACHE_MAX = 256
+
+
+def truncate(at: datetime, bucket: str) -> datetime:
+    """Start of the bucket containing `at`, as date_trunc would compute it."""
+    if bucket == "day":
+        return at.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == "hour":
+        return at.replace(minute=0, second=0, microsecond=0)
+    return at.replace(second=0, microsecond=0)
+
+
+def _naive_utc(at: datetime) -> datetime:
+    return at.astimezone(timezone.utc).replace(tzinfo=None) if at.tzinfo else at
+
+
+def _bucket_expr(bucket: str):
+    if settings.is_sqlite:
+        return func.strftime(_SQLITE_FORMATS[bucket], Submission.submitted_at)
+    return func.date_trunc(bucket, Submission.submitted_at)
+
+
+def _as_datetime(value) -> datetime:
+    # SQLite returns the strftime text, PostgreSQL a timestamp
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+async def count_buckets(
+    db: AsyncSession, event_id, bucket: str, start: datetime, end: datetime,
+) -> dict[datetime, dict[str, int]]:
+    """bucket start → verdict → count, for submissions in [start, end)."""
+    bucket_start = _bucket_expr(bucket).label("bucket")
+    rows = (await db.execute(
+        select(bucket_start, Submission.status, func.count())
+        .where(
+            Submission.event_id == event_id,
+            Submission.submitted_at >= start,
+            Submission.submitted_at < end,
+        )
+        .group_by(bucket_start, Submission.status)
+    )).all()
+    counts = defaultdict(dict)
+    for at, status, n in rows:
+        counts[_as_datetime(at)][status or "unknown"] = n
+    return counts
+
+
+class ClosedRange(NamedTuple):
+    start: datetime
+    end: datetime  # exclusive; every bucket in [start, end) is closed
+    counts: dict
+
+
+class TimelineCache:
+    """Per-process cache of closed buckets, keyed by (event, bucket size)."""
+
+    def __init__(self):
+        self._ranges: OrderedDict[tuple, ClosedRange] = OrderedDict()
+
+    def get(self, event_id, bucket: str) -> Optional[ClosedRange]:
+        key = (str(event_id), bucket)
+        closed = self._ranges.get(key)
+        if closed is not None:
+            self._ranges.move_to_end(key)
+        return closed
+
+    def set(self, event_id, bucket: str, closed: ClosedRange):
+        key = (str(event_id), bucket)
+        self._ranges[key] = closed
+        self._ranges.move_to_end(key)
+        while len(self._ranges) > TIMELINE_CACHE_MAX:
+            self._ranges.popitem(last=False)
+
+    def invalidate(self, event_id):
+        for key in [k for k in self._ranges if k[0] == str(event_id)]:
+            del self._ranges[key]
+
+
+timeline_cache = TimelineCache()
+
+
+async def submission_timeline(
+    db: AsyncSession, event_id, bucket: str, start: datetime, end: datetime,
+) -> dict:
+    """
+    Counts per bucket and verdict for [start, end), every bucket included
+    (zeros where nothing was submitted). Closed buckets come from the cache.
+    """
+    step = BUCKET_SIZES[bucket]
+    start, end = truncate(_naive_utc(start), bucket), _naive_utc(end)
+    if truncate(end, bucket) != end:
+        end = truncate(end, bucket) + step
+    if end <= start:
+        raise ValueError("date_from must be before date_to")
+    if (end - start) / step > MAX_BUCKETS:
+        raise ValueError(f"Range spans more than {MAX_BUCKETS} {bucket} buckets; use a larger bucket or a shorter range")
+
+    # Reuse the cached closed range when it covers the start of the request
+    closed = timeline_cache.get(event_id, bucket)
+    if closed is None or closed.start > start or closed.end <= start:
+        closed = ClosedRange(start, start, {})
+    query_from = min(max(start, closed.end), end)
+    fresh = await count_buckets(db, event_id, bucket, query_from, end) if query_from < end else {}
+
+    # Extend the closed range over buckets that have ended with every verdict in
+    now = datetime.utcnow()
+    closed_end = closed.end
+    if closed_end == query_from:
+        counts = dict(closed.counts)
+        while closed_end < end and closed_end + step + CLOSE_GRACE <= now:
+            verdicts = fresh.get(closed_end, {})
+            if any(status in PENDING_VERDICTS for status in verdicts):
+                break
+            if verdicts:
+                counts[closed_end] = verdicts
+            closed_end += step
+        if closed_end > closed.end:
+            timeline_cache.set(event_id, bucket, ClosedRange(closed.start, closed_end, counts))
+        closed = ClosedRange(closed.start, closed_end, counts)
+
+    buckets = []
+    verdict_names = set()
+    at = start
+    while at < end:
+        verdicts = (closed.counts if at < closed.end else fresh).get(at, {})
+        verdict_names.update(verdicts)
+        buckets.append({
+            "start": at.isoformat(),
+            "total": sum(verdicts.values()),
+            "counts": verdicts,
+        })
+        at += step
+
+    return {
+        "event_id": str(event_id),
+        "bucket": bucket,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "verdicts": sorted(verdict_names),
+        "buckets": buckets,
+    }
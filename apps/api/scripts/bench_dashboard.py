@@ -0,0 +1,193 @@
+"""
+CEAP Dashboard Analytics Benchmark
+Grows a synthetic tenant's submission history step by step and measures
+/analytics/dashboard at each size: latency, DB statements and peak Python
+memory (tracemalloc). The dashboard reads stats_rollups counters, which the
+bulk inserts here don't bump, so they are reconciled after each step (outside
+the measurement). Its memory column stays flat; the row-loading baseline (every Submission loaded as an ORM object, as the
+dashboard used to) is measured alongside for comparison.
+
+Run: python -m scripts.bench_dashboard
+     python -m scripts.bench_dashboard --steps 5 --step-size 20000 --source-bytes 2000
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+DEFAULT_BENCH_DB = "./ceap_bench_dashboard.db"
+VERDICTS = ["accepted", "wrong_answer", "time_limit", "runtime_error", "compile_error"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="CEAP dashboard analytics benchmark")
+    parser.add_argument("--steps", type=int, default=4, help="number of growth steps")
+    parser.add_argument("--step-size", type=int, default=10000, help="submissions added per step")
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--source-bytes", type=int, default=1000, help="source_code size per submission")
+    parser.add_argument("--repeat", type=int, default=3, help="dashboard calls per step (best latency kept)")
+    parser.add_argument("--no-baseline", action="store_true", help="skip the row-loading baseline")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--database-url", default=None, help=f"defaults to a fresh SQLite file ({DEFAULT_BENCH_DB})")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the report as JSON")
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    """Point settings at the bench DB before app modules import."""
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        if os.path.exists(DEFAULT_BENCH_DB):
+            os.remove(DEFAULT_BENCH_DB)
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DEFAULT_BENCH_DB}"
+    os.environ["APP_ENV"] = "benchmark"  # disables SQL echo
+
+
+async def measure(coro_factory, statement_counter) -> tuple[float, int, int]:
+    """(ms, statements, peak KiB) of one awaited call."""
+    counter = [0]
+    statement_counter.set(counter)
+    tracemalloc.start()
+    start = time.monotonic()
+    await coro_factory()
+    elapsed = (time.monotonic() - start) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    statement_counter.set(None)
+    return elapsed, counter[0], peak // 1024
+
+
+async def run_benchmark(args) -> dict:
+    from sqlalchemy import event, insert, select
+    from app.database import engine, async_session, Base
+    from app.models import User, Submission
+    from app.api.v1.analytics import dashboard_analytics
+    from app.services.stats import reconcile_rollups
+    from scripts.seed import seed_synthetic_contest
+
+    # Statements issued by the measured call, including its concurrent sessions
+    statement_counter = contextvars.ContextVar("statement_counter", default=None)
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count_statement(*_):
+        counter = statement_counter.get()
+        if counter is not None:
+            counter[0] += 1
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_session() as db:
+        world = await seed_synthetic_contest(db, problems=5, tests_per_problem=1, students=args.students)
+        faculty = (await db.execute(select(User).where(User.id == world["student_ids"][0]))).scalar_one()
+        faculty.role = "faculty"
+        await db.commit()
+    await reconcile_rollups()
+    print(f"🌱 Synthetic tenant: {args.students} students, 5 problems")
+
+    rng = random.Random(args.seed)
+    source = "x" * args.source_bytes
+    started_at = datetime.utcnow() - timedelta(days=365)
+
+    async def dashboard():
+        async with async_session() as db:
+            return await dashboard_analytics(user=faculty, db=db)
+
+    async def load_rows():
+        async with async_session() as db:
+            return len((await db.execute(
+                select(Submission).where(Submission.event_id == world["event_id"])
+            )).scalars().all())
+
+    await dashboard()  # warm SQLAlchemy's statement cache so step 1 isn't charged for it
+    steps = []
+    total = 0
+    for step in range(1, args.steps + 1):
+        async with async_session() as db:
+            await db.execute(insert(Submission), [
+                {
+                    "id": uuid.uuid4(),
+                    "event_id": world["event_id"],
+                    "problem_id": rng.choice(world["problem_ids"]),
+                    "user_id": rng.choice(world["student_ids"]),
+                    "language": "python",
+                    "source_code": source,
+                    "status": rng.choice(VERDICTS),
+                    "score": 0,
+                    "submitted_at": started_at + timedelta(seconds=rng.randint(0, 365 * 86400)),
+                }
+                for _ in range(args.step_size)
+            ])
+            await db.commit()
+        # Counters for the rows just inserted behind the app's back
+        await reconcile_rollups()
+        total += args.step_size
+
+        runs = [await measure(dashboard, statement_counter) for _ in range(args.repeat)]
+        result = await dashboard()
+        assert result["stats"]["total_submissions"] == total, result["stats"]
+        row = {
+            "submissions": total,
+            "dashboard_ms": round(min(r[0] for r in runs), 1),
+            "dashboard_statements": runs[0][1],
+            "dashboard_peak_kib": max(r[2] for r in runs),
+        }
+        if not args.no_baseline:
+            ms, _, peak = await measure(load_rows, statement_counter)
+            row["baseline_ms"] = round(ms, 1)
+            row["baseline_peak_kib"] = peak
+        steps.append(row)
+        print(f"  step {step}/{args.steps}: {total} submissions")
+
+    await engine.dispose()
+    peaks = [s["dashboard_peak_kib"] for s in steps]
+    return {
+        "config": {
+            "steps": args.steps,
+            "step_size": args.step_size,
+            "students": args.students,
+            "source_bytes": args.source_bytes,
+        },
+        "steps": steps,
+        "dashboard_peak_growth": round(peaks[-1] / peaks[0], 2) if peaks and peaks[0] else None,
+    }
+
+
+def print_report(report: dict):
+    print("\n📊 Dashboard analytics — memory and latency vs. history size")
+    header = f"  {'submissions':>12} {'ms':>8} {'stmts':>6} {'peak KiB':>9}"
+    baseline = "baseline_ms" in report["steps"][0]
+    if baseline:
+        header += f"  │ {'rows ms':>8} {'rows peak KiB':>14}"
+    print(header)
+    for s in report["steps"]:
+        line = (
+            f"  {s['submissions']:>12} {s['dashboard_ms']:>8} "
+            f"{s['dashboard_statements']:>6} {s['dashboard_peak_kib']:>9}"
+        )
+        if baseline:
+            line += f"  │ {s['baseline_ms']:>8} {s['baseline_peak_kib']:>14}"
+        print(line)
+    print(f"\n  Dashboard peak memory growth, first → last step: ×{report['dashboard_peak_growth']}")
+
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"\n💾 Report written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
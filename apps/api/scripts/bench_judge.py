@@ -0,0 +1,236 @@
+"""
+CEAP Judge Throughput Benchmark
+Drives process_submission and run_code at a target rate against the fake
+Judge0 server and a synthetic contest, then reports throughput, verdict
+latency percentiles and DB statements per operation.
+
+Run: python -m scripts.bench_judge --rate 5 --duration 30
+     python -m scripts.bench_judge --rate 20 --error-rate 0.05 --json bench.json
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import random
+import sys
+import time
+
+DEFAULT_BENCH_DB = "./ceap_bench.db"
+
+
+def parse_args():
+    from scripts.fake_judge0 import add_arguments
+
+    parser = argparse.ArgumentParser(description="CEAP judge throughput benchmark")
+    parser.add_argument("--rate", type=float, default=5.0, help="operations started per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to keep generating load")
+    parser.add_argument("--run-ratio", type=float, default=0.2, help="fraction of operations that are run_code")
+    parser.add_argument("--problems", type=int, default=5)
+    parser.add_argument("--tests", type=int, default=10, help="test cases per problem")
+    parser.add_argument("--students", type=int, default=100)
+    parser.add_argument("--mode", choices=["ioi", "icpc"], default="ioi")
+    parser.add_argument("--port", type=int, default=23580, help="fake Judge0 port")
+    parser.add_argument("--database-url", default=None, help=f"defaults to a fresh SQLite file ({DEFAULT_BENCH_DB})")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the report as JSON")
+    add_arguments(parser)
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    """Point settings at the bench DB and fake Judge0 before app modules import."""
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        if os.path.exists(DEFAULT_BENCH_DB):
+            os.remove(DEFAULT_BENCH_DB)
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DEFAULT_BENCH_DB}"
+    # 127.0.0.1 rather than localhost — "localhost" selects the local subprocess backend
+    os.environ["JUDGE0_URL"] = f"http://127.0.0.1:{args.port}"
+    os.environ["JUDGE0_API_KEY"] = ""
+    os.environ["APP_ENV"] = "benchmark"  # disables SQL echo
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile; 0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: list[dict], wall_seconds: float) -> dict:
+    latencies = [s["latency_ms"] for s in samples]
+    statements = [s["statements"] for s in samples]
+    verdicts = {}
+    for s in samples:
+        verdicts[s["verdict"]] = verdicts.get(s["verdict"], 0) + 1
+    return {
+        "count": len(samples),
+        "per_minute": round(len(samples) / wall_seconds * 60, 1) if wall_seconds else 0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "p99": round(percentile(latencies, 99), 1),
+            "max": round(max(latencies, default=0), 1),
+        },
+        "db_statements": {
+            "mean": round(sum(statements) / len(statements), 1) if statements else 0,
+            "max": max(statements, default=0),
+        },
+        "verdicts": verdicts,
+    }
+
+
+async def run_benchmark(args) -> dict:
+    from sqlalchemy import event, select
+    from app.database import engine, async_session, Base
+    from app.models import User, Submission
+    from app.api.v1.submissions import process_submission, run_code
+    from app.schemas.submission import RunRequest
+    from scripts.seed import seed_synthetic_contest
+    from scripts.fake_judge0 import serve, config_from_args
+
+    # Count statements per operation: each task gets its own counter via contextvars
+    statement_counter = contextvars.ContextVar("statement_counter", default=None)
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _count_statement(*_):
+        counter = statement_counter.get()
+        if counter is not None:
+            counter[0] += 1
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_session() as db:
+        world = await seed_synthetic_contest(
+            db,
+            problems=args.problems,
+            tests_per_problem=args.tests,
+            students=args.students,
+            scoring_mode=args.mode,
+        )
+    print(f"🌱 Synthetic contest: {args.problems} problems × {args.tests} tests, {args.students} students")
+
+    server, server_task, fake_app = await serve(config_from_args(args), port=args.port)
+    print(f"🧪 Fake Judge0 on 127.0.0.1:{args.port}")
+
+    rng = random.Random(args.seed)
+    samples = {"submission": [], "run": []}
+
+    async def grade_one():
+        student_id = rng.choice(world["student_ids"])
+        problem_id = rng.choice(world["problem_ids"])
+        async with async_session() as db:
+            sub = Submission(
+                event_id=world["event_id"],
+                problem_id=problem_id,
+                user_id=student_id,
+                language="python",
+                source_code="print(input())",
+                status="queued",
+            )
+            db.add(sub)
+            await db.commit()
+            submission_id = sub.id
+
+        counter = [0]
+        statement_counter.set(counter)
+        start = time.monotonic()
+        await process_submission(str(submission_id), str(problem_id))
+        latency = (time.monotonic() - start) * 1000
+        statement_counter.set(None)
+
+        async with async_session() as db:
+            verdict = (await db.execute(
+                select(Submission.status).where(Submission.id == submission_id)
+            )).scalar()
+        samples["submission"].append({"latency_ms": latency, "statements": counter[0], "verdict": verdict})
+
+    async def run_one():
+        student_id = rng.choice(world["student_ids"])
+        problem_id = rng.choice(world["problem_ids"])
+        req = RunRequest(
+            event_id=world["event_id"],
+            problem_id=problem_id,
+            language="python",
+            source_code="print(input())",
+        )
+        counter = [0]
+        statement_counter.set(counter)
+        start = time.monotonic()
+        async with async_session() as db:
+            user = (await db.execute(select(User).where(User.id == student_id))).scalar_one()
+            counter[0] = 0  # don't charge the benchmark's own user lookup
+            result = await run_code(req, user=user, db=db)
+        latency = (time.monotonic() - start) * 1000
+        samples["run"].append({"latency_ms": latency, "statements": counter[0], "verdict": result.status})
+
+    total_ops = int(args.rate * args.duration)
+    print(f"🚀 {total_ops} operations at {args.rate}/s ({args.run_ratio:.0%} run_code)")
+    started = time.monotonic()
+    tasks = []
+    for i in range(total_ops):
+        delay = started + i / args.rate - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        op = run_one if rng.random() < args.run_ratio else grade_one
+        tasks.append(asyncio.create_task(op()))
+
+    outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+    wall = time.monotonic() - started
+    failures = [o for o in outcomes if isinstance(o, Exception)]
+
+    server.should_exit = True
+    await server_task
+    await engine.dispose()
+
+    return {
+        "config": {
+            "rate": args.rate,
+            "duration": args.duration,
+            "run_ratio": args.run_ratio,
+            "problems": args.problems,
+            "tests_per_problem": args.tests,
+            "mode": args.mode,
+            "latency_ms": args.latency_ms,
+            "processing_ms": args.processing_ms,
+            "error_rate": args.error_rate,
+        },
+        "wall_seconds": round(wall, 2),
+        "submissions": summarize(samples["submission"], wall),
+        "runs": summarize(samples["run"], wall),
+        "judge0_requests": dict(fake_app.state.stats),
+        "harness_failures": [repr(f) for f in failures[:5]],
+    }
+
+
+def print_report(report: dict):
+    print(f"\n📊 Judge benchmark — {report['wall_seconds']}s wall")
+    for label, key in (("process_submission", "submissions"), ("run_code", "runs")):
+        r = report[key]
+        lat = r["latency_ms"]
+        print(f"\n  {label}: {r['count']} done, {r['per_minute']}/min")
+        print(f"    verdict latency  p50 {lat['p50']}ms  p95 {lat['p95']}ms  p99 {lat['p99']}ms  max {lat['max']}ms")
+        print(f"    DB statements    mean {r['db_statements']['mean']}  max {r['db_statements']['max']}")
+        print(f"    verdicts         {r['verdicts']}")
+    j0 = report["judge0_requests"]
+    print(f"\n  Judge0: {j0['created']} created, {j0['polls']} polls, {j0['errors']} injected errors")
+    if report["harness_failures"]:
+        print(f"  ⚠️ harness failures: {report['harness_failures']}")
+
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"\n💾 Report written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
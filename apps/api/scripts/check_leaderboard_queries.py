@@ -0,0 +1,123 @@
+"""
+CEAP Leaderboard Query Check
+Builds leaderboard pages of different sizes over a synthetic contest and
+checks that each costs the same number of SQL statements, so per-entry
+lookups (an N+1 on names) can't creep back into build_leaderboard_page.
+
+Run: python -m scripts.check_leaderboard_queries
+     python -m scripts.check_leaderboard_queries --students 300 --sizes 5 50 100
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+DEFAULT_CHECK_DB = "./ceap_check_leaderboard.db"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Leaderboard page statement-count check")
+    parser.add_argument("--students", type=int, default=150, help="solo entries on the board")
+    parser.add_argument("--teams", type=int, default=20, help="team entries on the board")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 100], help="page sizes to compare")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--database-url", default=None, help=f"defaults to a fresh SQLite file ({DEFAULT_CHECK_DB})")
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    """Point settings at the check DB before app modules import."""
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        if os.path.exists(DEFAULT_CHECK_DB):
+            os.remove(DEFAULT_CHECK_DB)
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DEFAULT_CHECK_DB}"
+    os.environ["APP_ENV"] = "benchmark"  # disables SQL echo
+
+
+async def run_check(args) -> bool:
+    from sqlalchemy import event, insert
+    from app.database import engine, async_session, Base
+    from app.models.event import Team
+    from app.models.leaderboard import LeaderboardEntry
+    from app.services.leaderboard import MemoryLeaderboardStore, build_leaderboard_page
+    from scripts.seed import seed_synthetic_contest
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_session() as db:
+        world = await seed_synthetic_contest(db, problems=1, tests_per_problem=1, students=args.students)
+
+    # Solo and team entries, so both name joins are exercised
+    rng = random.Random(args.seed)
+    started_at = datetime.utcnow() - timedelta(hours=1)
+    team_ids = [uuid.uuid4() for _ in range(args.teams)]
+    participants = [("user_id", sid) for sid in world["student_ids"]] + [("team_id", tid) for tid in team_ids]
+    async with async_session() as db:
+        if team_ids:
+            await db.execute(insert(Team), [
+                {"id": tid, "event_id": world["event_id"], "name": f"Team {i}"} for i, tid in enumerate(team_ids)
+            ])
+        await db.execute(insert(LeaderboardEntry), [
+            {
+                "id": uuid.uuid4(),
+                "event_id": world["event_id"],
+                column: participant_id,
+                "total_score": rng.randint(0, 500),
+                "problems_solved": rng.randint(0, 5),
+                "total_time": 0,
+                "penalty": 0,
+                "last_submission": started_at + timedelta(seconds=rng.randint(0, 3600)),
+            }
+            for column, participant_id in participants
+        ])
+        await db.commit()
+    board_size = len(participants)
+
+    statements = [None]
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _count_statement(*_):
+        if statements[0] is not None:
+            statements[0] += 1
+
+    store = MemoryLeaderboardStore()
+    counts = {}
+    ok = True
+    async with async_session() as db:
+        ranking = await store.get(db, world["event_id"])
+        await build_leaderboard_page(db, ranking, 0, 1)  # warm SQLAlchemy's statement cache
+        for size in args.sizes:
+            statements[0] = 0
+            page = await build_leaderboard_page(db, ranking, 0, size)
+            counts[size], statements[0] = statements[0], None
+            expected = min(size, board_size)
+            named = sum(1 for e in page["entries"] if e["user_name"] or e["team_name"])
+            if len(page["entries"]) != expected or named != expected:
+                print(f"❌ page of {size}: {len(page['entries'])} entries, {named} named (expected {expected})")
+                ok = False
+    await engine.dispose()
+
+    for size, count in counts.items():
+        print(f"  page of {size:>4}: {count} statement(s)")
+    if len(set(counts.values())) != 1:
+        print("❌ Statements per leaderboard page grow with the page size")
+        return False
+    if ok:
+        print(f"✅ Every page costs {next(iter(counts.values()))} statement(s), whatever its size")
+    return ok
+
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+    ok = asyncio.run(run_check(args))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+CEAP — Fake Judge0 Server
+A local stand-in for the Judge0 CE submissions API, for benchmarks.
+Does not run any code: verdicts are drawn from configurable rates and
+results become ready after a configurable processing delay.
+
+Run standalone: python -m scripts.fake_judge0 --port 2358 --processing-ms 300
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from dataclasses import dataclass
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+@dataclass
+class FakeJudge0Config:
+    latency_ms: float = 20.0        # added to every HTTP response
+    processing_ms: float = 200.0    # time until a submission's result is ready
+    jitter: float = 0.2             # ± fraction applied to processing_ms
+    error_rate: float = 0.0         # POSTs answered with HTTP 503
+    wrong_rate: float = 0.1         # finished as Wrong Answer
+    tle_rate: float = 0.02          # finished as Time Limit Exceeded
+    compile_error_rate: float = 0.0
+    seed: int | None = None
+
+
+def create_app(config: FakeJudge0Config) -> FastAPI:
+    """Build the fake Judge0 app. Request counters live on app.state.stats."""
+    app = FastAPI(title="Fake Judge0")
+    rng = random.Random(config.seed)
+    submissions: dict[str, dict] = {}
+    app.state.stats = {"created": 0, "polls": 0, "errors": 0}
+
+    async def delay():
+        if config.latency_ms:
+            await asyncio.sleep(config.latency_ms / 1000.0)
+
+    def draw_verdict() -> int:
+        roll = rng.random()
+        for status_id, rate in (
+            (6, config.compile_error_rate),
+            (5, config.tle_rate),
+            (4, config.wrong_rate),
+        ):
+            if roll < rate:
+                return status_id
+            roll -= rate
+        return 3
+
+    @app.post("/submissions")
+    async def create_submission(request: Request):
+        await delay()
+        if rng.random() < config.error_rate:
+            app.state.stats["errors"] += 1
+            return JSONResponse(status_code=503, content={"error": "injected failure"})
+
+        payload = await request.json()
+        processing = config.processing_ms * (1 + rng.uniform(-config.jitter, config.jitter))
+        token = str(uuid.uuid4())
+        submissions[token] = {
+            "ready_at": time.monotonic() + processing / 1000.0,
+            "status_id": draw_verdict(),
+            "expected_output": payload.get("expected_output") or "",
+            "time_limit": float(payload.get("cpu_time_limit") or 2.0),
+        }
+        app.state.stats["created"] += 1
+        return JSONResponse(status_code=201, content={"token": token})
+
+    @app.get("/submissions/{token}")
+    async def get_submission(token: str):
+        await delay()
+        app.state.stats["polls"] += 1
+        sub = submissions.get(token)
+        if not sub:
+            return JSONResponse(status_code=404, content={"error": "Not found"})
+        if time.monotonic() < sub["ready_at"]:
+            return {"status": {"id": 2, "description": "Processing"}}
+
+        status_id = sub["status_id"]
+        return {
+            "status": {"id": status_id},
+            "stdout": sub["expected_output"] if status_id == 3 else ("wrong\n" if status_id == 4 else ""),
+            "stderr": "",
+            "compile_output": "error: expected ';'" if status_id == 6 else "",
+            "time": str(sub["time_limit"] if status_id == 5 else round(rng.uniform(0.01, 0.2), 3)),
+            "memory": rng.randint(3000, 20000),
+        }
+
+    return app
+
+
+async def serve(config: FakeJudge0Config, host: str = "127.0.0.1", port: int = 2358):
+    """Start the fake server in the running loop. Returns (server, task, app)."""
+    import uvicorn
+
+    app = create_app(config)
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server, task, app
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--processing-ms", type=float, default=200.0)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--wrong-rate", type=float, default=0.1)
+    parser.add_argument("--tle-rate", type=float, default=0.02)
+    parser.add_argument("--compile-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args) -> FakeJudge0Config:
+    return FakeJudge0Config(
+        latency_ms=args.latency_ms,
+        processing_ms=args.processing_ms,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        wrong_rate=args.wrong_rate,
+        tle_rate=args.tle_rate,
+        compile_error_rate=args.compile_error_rate,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake Judge0 server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2358)
+    add_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_app(config_from_args(args)), host=args.host, port=args.port)
@@ -0,0 +1,333 @@
+"""
+CEAP — In-process Fake Redis
+Implements the redis.asyncio commands the leaderboard store and page cache
+use (strings, hashes, sets, sorted sets with lexicographic ranges, pipelines,
+and the store's Lua scripts as Python ports), so both can run without a
+Redis server.
+
+Run: python -m scripts.fake_redis
+     — replays random verdicts into the memory store and the Redis store on
+       this fake and checks that pages, ranks and cursors agree.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sortedcontainers import SortedList
+
+
+class FakePipeline:
+    """Queues commands and runs them in order on execute(), like a MULTI block."""
+
+    def __init__(self, redis: "FakeRedis"):
+        self._redis = redis
+        self._commands = []
+
+    def __getattr__(self, name):
+        method = getattr(self._redis, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((method, args, kwargs))
+            return self
+
+        return queue
+
+    def run_script(self, port, keys: list, args: list):
+        self._commands.append((port, (self._redis, keys, args), {}))
+        return self
+
+    async def execute(self) -> list:
+        commands, self._commands = self._commands, []
+        return [await method(*args, **kwargs) for method, args, kwargs in commands]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self._commands = []
+
+
+class FakeScript:
+    """Registered script: runs the Python port of its Lua source (see _script_ports)."""
+
+    def __init__(self, redis: "FakeRedis", port):
+        self._redis = redis
+        self._port = port
+
+    async def __call__(self, keys=None, args=None, client=None):
+        if isinstance(client, FakePipeline):
+            return client.run_script(self._port, list(keys or []), [str(a) for a in args or []])
+        return await self._port(self._redis, list(keys or []), [str(a) for a in args or []])
+
+
+async def _record_port(redis: "FakeRedis", keys: list, args: list) -> list:
+    z, members, who, dirty = keys
+    entry_id, member, participant_id, event_id = args
+    old = await redis.hget(members, entry_id)
+    old_rank = -1
+    if old is not None:
+        rank = await redis.zrank(z, old)
+        old_rank = -1 if rank is None else rank
+        await redis.zrem(z, old)
+    await redis.zadd(z, {member: 0})
+    await redis.hset(members, entry_id, member)
+    await redis.hset(who, participant_id, entry_id)
+    await redis.sadd(dirty, event_id)
+    return [0 if old is None else 1, old_rank, await redis.zrank(z, member)]
+
+
+async def _place_port(redis: "FakeRedis", keys: list, args: list):
+    z, members = keys
+    entry_id, member = args
+    if await redis.hsetnx(members, entry_id, member):
+        await redis.zadd(z, {member: 0})
+    return None
+
+
+async def _remove_port(redis: "FakeRedis", keys: list, args: list):
+    z, members, who, flushed, dirty = keys
+    entry_id, participant_id, event_id = args
+    member = await redis.hget(members, entry_id)
+    if member is not None:
+        await redis.zrem(z, member)
+        await redis.hdel(members, entry_id)
+        await redis.sadd(dirty, event_id)
+    await redis.hdel(flushed, entry_id)
+    if await redis.hget(who, participant_id) == entry_id:
+        await redis.hdel(who, participant_id)
+    return None
+
+
+def _script_ports() -> dict:
+    from app.services import leaderboard_redis
+
+    return {
+        leaderboard_redis._RECORD_SCRIPT: _record_port,
+        leaderboard_redis._PLACE_SCRIPT: _place_port,
+        leaderboard_redis._REMOVE_SCRIPT: _remove_port,
+    }
+
+
+class FakeRedis:
+    """Single-process stand-in for redis.asyncio.Redis(decode_responses=True)."""
+
+    def __init__(self):
+        self._data: dict = {}
+        self._expires: dict[str, float] = {}
+
+    def _live(self, key):
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return self._data.get(key)
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    def register_script(self, script: str) -> FakeScript:
+        return FakeScript(self, _script_ports()[script])
+
+    # Keys and strings
+    async def exists(self, *keys) -> int:
+        return sum(1 for key in keys if self._live(key) is not None)
+
+    async def delete(self, *keys) -> int:
+        removed = 0
+        for key in keys:
+            removed += self._data.pop(key, None) is not None
+            self._expires.pop(key, None)
+        return removed
+
+    async def get(self, key):
+        return self._live(key)
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and self._live(key) is not None:
+            return None
+        self._data[key] = str(value)
+        if ex is not None:
+            self._expires[key] = time.monotonic() + ex
+        else:
+            self._expires.pop(key, None)
+        return True
+
+    async def incr(self, key) -> int:
+        value = int(self._live(key) or 0) + 1
+        self._data[key] = str(value)
+        return value
+
+    # Hashes
+    def _hash(self, key) -> dict:
+        return self._data.setdefault(key, {}) if self._live(key) is None else self._data[key]
+
+    async def hget(self, key, field):
+        return (self._live(key) or {}).get(str(field))
+
+    async def hset(self, key, field=None, value=None, mapping=None) -> int:
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        h = self._hash(key)
+        added = sum(1 for f in items if str(f) not in h)
+        h.update({str(f): str(v) for f, v in items.items()})
+        return added
+
+    async def hsetnx(self, key, field, value) -> bool:
+        h = self._hash(key)
+        if str(field) in h:
+            return False
+        h[str(field)] = str(value)
+        return True
+
+    async def hdel(self, key, *fields) -> int:
+        h = self._live(key) or {}
+        return sum(1 for f in fields if h.pop(str(f), None) is not None)
+
+    async def hgetall(self, key) -> dict:
+        return dict(self._live(key) or {})
+
+    # Sets
+    async def sadd(self, key, *members) -> int:
+        s = self._data.setdefault(key, set())
+        added = sum(1 for m in members if str(m) not in s)
+        s.update(str(m) for m in members)
+        return added
+
+    async def spop(self, key):
+        s = self._live(key)
+        if not s:
+            return None
+        member = s.pop()
+        if not s:
+            del self._data[key]
+        return member
+
+    # Sorted sets — every member here has score 0, so order is lexicographic
+    def _zset(self, key) -> SortedList:
+        return self._data.setdefault(key, SortedList())
+
+    async def zadd(self, key, mapping: dict) -> int:
+        z = self._zset(key)
+        added = 0
+        for member in mapping:
+            if member not in z:
+                z.add(member)
+                added += 1
+        return added
+
+    async def zrem(self, key, *members) -> int:
+        z = self._live(key)
+        if z is None:
+            return 0
+        removed = 0
+        for member in members:
+            if member in z:
+                z.remove(member)
+                removed += 1
+        return removed
+
+    async def zrank(self, key, member):
+        z = self._live(key)
+        if z is None or member not in z:
+            return None
+        return z.index(member)
+
+    async def zcard(self, key) -> int:
+        return len(self._live(key) or ())
+
+    async def zrange(self, key, start: int, end: int) -> list:
+        z = self._live(key)
+        if not z:
+            return []
+        end = len(z) - 1 if end < 0 else end
+        return list(z.islice(start, end + 1))
+
+    async def zlexcount(self, key, low: str, high: str) -> int:
+        z = self._live(key) or SortedList()
+
+        def bound(spec, lower):
+            if spec == "-":
+                return 0
+            if spec == "+":
+                return len(z)
+            value, inclusive = spec[1:], spec[0] == "["
+            if lower:
+                return z.bisect_left(value) if inclusive else z.bisect_right(value)
+            return z.bisect_right(value) if inclusive else z.bisect_left(value)
+
+        return max(0, bound(high, False) - bound(low, True))
+
+
+async def check_store_parity(verdicts: int, participants: int, seed) -> bool:
+    """Feed the same random entry changes to both stores and compare every read."""
+    from app.services.leaderboard import EventRanking, MemoryLeaderboardStore, encode_cursor, decode_cursor
+    from app.services.leaderboard_redis import RedisLeaderboardStore
+
+    rng = random.Random(seed)
+    event_id = uuid.uuid4()
+    memory = MemoryLeaderboardStore()
+    memory._events[event_id] = EventRanking()
+    fake = FakeRedis()
+    redis_store = RedisLeaderboardStore(fake)
+    await fake.set(f"ceap:lb:state:{event_id}", "ready")
+
+    start = datetime(2026, 1, 1, 9, 0)
+    entries = [
+        SimpleNamespace(
+            id=uuid.uuid4(), event_id=event_id, user_id=uuid.uuid4(), team_id=None,
+            total_score=0, problems_solved=0, total_time=0, penalty=0, last_submission=None,
+        )
+        for _ in range(participants)
+    ]
+
+    mismatches = 0
+    for i in range(verdicts):
+        entry = rng.choice(entries)
+        entry.total_score = round(rng.choice([entry.total_score, rng.uniform(0, 500)]), 2)
+        entry.problems_solved = rng.randint(0, 5)
+        entry.total_time = rng.choice([0, rng.randint(0, 300)])
+        entry.penalty = rng.choice([0, 20, 40])
+        entry.last_submission = start + timedelta(seconds=i, microseconds=rng.randint(0, 999999))
+        mismatches += await memory.record(entry) != await redis_store.record(entry)
+
+    # A few entries leave the board (solo entries merged into teams)
+    for entry in rng.sample(entries, min(3, len(entries))):
+        await memory.remove(event_id, entry.id, entry.user_id)
+        await redis_store.remove(event_id, entry.id, entry.user_id)
+
+    db = None  # both events are already loaded, so get() never touches the DB
+    m_view, r_view = await memory.get(db, event_id), await redis_store.get(db, event_id)
+    count = await m_view.count()
+    mismatches += count != await r_view.count()
+    mismatches += await m_view.ranks() != await r_view.ranks()
+    for offset in range(0, count, 7):
+        mismatches += await m_view.page(offset, 7) != await r_view.page(offset, 7)
+        cursor = encode_cursor(await m_view.key_at(offset))
+        mismatches += cursor != encode_cursor(await r_view.key_at(offset))
+        key = decode_cursor(cursor)
+        mismatches += await m_view.index_after(key) != await r_view.index_after(key)
+    for entry in entries:
+        mismatches += await m_view.ranked_id_for(entry.user_id) != await r_view.ranked_id_for(entry.user_id)
+
+    print(f"{'✅' if not mismatches else '❌'} {verdicts} verdicts, {count} entries, {mismatches} mismatches")
+    return not mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory vs Redis leaderboard store parity check")
+    parser.add_argument("--verdicts", type=int, default=2000)
+    parser.add_argument("--participants", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    ok = asyncio.run(check_store_parity(args.verdicts, args.participants, args.seed))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -310,5 +310,91 @@ Consider only alphanumeric characters and ignore cases.""",
     print("  Active event: CodeBlitz 2026 (3 problems)")
 
 
+async def seed_synthetic_contest(
+    db,
+    *,
+    problems: int = 5,
+    tests_per_problem: int = 10,
+    students: int = 50,
+    scoring_mode: str = "ioi",
+) -> dict:
+    """
+    Create a throwaway tenant with an ongoing coding contest, echo-style
+    problems, test cases and approved student registrations.
+    Used by load/benchmark scripts. Returns the created IDs.
+    """
+    suffix = uuid.uuid4().hex[:8]
+    tenant_id = uuid.uuid4()
+    db.add(Tenant(id=tenant_id, slug=f"synthetic-{suffix}", name=f"Synthetic {suffix}", plan="campus"))
+
+    student_ids = [uuid.uuid4() for _ in range(students)]
+    db.add_all([
+        User(
+            id=sid,
+            tenant_id=tenant_id,
+            email=f"student{i}@synthetic-{suffix}.ceap",
+            full_name=f"Synthetic Student {i}",
+            role="student",
+            roll_number=f"SYN{i:05d}",
+            is_active=True,
+        )
+        for i, sid in enumerate(student_ids)
+    ])
+
+    event_id = uuid.uuid4()
+    db.add(Event(
+        id=event_id,
+        tenant_id=tenant_id,
+        title=f"Synthetic Contest {suffix}",
+        slug=f"synthetic-{suffix}",
+        event_type="coding_contest",
+        status="ongoing",
+        event_start=datetime.utcnow() - timedelta(hours=1),
+        event_end=datetime.utcnow() + timedelta(days=1),
+        scoring_formula={"auto": 1.0, "judge": 0.0, "mode": scoring_mode},
+    ))
+
+    problem_ids = [uuid.uuid4() for _ in range(problems)]
+    for p_index, pid in enumerate(problem_ids):
+        db.add(Problem(
+            id=pid,
+            tenant_id=tenant_id,
+            title=f"Echo {p_index + 1}",
+            slug=f"echo-{p_index + 1}-{suffix}",
+            problem_type="coding",
+            difficulty="easy",
+            description="Print the input unchanged.",
+            sample_input="1",
+            sample_output="1",
+            time_limit_ms=1000,
+            allowed_languages=["python", "cpp", "java", "javascript"],
+        ))
+        db.add_all([
+            TestCase(
+                problem_id=pid,
+                input=str(t),
+                expected_output=str(t),
+                is_sample=t < 2,
+                weight=1,
+                order_index=t,
+            )
+            for t in range(tests_per_problem)
+        ])
+        db.add(EventProblem(event_id=event_id, problem_id=pid, order_index=p_index, points=100))
+
+    db.add_all([
+        Registration(event_id=event_id, user_id=sid, status="approved")
+        for sid in student_ids
+    ])
+    await db.commit()
+
+    return {
+        "tenant_id": tenant_id,
+        "event_id": event_id,
+        "problem_ids": problem_ids,
+        "student_ids": student_ids,
+    }
+
+
 if __name__ == "__main__":
     asyncio.run(seed())
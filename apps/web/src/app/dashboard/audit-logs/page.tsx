@@ -20,13 +20,17 @@ const ACTION_ICONS: Record<string, { icon: typeof LogIn; color: string }> = {
 };
 
 export default function AuditLogsPage() {
-    const [page, setPage] = useState(1);
+    // Cursors of the pages visited so far; the last one is the current page
+    const [cursors, setCursors] = useState<(string | null)[]>([null]);
     const [filter, setFilter] = useState("");
+    const page = cursors.length;
+    const cursor = cursors[cursors.length - 1];
 
     const { data, isLoading } = useQuery({
-        queryKey: ["audit-logs", page, filter],
+        queryKey: ["audit-logs", cursor, filter],
         queryFn: async () => {
-            const params: any = { page, page_size: 30 };
+            const params: any = { page_size: 30 };
+            if (cursor) params.cursor = cursor;
             if (filter) params.action = filter;
             const { data } = await analyticsAPI.auditLogs(params);
             return data;
@@ -42,7 +46,7 @@ export default function AuditLogsPage() {
                     <FileText size={18} style={{ color: "var(--primary)" }} />
                     Audit Logs
                 </h1>
-                <select value={filter} onChange={(e) => { setFilter(e.target.value); setPage(1); }}
+                <select value={filter} onChange={(e) => { setFilter(e.target.value); setCursors([null]); }}
                     className="text-xs px-3 py-2 rounded-lg"
                     style={{ background: "var(--surface-2)", color: "var(--text-primary)", border: "1px solid var(--border)" }}>
                     <option value="">All Actions</option>
@@ -111,16 +115,16 @@ export default function AuditLogsPage() {
 
                     {/* Pagination */}
                     <div className="flex items-center justify-between text-xs" style={{ color: "var(--text-muted)" }}>
-                        <span>Total: {data?.total || 0} logs</span>
+                        <span>Total: {data?.total_is_estimate ? "~" : ""}{data?.total || 0} logs</span>
                         <div className="flex gap-2">
-                            <button onClick={() => setPage((p) => Math.max(1, p - 1))} disabled={page <= 1}
+                            <button onClick={() => setCursors((c) => c.slice(0, -1))} disabled={page <= 1}
                                 className="px-3 py-1.5 rounded-lg disabled:opacity-30"
                                 style={{ background: "var(--surface-2)" }}>
                                 <ChevronLeft size={12} />
                             </button>
                             <span className="px-3 py-1.5">Page {page}</span>
-                            <button onClick={() => setPage((p) => p + 1)}
-                                disabled={!data?.logs?.length || data.logs.length < 30}
+                            <button onClick={() => setCursors((c) => [...c, data.next_cursor])}
+                                disabled={!data?.next_cursor}
                                 className="px-3 py-1.5 rounded-lg disabled:opacity-30"
                                 style={{ background: "var(--surface-2)" }}>
                                 <ChevronRight size={12} />